@@ -1,4 +1,43 @@
-from pydub import AudioSegment
+import glob
+import os
+import queue
+import struct
+import subprocess
+import tempfile
+import threading
+import time
+import wave
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from conversion_manifest import ConversionManifest, encoder_settings, file_digest
+import tracing
+
+# Outcome of converting a single file.
+# `error` is None on success; `seconds` is the wall time spent on the file; `skipped` is True
+# when an incremental batch found the file unchanged since its last conversion.
+ConversionResult = namedtuple("ConversionResult", ["source", "output", "success", "error", "seconds", "skipped"],
+                              defaults=(False,))
+
+# One output of `multi_export`: a format and an optional encoder bitrate such as "320k".
+ExportTarget = namedtuple("ExportTarget", ["format", "bitrate"], defaults=(None,))
+
+# Bytes of PCM moved per step by `stream_convert`; this bounds its memory use.
+STREAM_CHUNK_SIZE = 1 << 20
+
+# Output paths of `multi_export`. Fields: dir, name (file name without extension), stem (path
+# without extension), format, bitrate ("" when unset) and tag ("-<bitrate>" when set, else "").
+DEFAULT_EXPORT_TEMPLATE = "{stem}{tag}.{format}"
+
+# PCM chunks buffered per encoder by `multi_export`; a slow encoder holds back the decoder after this many
+EXPORT_QUEUE_CHUNKS = 8
+
+# ffmpeg raw sample formats for each PCM sample width in bytes, as pydub holds them in memory
+RAW_SAMPLE_FORMATS = {1: "s8", 2: "s16le", 4: "s32le"}
+
+# Byte translation tables for the per-chunk PCM fix-ups done by `stream_convert`
+_BIAS_8BIT = bytes((byte + 128) & 0xFF for byte in range(256))
+_SIGN_PADDING = bytes(0xFF if byte > 0x7F else 0x00 for byte in range(256))
 
 
 def convert_mp3_to_wav(filepath):
@@ -7,13 +46,10 @@ def convert_mp3_to_wav(filepath):
     :param filepath: Path to the MP3 file.
     :return: Success or error message.
     """
-    try:
-        output_path = filepath.replace(".mp3", ".wav")
-        audio = AudioSegment.from_file(filepath, format="mp3")
-        audio.export(output_path, format="wav")
-        return f"Converted to WAV: {output_path}"
-    except Exception as e:
-        return f"Error converting MP3 to WAV: {e}"
+    result = convert_file(filepath, "mp3", "wav")
+    if result.success:
+        return f"Converted to WAV: {result.output}"
+    return f"Error converting MP3 to WAV: {result.error}"
 
 
 def convert_wav_to_mp3(filepath):
@@ -22,10 +58,491 @@ def convert_wav_to_mp3(filepath):
     :param filepath: Path to the WAV file.
     :return: Success or error message.
     """
+    result = convert_file(filepath, "wav", "mp3")
+    if result.success:
+        return f"Converted to MP3: {result.output}"
+    return f"Error converting WAV to MP3: {result.error}"
+
+
+def output_path_for(filepath, target_format, output_dir=None):
+    """
+    Builds the output path for a converted file.
+    :param filepath: Path to the source file.
+    :param target_format: Target format, used as the new extension (e.g. "wav").
+    :param output_dir: Optional directory for the output; defaults to the source's directory.
+    :return: Output file path.
+    """
+    stem = os.path.splitext(filepath)[0]
+    if output_dir:
+        stem = os.path.join(output_dir, os.path.basename(stem))
+    return f"{stem}.{target_format}"
+
+
+@tracing.traced("convert.file")
+def convert_file(filepath, source_format, target_format, output_dir=None, streaming=False):
+    """
+    Converts a single audio file between formats.
+    :param filepath: Path to the source file.
+    :param source_format: Format of the source file (e.g. "mp3").
+    :param target_format: Format to convert to (e.g. "wav").
+    :param output_dir: Optional directory for the output file.
+    :param streaming: Convert in fixed-size chunks with `stream_convert` instead of decoding into memory.
+    :return: ConversionResult describing the outcome.
+    """
+    start = time.perf_counter()
+    output_path = output_path_for(filepath, target_format, output_dir)
     try:
-        output_path = filepath.replace(".wav", ".mp3")
-        audio = AudioSegment.from_file(filepath, format="wav")
-        audio.export(output_path, format="mp3")
-        return f"Converted to MP3: {output_path}"
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        if streaming:
+            stream_convert(filepath, output_path, source_format, target_format)
+        else:
+            from pydub import AudioSegment  # Imported on use so headless start-up stays fast
+
+            with tracing.span("pydub.decode", format=source_format):
+                audio = AudioSegment.from_file(filepath, format=source_format)
+            with tracing.span("pydub.export", format=target_format):
+                audio.export(output_path, format=target_format)
+        return ConversionResult(filepath, output_path, True, None, time.perf_counter() - start)
     except Exception as e:
-        return f"Error converting WAV to MP3: {e}"
+        tracing.count("convert.failures")
+        return ConversionResult(filepath, output_path, False, str(e), time.perf_counter() - start)
+
+
+def find_audio_files(source, extension):
+    """
+    Collects the audio files to convert from a directory or a glob pattern.
+    :param source: Directory (searched recursively) or glob pattern such as "samples/**/*.mp3".
+    :param extension: File extension to match when `source` is a directory (e.g. "mp3").
+    :return: Sorted list of file paths.
+    """
+    if any(char in source for char in "*?["):
+        return sorted(path for path in glob.glob(source, recursive=True) if os.path.isfile(path))
+    if os.path.isfile(source):
+        return [source]
+
+    suffix = f".{extension.lower()}"
+    files = []
+    for root, _, names in os.walk(source):
+        files.extend(os.path.join(root, name) for name in names if name.lower().endswith(suffix))
+    return sorted(files)
+
+
+@tracing.traced("convert.batch")
+def batch_convert(source, source_format, target_format, output_dir=None, workers=None, progress=None,
+                  streaming=False, manifest=None, force=False):
+    """
+    Converts every matching file in a directory or glob using a process pool.
+    :param source: Directory or glob pattern selecting the files to convert.
+    :param source_format: Format of the source files (e.g. "mp3").
+    :param target_format: Format to convert to (e.g. "wav").
+    :param output_dir: Optional directory for the outputs; defaults to next to each source.
+    :param workers: Number of worker processes; defaults to the number of CPU cores.
+    :param progress: Optional callback called as progress(completed, total, result) after each file;
+                     raising from it stops the batch.
+    :param streaming: Convert each file in fixed-size chunks (see `stream_convert`).
+    :param manifest: Optional ConversionManifest; makes the batch incremental, skipping files that are
+                     unchanged since the manifest recorded their conversion and recording the rest.
+    :param force: With a manifest, convert every file anyway and record them all afresh.
+    :return: List of ConversionResult, in the same order as the discovered files.
+    """
+    files = find_audio_files(source, source_format)
+    total = len(files)
+    settings = encoder_settings(source_format, target_format)
+
+    results = {}
+
+    def finish(filepath, outcome):
+        result, source_stat, digest = outcome
+        if manifest is not None and result.success:
+            try:
+                manifest.record(filepath, result.output, settings, source_stat, digest)
+            except OSError as e:  # The output vanished or became unreadable once written
+                result = result._replace(success=False, skipped=False, error=f"Output missing after conversion: {e}")
+        results[filepath] = result
+        if progress:
+            progress(len(results), total, result)
+
+    # Files whose stat matches the manifest are settled here; the rest go to the workers, along with
+    # the recorded hash of those whose modification time alone changed
+    pending = []
+    for filepath in files:
+        if manifest is None or force:
+            pending.append((filepath, None))
+            continue
+        start = time.perf_counter()
+        output_path = output_path_for(filepath, target_format, output_dir)
+        state, known_digest = manifest.check(filepath, output_path, settings)
+        if state == "current":
+            tracing.count("convert.skipped")
+            results[filepath] = ConversionResult(filepath, output_path, True, None, time.perf_counter() - start,
+                                                 skipped=True)
+            if progress:
+                progress(len(results), total, results[filepath])
+        else:
+            pending.append((filepath, known_digest))
+
+    track = manifest is not None
+    workers = min(workers or os.cpu_count() or 1, max(len(pending), 1))
+    if workers == 1:
+        # Not worth paying the process start-up cost for a single worker
+        for filepath, known_digest in pending:
+            finish(filepath, _convert_task(filepath, source_format, target_format, output_dir, streaming, track,
+                                           known_digest))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(_convert_task, filepath, source_format, target_format, output_dir, streaming, track,
+                            known_digest): filepath
+                for filepath, known_digest in pending
+            }
+            try:
+                for future in as_completed(futures):
+                    filepath = futures[future]
+                    try:
+                        outcome = future.result()
+                    except Exception as e:  # The worker itself died (e.g. killed by the OS)
+                        output_path = output_path_for(filepath, target_format, output_dir)
+                        outcome = ConversionResult(filepath, output_path, False, str(e), 0.0), None, None
+                    # Spans recorded in the worker process stay there, so its timing is recorded here
+                    tracing.record("convert.file", outcome[0].seconds, source=filepath, worker=True)
+                    finish(filepath, outcome)
+            except BaseException:
+                # The progress callback may raise to stop the batch; drop the files not started yet
+                for future in futures:
+                    future.cancel()
+                raise
+
+    return [results[filepath] for filepath in files]
+
+
+def incremental_convert(source, source_format, target_format, manifest_path=None, **options):
+    """
+    Runs `batch_convert` against a manifest file, so only new or modified files are converted.
+    The manifest is opened and closed here, on the calling thread.
+    :param source: Directory or glob pattern selecting the files to convert.
+    :param source_format: Format of the source files (e.g. "mp3").
+    :param target_format: Format to convert to (e.g. "wav").
+    :param manifest_path: Optional manifest file; defaults to `default_manifest_path()`.
+    :param options: Further keyword arguments for `batch_convert`.
+    :return: List of ConversionResult, in the same order as the discovered files.
+    """
+    with ConversionManifest(manifest_path) as manifest:
+        return batch_convert(source, source_format, target_format, manifest=manifest, **options)
+
+
+def _convert_task(filepath, source_format, target_format, output_dir, streaming, track, known_digest):
+    """
+    Worker side of `batch_convert`. When tracking for a manifest, the source is stat'ed and hashed
+    before it is converted, and a source whose hash equals `known_digest` is not converted again.
+    :return: (ConversionResult, source stat, source hash), the last two None when not tracking.
+    """
+    if not track:
+        return convert_file(filepath, source_format, target_format, output_dir, streaming), None, None
+    start = time.perf_counter()
+    output_path = output_path_for(filepath, target_format, output_dir)
+    try:
+        # Stat before reading, so a file modified during the conversion is looked at again next time
+        source_stat = os.stat(filepath)
+        digest = file_digest(filepath)
+    except OSError as e:
+        return ConversionResult(filepath, output_path, False, str(e), time.perf_counter() - start), None, None
+    if digest == known_digest:
+        # Only the modification time changed; the existing output is still right
+        return ConversionResult(filepath, output_path, True, None, time.perf_counter() - start, skipped=True), \
+            source_stat, digest
+    result = convert_file(filepath, source_format, target_format, output_dir, streaming)
+    return result._replace(seconds=time.perf_counter() - start), source_stat, digest
+
+
+@tracing.traced("convert.stream")
+def stream_convert(filepath, output_path, source_format, target_format, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Converts a file in fixed-size chunks so peak memory stays flat however long the recording is.
+    The PCM passed between the decoder and the encoder is the same as the in-memory pydub path
+    produces, so the output is sample-identical to `AudioSegment.from_file(...).export(...)`.
+    :param filepath: Path to the source file.
+    :param output_path: Path to write the converted file to.
+    :param source_format: Format of the source file (e.g. "wav").
+    :param target_format: Format to convert to (e.g. "mp3").
+    :param chunk_size: Approximate number of PCM bytes held in memory at a time.
+    :return: The output path.
+    """
+    with _PcmStream(filepath, source_format) as (channels, sample_width, frame_rate, chunks):
+        frames_per_chunk = max(chunk_size // (channels * sample_width), 1)
+        if target_format == "wav":
+            with wave.open(output_path, "wb") as wav_file:
+                wav_file.setnchannels(channels)
+                wav_file.setsampwidth(sample_width)
+                wav_file.setframerate(frame_rate)
+                for chunk in chunks(frames_per_chunk):
+                    if sample_width == 1:
+                        chunk = _bias_8bit(chunk)  # pydub holds 8-bit audio signed, WAV stores it unsigned
+                    wav_file.writeframesraw(chunk)
+        else:
+            _encode_pcm(chunks(frames_per_chunk), output_path, target_format, channels, sample_width, frame_rate)
+    return output_path
+
+
+class _PcmStream:
+    """
+    Context manager yielding (channels, sample_width, frame_rate, chunks) for a source file,
+    where chunks(frames) iterates over its PCM in pydub's in-memory layout.
+    WAV files are read directly; everything else is decoded by an ffmpeg pipe.
+    """
+
+    def __init__(self, filepath, source_format):
+        self.filepath = filepath
+        self.source_format = source_format
+        self.wav_file = None
+        self.process = None
+        self.stderr = None
+
+    def __enter__(self):
+        if self.source_format == "wav":
+            try:
+                self.wav_file = wave.open(self.filepath, "rb")
+            except (wave.Error, EOFError):
+                pass  # Not plain PCM (e.g. float or extensible WAV), let ffmpeg decode it
+        if self.wav_file:
+            sample_width = self.wav_file.getsampwidth()
+            return (self.wav_file.getnchannels(), 4 if sample_width == 3 else sample_width,
+                    self.wav_file.getframerate(), self._wav_chunks)
+
+        from pydub import AudioSegment
+
+        # Same decoder options as AudioSegment.from_file, which decodes lossy formats to 16-bit
+        command = [AudioSegment.converter, "-nostdin", "-loglevel", "error",
+                   "-f", self.source_format, "-i", self.filepath]
+        if self.source_format != "wav":
+            command += ["-acodec", "pcm_s16le"]
+        command += ["-vn", "-f", "wav", "-"]
+        self.stderr = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=self.stderr)
+        try:
+            channels, sample_width, frame_rate = self._read_wav_header(self.process.stdout)
+        except Exception as e:
+            self.__exit__(type(e), e, e.__traceback__)
+            raise
+        return channels, sample_width, frame_rate, self._pipe_chunks
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.wav_file:
+            self.wav_file.close()
+        if self.process:
+            self.process.stdout.close()
+            if exc_type is not None:
+                self.process.kill()
+            self.process.wait()
+            self.stderr.close()
+
+    def _wav_chunks(self, frames):
+        sample_width = self.wav_file.getsampwidth()
+        while True:
+            chunk = self.wav_file.readframes(frames)
+            if not chunk:
+                return
+            if sample_width == 1:
+                chunk = _bias_8bit(chunk)
+            elif sample_width == 3:
+                chunk = _widen_24bit(chunk)
+            yield chunk
+
+    def _pipe_chunks(self, frames):
+        from pydub.exceptions import CouldntDecodeError
+
+        chunk_size = frames * self.frame_size
+        while True:
+            chunk = self.process.stdout.read(chunk_size)
+            if not chunk:
+                break
+            if self.sample_width == 1:
+                chunk = _bias_8bit(chunk)
+            elif self.sample_width == 3:
+                chunk = _widen_24bit(chunk)
+            yield chunk
+        if self.process.wait() != 0:
+            self.stderr.seek(0)
+            raise CouldntDecodeError(f"Decoding failed: {self.stderr.read().decode(errors='ignore')}")
+
+    def _read_wav_header(self, stream):
+        """
+        Parses the header of the WAV stream written by ffmpeg, leaving `stream` at the start of the sample data.
+        """
+        from pydub.exceptions import CouldntDecodeError
+
+        header = stream.read(12)
+        if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+            self.process.wait()
+            self.stderr.seek(0)
+            raise CouldntDecodeError(f"Decoding failed: {self.stderr.read().decode(errors='ignore')}")
+        while True:
+            chunk_header = stream.read(8)
+            if len(chunk_header) < 8:
+                raise CouldntDecodeError("Decoding failed: no data chunk in ffmpeg output")
+            chunk_id, size = struct.unpack("<4sI", chunk_header)
+            if chunk_id == b"data":
+                break
+            body = stream.read(size + (size & 1))
+            if chunk_id == b"fmt ":
+                channels, frame_rate = struct.unpack("<HI", body[2:8])
+                bits_per_sample = struct.unpack("<H", body[14:16])[0]
+        self.sample_width = bits_per_sample // 8
+        self.frame_size = channels * self.sample_width
+        return channels, 4 if self.sample_width == 3 else self.sample_width, frame_rate
+
+
+def parse_export_target(spec):
+    """
+    Parses a target such as "mp3:320k", "flac" or "ogg:192k".
+    :param spec: Format, optionally followed by a colon and a bitrate.
+    :return: ExportTarget.
+    """
+    target_format, _, bitrate = spec.partition(":")
+    if not target_format:
+        raise ValueError(f"Invalid export target: {spec!r}")
+    return ExportTarget(target_format.lower(), bitrate or None)
+
+
+def export_path(filepath, target, template=DEFAULT_EXPORT_TEMPLATE):
+    """
+    Fills in an output path template for one target of a source file.
+    :param filepath: Path to the source file.
+    :param target: ExportTarget.
+    :param template: Template with the fields described at `DEFAULT_EXPORT_TEMPLATE`.
+    :return: Output file path.
+    """
+    stem = os.path.splitext(filepath)[0]
+    try:
+        return template.format(dir=os.path.dirname(filepath) or ".", name=os.path.basename(stem), stem=stem,
+                               format=target.format, bitrate=target.bitrate or "",
+                               tag=f"-{target.bitrate}" if target.bitrate else "")
+    except (KeyError, IndexError) as e:
+        raise ValueError(f"Unknown field {e} in output template {template!r}")
+
+
+@tracing.traced("convert.multi_export")
+def multi_export(filepath, targets, source_format=None, template=DEFAULT_EXPORT_TEMPLATE,
+                 chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Exports a source to several formats and bitrates, decoding it only once. Chunks of decoded PCM
+    are shared by every target and fed to one ffmpeg encoder per target, all running concurrently,
+    so memory stays bounded and a delivery set costs about as much as its slowest encode.
+    :param filepath: Path to the source file.
+    :param targets: ExportTarget tuples or strings accepted by `parse_export_target`.
+    :param source_format: Format of the source file; defaults to its extension.
+    :param template: Output path template (see `DEFAULT_EXPORT_TEMPLATE`).
+    :param chunk_size: Approximate number of PCM bytes per chunk.
+    :return: List of ConversionResult, one per target in order.
+    """
+    start = time.perf_counter()
+    targets = [parse_export_target(target) if isinstance(target, str) else ExportTarget(*target)
+               for target in targets]
+    source_format = source_format or os.path.splitext(filepath)[1].lstrip(".").lower()
+    outputs = [export_path(filepath, target, template) for target in targets]
+    if len(set(outputs)) < len(outputs):
+        raise ValueError(f"The output template {template!r} gives several targets the same path")
+
+    errors = [None] * len(targets)
+    finished = [0.0] * len(targets)
+    try:
+        for output_path in outputs:
+            if os.path.dirname(output_path):
+                os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        with _PcmStream(filepath, source_format) as (channels, sample_width, frame_rate, chunks):
+            queues = [queue.Queue(EXPORT_QUEUE_CHUNKS) for _ in targets]
+
+            def encode(index):
+                ended = False
+
+                def received():
+                    nonlocal ended
+                    yield from iter(queues[index].get, None)
+                    ended = True
+
+                try:
+                    _encode_pcm(received(), outputs[index], targets[index].format, channels, sample_width,
+                                frame_rate, targets[index].bitrate)
+                except Exception as e:
+                    errors[index] = str(e)
+                    # Keep taking chunks after a failure so the decoder never blocks on this queue, unless
+                    # the encoder already took the end marker (ffmpeg reports some errors only on exit)
+                    if not ended:
+                        for _ in iter(queues[index].get, None):
+                            pass
+                finished[index] = time.perf_counter() - start
+
+            threads = [threading.Thread(target=encode, args=(index,), name=f"export-{index}", daemon=True)
+                       for index in range(len(targets))]
+            for thread in threads:
+                thread.start()
+            try:
+                for chunk in chunks(max(chunk_size // (channels * sample_width), 1)):
+                    for chunk_queue in queues:
+                        chunk_queue.put(chunk)  # The same bytes object for every target, never copied
+            finally:
+                for chunk_queue in queues:
+                    chunk_queue.put(None)
+                for thread in threads:
+                    thread.join()
+    except Exception as e:  # The source could not be read or decoded, so no target is complete
+        seconds = time.perf_counter() - start
+        return [ConversionResult(filepath, output_path, False, str(e), seconds) for output_path in outputs]
+    return [ConversionResult(filepath, output_path, error is None, error, seconds)
+            for output_path, error, seconds in zip(outputs, errors, finished)]
+
+
+def _encode_pcm(chunks, output_path, target_format, channels, sample_width, frame_rate, bitrate=None):
+    """
+    Streams PCM chunks into an ffmpeg encoder with the same options as `AudioSegment.export`.
+    """
+    from pydub import AudioSegment
+    from pydub.exceptions import CouldntEncodeError
+
+    command = [
+        AudioSegment.converter, "-y", "-loglevel", "error",
+        "-f", RAW_SAMPLE_FORMATS[sample_width], "-ar", str(frame_rate), "-ac", str(channels), "-i", "-",
+    ]
+    codec = AudioSegment.DEFAULT_CODECS.get(target_format)
+    if codec:
+        command += ["-acodec", codec]
+    if bitrate:
+        command += ["-b:a", bitrate]
+    command += ["-f", target_format, output_path]
+
+    with tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=stderr)
+        try:
+            for chunk in chunks:
+                process.stdin.write(chunk)
+        except BrokenPipeError:
+            pass  # The encoder exited early, its error is reported below
+        finally:
+            try:
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+            returncode = process.wait()
+        if returncode != 0:
+            stderr.seek(0)
+            raise CouldntEncodeError(f"Encoding failed: {stderr.read().decode(errors='ignore')}")
+
+
+def _bias_8bit(chunk):
+    """
+    Flips 8-bit PCM between unsigned (WAV) and signed (pydub) representation.
+    """
+    return chunk.translate(_BIAS_8BIT)
+
+
+def _widen_24bit(chunk):
+    """
+    Widens 24-bit PCM to 32-bit exactly the way pydub does, keeping the 24-bit value in the upper bytes
+    and padding the low byte with the sign.
+    """
+    widened = bytearray(len(chunk) // 3 * 4)
+    widened[1::4] = chunk[0::3]
+    widened[2::4] = chunk[1::3]
+    widened[3::4] = chunk[2::3]
+    widened[0::4] = chunk[2::3].translate(_SIGN_PADDING)
+    return bytes(widened)
@@ -0,0 +1,1045 @@
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+from audio_conversion import batch_convert, convert_file, export_path, incremental_convert, multi_export, \
+    parse_export_target
+from bulk_generation import decode_progressions, generate_progressions, key_names, save_progressions
+from chord_generation import create_midi, generate_random_chords, keys_and_chords, render_midi
+from chord_theory import chord_intervals, chord_voicing, parse_chord
+from markov_generation import CONTEXT_BASE, MarkovModel, generate_markov_progressions, key_mode
+from playback import NullSink, PlaybackEngine
+from progression_index import ProgressionIndex, normalize_progression, quality_codes
+from render_cache import RenderCache
+from popular_songs import create_song_midi, popular_songs
+from song_catalog import DictCatalog, SqliteCatalog
+from synth import SAMPLE_RATE, render_batch, render_progression, render_wav
+import tracing
+from transposition_export import TRANSPOSITIONS, export_transpositions
+from waveform import PeakPyramid, WavFile
+
+
+def make_sine_wav(path, seconds, sample_rate=44100, frequency=440.0, channels=2):
+    """
+    Writes a 16-bit sine-wave WAV file to use as synthetic benchmark input.
+
+    Args:
+        path (str): Output file path.
+        seconds (float): Length of the file in seconds.
+        sample_rate (int): Sample rate in Hz.
+        frequency (float): Sine frequency in Hz.
+        channels (int): Number of (identical) channels.
+
+    Returns:
+        str: The output file path.
+    """
+    total_frames = int(seconds * sample_rate)
+    with wave.open(path, "wb") as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        # Written a second at a time so multi-hour files don't need to fit in memory
+        for offset in range(0, total_frames, sample_rate):
+            t = np.arange(offset, min(offset + sample_rate, total_frames)) / sample_rate
+            samples = (np.sin(2 * np.pi * frequency * t) * 0.5 * 32767).astype("<i2")
+            wav_file.writeframes(np.repeat(samples, channels).tobytes())
+    return path
+
+
+def bench_batch_conversion(args):
+    """
+    Compares the throughput of a serial conversion loop against `batch_convert`.
+    """
+    with tempfile.TemporaryDirectory() as workdir:
+        source_dir = os.path.join(workdir, "sources")
+        os.makedirs(source_dir)
+        for index in range(args.files):
+            make_sine_wav(os.path.join(source_dir, f"sine_{index:04d}.wav"), args.seconds)
+
+        start = time.perf_counter()
+        serial_results = [
+            convert_file(os.path.join(source_dir, filepath), "wav", args.target_format,
+                         output_dir=os.path.join(workdir, "serial"))
+            for filepath in sorted(os.listdir(source_dir))
+        ]
+        serial = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = batch_convert(source_dir, "wav", args.target_format,
+                                output_dir=os.path.join(workdir, "batch"), workers=args.workers)
+        batched = time.perf_counter() - start
+
+    failed = sum(not result.success for result in serial_results + results)
+    print(f"{args.files} x {args.seconds:g}s WAV -> {args.target_format.upper()} "
+          f"({args.workers or os.cpu_count()} workers, {failed} failed)")
+    print(f"  serial loop:   {serial:8.2f}s  {args.files / serial:8.1f} files/s")
+    print(f"  batch_convert: {batched:8.2f}s  {args.files / batched:8.1f} files/s  ({serial / batched:.2f}x)")
+    return 1 if failed else 0
+
+
+def bench_incremental_conversion(args):
+    """
+    Re-runs a batch conversion against its manifest: with nothing changed, with every source
+    touched (modification time only) and with a few sources rewritten, against a full re-run.
+    """
+    with tempfile.TemporaryDirectory() as workdir:
+        source_dir = os.path.join(workdir, "sources")
+        output_dir = os.path.join(workdir, "outputs")
+        manifest = os.path.join(workdir, "manifest.sqlite")
+        os.makedirs(source_dir)
+        paths = [make_sine_wav(os.path.join(source_dir, f"sine_{index:04d}.wav"), args.seconds)
+                 for index in range(args.files)]
+
+        def run(incremental):
+            start = time.perf_counter()
+            if incremental:
+                results = incremental_convert(source_dir, "wav", args.target_format, manifest,
+                                              output_dir=output_dir, workers=args.workers)
+            else:
+                # Into its own folder, since rewriting the tracked outputs would make them all stale
+                results = batch_convert(source_dir, "wav", args.target_format,
+                                        output_dir=os.path.join(workdir, "full"), workers=args.workers)
+            seconds = time.perf_counter() - start
+            converted = sum(not result.skipped for result in results)
+            return seconds, converted, sum(not result.success for result in results)
+
+        timings = {"first run": run(True), "full re-run": run(False), "unchanged": run(True)}
+        for path in paths:
+            os.utime(path)
+        timings["all touched"] = run(True)
+        changed = max(args.files * args.changed_percent // 100, 1)
+        for path in paths[:changed]:
+            make_sine_wav(path, args.seconds, frequency=330.0)
+        timings[f"{changed} rewritten"] = run(True)
+
+    failed = sum(failures for _, _, failures in timings.values())
+    print(f"{args.files} x {args.seconds:g}s WAV -> {args.target_format.upper()} ({failed} failed)")
+    for name, (seconds, converted, _) in timings.items():
+        print(f"  {name:13s} {seconds:8.3f}s  {converted:5d} converted  "
+              f"{seconds / args.files * 1e6:10.1f}us/file")
+    return 1 if failed else 0
+
+
+def bench_multi_target(args):
+    """
+    Exports masters to a delivery set of formats and bitrates with one decode-and-encode call per
+    target, as `convert_file` does, and with `multi_export`, which decodes each master once and
+    runs the encoders concurrently. Compressed masters (e.g. --source-format flac) show the saved
+    decodes; more cores show the overlapped encodes.
+    """
+    from pydub import AudioSegment
+
+    targets = [parse_export_target(spec) for spec in args.targets]
+    with tempfile.TemporaryDirectory() as workdir:
+        masters = []
+        for index in range(args.files):
+            master = make_sine_wav(os.path.join(workdir, f"master_{index}.wav"), args.seconds)
+            if args.source_format != "wav":
+                master = convert_file(master, "wav", args.source_format).output
+            masters.append(master)
+
+        timings = {}
+        if args.source_format == "wav":  # pydub needs ffprobe to read anything else
+            os.makedirs(os.path.join(workdir, "pydub"))
+            start = time.perf_counter()
+            for master in masters:
+                for target in targets:
+                    audio = AudioSegment.from_file(master, format="wav")
+                    audio.export(export_path(master, target, "{dir}/pydub/{name}{tag}.{format}"),
+                                 format=target.format, bitrate=target.bitrate)
+            timings["pydub per target"] = time.perf_counter() - start
+
+        # The same streaming decoder and encoders, but decoding again for every target
+        per_target_template = "{dir}/per_target/{name}{tag}.{format}"
+        start = time.perf_counter()
+        results = [result for master in masters for target in targets
+                   for result in multi_export(master, [target], template=per_target_template)]
+        timings["decode per target"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results += [result for master in masters
+                    for result in multi_export(master, targets, template="{dir}/shared/{name}{tag}.{format}")]
+        shared = time.perf_counter() - start
+
+    failed = sum(not result.success for result in results)
+    print(f"{args.files} x {args.seconds:g}s {args.source_format.upper()} -> {', '.join(args.targets)} "
+          f"({os.cpu_count()} CPUs, {failed} failed)")
+    for name, seconds in timings.items():
+        print(f"  {name:18s} {seconds:8.2f}s")
+    speedup = min(timings.values()) / shared
+    print(f"  {'multi_export':18s} {shared:8.2f}s  ({speedup:.2f}x the fastest per-target run)")
+    return 1 if failed else 0
+
+
+def _run_measured(code, *args):
+    """
+    Runs `code` in a fresh interpreter and returns (its output, its peak RSS in MiB). The child reports
+    VmHWM itself: on Linux the ru_maxrss of a forked child starts from the parent's peak.
+
+    Raises:
+        RuntimeError: If the child fails.
+    """
+    report = "\nprint(next(line.split()[1] for line in open('/proc/self/status') if line.startswith('VmHWM:')))"
+    process = subprocess.run([sys.executable, "-c", code + report, *args], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+    if process.returncode != 0:
+        raise RuntimeError(process.stderr.strip().splitlines()[-1] if process.stderr.strip() else "child failed")
+    output, peak_kib = process.stdout.rstrip("\n").rpartition("\n")[::2]
+    return output, int(peak_kib) / 1024
+
+
+def bench_streaming_memory(args):
+    """
+    Compares the peak RSS of converting a large synthetic WAV in memory with pydub and with
+    streaming conversion, each in a fresh interpreter.
+    """
+    code = ("import sys; from audio_conversion import convert_file; "
+            "result = convert_file(sys.argv[1], 'wav', sys.argv[2], output_dir=sys.argv[3], streaming=sys.argv[4] == '1'); "
+            "result.success or sys.exit(result.error)")
+    with tempfile.TemporaryDirectory() as workdir:
+        source = make_sine_wav(os.path.join(workdir, "long.wav"), args.minutes * 60, sample_rate=args.sample_rate)
+        size_mib = os.path.getsize(source) / (1 << 20)
+
+        _, rss_baseline = _run_measured("import audio_conversion")
+        rss = {}
+        for mode, streaming in (("in-memory", "0"), ("streaming", "1")):
+            try:
+                rss[mode] = _run_measured(code, source, args.target_format, os.path.join(workdir, mode), streaming)[1]
+            except RuntimeError as e:
+                print(f"  ({mode} conversion failed: {e})")
+
+    print(f"{args.minutes:g} min {args.sample_rate} Hz stereo WAV ({size_mib:.0f} MiB) -> {args.target_format.upper()}")
+    for mode, peak in rss.items():
+        print(f"  {mode + ' peak RSS:':19s} {peak:8.1f} MiB  (+{peak - rss_baseline:.1f} MiB over the import)")
+    return 0 if len(rss) == 2 else 1
+
+
+def _legacy_voicing(chord):
+    """
+    The per-chord parsing `create_midi` did before chord_theory, kept as the benchmark baseline.
+    """
+    note_mapping = {
+        "C": 60, "C#": 61, "D": 62, "D#": 63, "E": 64, "F": 65,
+        "F#": 66, "G": 67, "G#": 68, "A": 69, "A#": 70, "B": 71,
+        "Bb": 70, "Db": 61, "Eb": 63, "Gb": 66, "Ab": 68, "E#": 65, "B#": 72
+    }
+    if chord.endswith("dim"):
+        root, quality = chord[:-3], "dim"
+    elif chord.endswith("m"):
+        root, quality = chord[:-1], "m"
+    else:
+        root, quality = chord, "maj"
+    intervals = [0, 3, 6] if quality == "dim" else [0, 3, 7] if quality == "m" else [0, 4, 7]
+    return [note_mapping[root] + interval for interval in intervals]
+
+
+def bench_chord_parsing(args):
+    """
+    Measures the per-chord cost of turning symbols into pitches across a synthetic catalog.
+    """
+    symbols = sorted({chord for chords in keys_and_chords.values() for chord in chords})
+    catalog = [symbols[index] for index in np.random.default_rng(0).integers(len(symbols), size=args.chords)]
+
+    def per_chord(function):
+        start = time.perf_counter()
+        for chord in catalog:
+            function(chord)
+        return (time.perf_counter() - start) / len(catalog) * 1e9
+
+    parse_chord.cache_clear()
+    chord_voicing.cache_clear()
+    timings = [
+        ("legacy parser", per_chord(_legacy_voicing)),
+        ("uncached parse", per_chord(lambda chord: parse_chord.__wrapped__(chord))),
+        ("chord_voicing", per_chord(chord_voicing)),
+    ]
+
+    print(f"{args.chords:,} chords drawn from {len(symbols)} distinct symbols")
+    for name, nanoseconds in timings:
+        print(f"  {name:15s} {nanoseconds:8.0f} ns/chord  ({timings[0][1] / nanoseconds:.1f}x)")
+    return 0
+
+
+def bench_bulk_generation(args):
+    """
+    Compares the `generate_random_chords` loop against vectorized bulk generation.
+    """
+    loop_count = min(args.count, 200_000)
+    start = time.perf_counter()
+    for index in range(loop_count):
+        generate_random_chords(key_names[index % len(key_names)])
+    loop_rate = loop_count / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    generate_progressions(args.count, length=args.length, replace=args.replace, seed=0)
+    bulk = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as workdir:
+        start = time.perf_counter()
+        save_progressions(os.path.join(workdir, "progressions.npy"), args.count, length=args.length,
+                          replace=args.replace, seed=0)
+        saved = time.perf_counter() - start
+
+    print(f"{args.count:,} progressions of {args.length} chords ({'with' if args.replace else 'without'} replacement)")
+    print(f"  generate_random_chords loop: {args.count / loop_rate:8.2f}s (extrapolated from {loop_count:,})")
+    print(f"  generate_progressions:       {bulk:8.2f}s  ({args.count / loop_rate / bulk:.0f}x)")
+    print(f"  save_progressions (.npy):    {saved:8.2f}s")
+    return 0
+
+
+def bench_render_cache(args):
+    """
+    Replays a skewed stream of render requests through `RenderCache` from several threads.
+    """
+    catalog = [chords for _, chords in decode_progressions(generate_progressions(args.progressions, seed=0))]
+    # Zipf-like popularity: a few progressions get most of the plays, as in the GUI
+    weights = 1.0 / np.arange(1, len(catalog) + 1)
+    requests = np.random.default_rng(1).choice(len(catalog), size=args.requests, p=weights / weights.sum())
+
+    start = time.perf_counter()
+    for index in requests[:min(args.requests, 20_000)]:
+        render_midi(catalog[index])
+    uncached = (time.perf_counter() - start) / min(args.requests, 20_000)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        cache = RenderCache(workdir, max_memory_items=args.memory_items, max_disk_bytes=args.disk_bytes)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            list(pool.map(lambda index: cache.get_or_render("midi", catalog[index], render_midi), requests))
+        cached = (time.perf_counter() - start) / args.requests
+        stats = cache.stats()
+
+    print(f"{args.requests:,} requests over {args.progressions:,} progressions, {args.threads} threads")
+    print(f"  uncached render: {uncached * 1e6:8.1f} us/request")
+    print(f"  RenderCache:     {cached * 1e6:8.1f} us/request  ({uncached / cached:.1f}x)")
+    print(f"  memory hits {stats['memory_hits']:,}, disk hits {stats['disk_hits']:,}, misses {stats['misses']:,} "
+          f"(hit rate {stats['hit_rate']:.1%})")
+    return 0
+
+
+def bench_cli_startup(args):
+    """
+    Measures the cold import cost of the headless CLI with `python -X importtime` and checks
+    that it stays under budget.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    totals = []
+    for _ in range(args.runs):
+        output = subprocess.run([sys.executable, "-X", "importtime", "-c", "import cli"], cwd=here,
+                                capture_output=True, text=True, check=True).stderr
+        imported = {}
+        for line in output.splitlines():
+            if line.startswith("import time:") and "|" in line and "cumulative" not in line:
+                _, cumulative, name = (field.strip() for field in line[len("import time:"):].split("|"))
+                imported[name.strip()] = int(cumulative)
+        totals.append(imported["cli"])
+
+    budget_us = args.budget_ms * 1000
+    print(f"import cli: best {min(totals) / 1000:.1f} ms, median {sorted(totals)[len(totals) // 2] / 1000:.1f} ms "
+          f"over {args.runs} cold starts (budget {args.budget_ms:g} ms)")
+    return 0 if min(totals) <= budget_us else 1
+
+
+def bench_synth(args):
+    """
+    Measures offline rendering speed of the NumPy synthesizer, one by one and batched.
+    """
+    catalog = [chords for _, chords in decode_progressions(generate_progressions(args.progressions, seed=0))]
+
+    start = time.perf_counter()
+    for chords in catalog:
+        render_progression(chords)
+    single = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pcm = render_batch(catalog)
+    batched = time.perf_counter() - start
+
+    audio_seconds = pcm.size / SAMPLE_RATE
+    print(f"{args.progressions:,} progressions, {audio_seconds:,.0f}s of audio")
+    print(f"  render_progression loop: {single:6.2f}s  ({audio_seconds / single:,.0f}x real time)")
+    print(f"  render_batch:            {batched:6.2f}s  ({audio_seconds / batched:,.0f}x real time)")
+    return 0
+
+
+def bench_progression_index(args):
+    """
+    Builds the progression index over a synthetic catalog and compares query latency with a full scan.
+    """
+    rng = np.random.default_rng(0)
+    pitch_names = ["C", "C#", "D", "Eb", "E", "F", "F#", "G", "Ab", "A", "Bb", "B"]
+    suffixes = ["", "m", "7", "m7", "maj7", "dim"]
+    codes = np.array([quality_codes[chord_intervals[suffix]] for suffix in suffixes], dtype=np.uint16)
+
+    lengths = rng.integers(4, 9, size=args.songs)
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    roots = rng.integers(0, 12, size=offsets[-1])
+    kinds = rng.choice(len(suffixes), size=offsets[-1], p=[0.4, 0.3, 0.12, 0.1, 0.05, 0.03])
+    names = [f"Song {number}" for number in range(args.songs)]
+
+    start = time.perf_counter()
+    index = ProgressionIndex(names, roots, codes[kinds], offsets)
+    build = time.perf_counter() - start
+    index_bytes = sum(array.nbytes for array in (index.tokens, index.qualities, index.gram_keys, index.gram_positions))
+
+    def scan(chords):
+        # Baseline: compare the query against every position of the catalog
+        first_quality, query = normalize_progression(chords)
+        candidates = len(index.qualities) - len(query)
+        matches = index.qualities[:candidates] == first_quality
+        for position, token in enumerate(query):
+            matches &= index.tokens[position + 1:position + 1 + candidates] == token
+        return np.unique(np.searchsorted(index.offsets, np.flatnonzero(matches), side="right") - 1)
+
+    # Queries are sub-sequences of catalog songs, shifted to a random key, so every query has a hit.
+    # Latency depends on how many songs match, so it is reported per query length.
+    index_times, scan_times, hits = {}, [], {}
+    for song in rng.integers(0, args.songs, size=args.queries):
+        length = int(rng.integers(2, min(6, lengths[song]) + 1))
+        first = offsets[song] + int(rng.integers(0, lengths[song] - length + 1))
+        shift = int(rng.integers(0, 12))
+        chords = [pitch_names[(roots[position] + shift) % 12] + suffixes[kinds[position]]
+                  for position in range(first, first + length)]
+
+        start = time.perf_counter()
+        found = index.song_ids(chords)
+        index_times.setdefault(length, []).append(time.perf_counter() - start)
+        hits.setdefault(length, []).append(len(found))
+        if len(scan_times) < args.scan_queries:
+            start = time.perf_counter()
+            scan(chords)
+            scan_times.append(time.perf_counter() - start)
+
+    print(f"{args.songs:,} songs, {offsets[-1]:,} chords, {args.queries:,} queries in random keys")
+    print(f"  build:            {build:8.2f}s  ({index_bytes / 2 ** 20:,.0f} MiB)")
+    print(f"  full scan query:  {np.mean(scan_times) * 1000:8.3f}ms mean")
+    for length in sorted(index_times):
+        times = np.array(index_times[length]) * 1000
+        print(f"  {length}-chord query:    {times.mean():8.3f}ms mean, {np.percentile(times, 95):.3f}ms p95"
+              f"  ({np.mean(hits[length]):,.0f} songs matched)")
+    return 0
+
+
+_CATALOG_STARTUP_CODE = {
+    "baseline": "",
+    "dict + addItems": (
+        "import json; songs = json.load(open(sys.argv[1])); "
+        "selector = QComboBox(); selector.addItems(songs.keys())"
+    ),
+    "sqlite + lazy model": (
+        "from song_catalog import SqliteCatalog; from gui_catalog import CatalogListModel; "
+        "selector = QComboBox(); selector.setModel(CatalogListModel(SqliteCatalog(sys.argv[2])))"
+    ),
+}
+
+
+def _catalog_startup(mode, json_path, catalog_path):
+    """
+    Loads the song list in a fresh interpreter and returns (start-up seconds, peak RSS in MiB) of that process.
+    """
+    code = ("import os, sys, time; os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen'); "
+            "from PyQt5.QtWidgets import QApplication, QComboBox; app = QApplication([]); "
+            "start = time.perf_counter(); " + (_CATALOG_STARTUP_CODE[mode] or "pass") + "; "
+            "print(time.perf_counter() - start)")
+    output, peak_mib = _run_measured(code, json_path, catalog_path)
+    return float(output), peak_mib
+
+
+def bench_catalog_startup(args):
+    """
+    Compares start-up time and memory of filling the song selector from a dict with `addItems`
+    against opening a SQLite catalog behind the lazily fetching list model.
+    """
+    rng = np.random.default_rng(0)
+    symbols = [pitch + quality for pitch in ("C", "D", "E", "F", "G", "A", "B") for quality in ("", "m", "7", "maj7")]
+    chord_ids = rng.integers(0, len(symbols), size=(args.songs, 6))
+    songs = {f"Song {number:07d}": [symbols[chord] for chord in row] for number, row in enumerate(chord_ids)}
+
+    with tempfile.TemporaryDirectory() as workdir:
+        json_path = os.path.join(workdir, "songs.json")
+        with open(json_path, "w") as json_file:
+            json.dump(songs, json_file)
+        catalog_path = os.path.join(workdir, "catalog.sqlite")
+        start = time.perf_counter()
+        catalog = SqliteCatalog(catalog_path)
+        catalog.add_songs(songs.items())
+        catalog.close()
+        imported = time.perf_counter() - start
+
+        results = {mode: _catalog_startup(mode, json_path, catalog_path) for mode in _CATALOG_STARTUP_CODE}
+        catalog_mib = os.path.getsize(catalog_path) / 2 ** 20
+
+    baseline_rss = results.pop("baseline")[1]
+    print(f"{args.songs:,} songs  (import {imported:.2f}s, catalog file {catalog_mib:.1f} MiB)")
+    for mode, (seconds, rss) in results.items():
+        print(f"  {mode:20s} start-up {seconds * 1000:8.1f}ms, memory +{rss - baseline_rss:6.1f} MiB")
+    return 0
+
+
+def bench_waveform(args):
+    """
+    Builds the peak pyramid of a long synthetic WAV in a fresh process (its peak heap shows that
+    the samples are memory-mapped, not loaded), then times sidecar loading and redraws at random zooms.
+    """
+    with tempfile.TemporaryDirectory() as workdir:
+        source = make_sine_wav(os.path.join(workdir, "long.wav"), args.minutes * 60)
+        size_mib = os.path.getsize(source) / 2 ** 20
+
+        # Mapped file pages count towards RSS, so the build's own allocations are traced instead
+        code = ("import sys, time, tracemalloc; from waveform import PeakPyramid; tracemalloc.start(); "
+                "start = time.perf_counter(); PeakPyramid.load(sys.argv[1]); "
+                "print(time.perf_counter() - start, tracemalloc.get_traced_memory()[1])")
+        output = subprocess.run([sys.executable, "-c", code, source], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, check=True).stdout
+        build, peak_heap = (float(field) for field in output.split())
+
+        start = time.perf_counter()
+        pyramid = PeakPyramid.load(source)
+        cached = time.perf_counter() - start
+
+        rng = np.random.default_rng(0)
+        frames = WavFile(source).frames
+        redraws = []
+        for _ in range(args.redraws):
+            # Log-uniform zoom from a few milliseconds up to the whole file
+            span = int(np.exp(rng.uniform(np.log(256), np.log(frames))))
+            first = int(rng.integers(0, frames - span + 1))
+            start = time.perf_counter()
+            pyramid.peaks(first, first + span, args.width)
+            redraws.append(time.perf_counter() - start)
+
+    redraw_ms = np.array(redraws) * 1000
+    print(f"{args.minutes:g} min 44.1 kHz stereo WAV ({size_mib:,.0f} MiB)")
+    print(f"  build pyramid:     {build:8.2f}s  (peak heap {peak_heap / 2 ** 20:.0f} MiB)")
+    print(f"  load from sidecar: {cached * 1000:8.1f}ms  ({len(pyramid.mins)} levels)")
+    print(f"  redraw:            {np.median(redraw_ms):8.3f}ms p50, {np.percentile(redraw_ms, 99):.3f}ms p99 "
+          f"at {args.width} px")
+    return 0
+
+
+def _seen_bigram_fraction(progressions, bigram_model):
+    # Share of consecutive chord pairs that occur in the training songs, read off an order-1 model,
+    # whose row for "previous degree d" only lists degrees that followed d in training
+    modes = np.array([key_mode(key) for key in key_names])[progressions[:, 0]]
+    seen = np.zeros((2, CONTEXT_BASE, CONTEXT_BASE), dtype=bool)
+    for mode in range(2):
+        for previous in range(CONTEXT_BASE - 1):
+            row = mode * (CONTEXT_BASE + 1) + 1 + previous  # Suffix ids: empty context, then one per degree
+            first, last = bigram_model.indptr[row], bigram_model.indptr[row + 1]
+            seen[mode, previous, bigram_model.next_degrees[first:last]] = True
+    degrees = progressions[:, 1:]
+    return seen[modes[:, None], degrees[:, :-1], degrees[:, 1:]].mean()
+
+
+def bench_markov_generation(args):
+    """
+    Trains the Markov model on the built-in songs, times training, loading and batch generation
+    against uniform `generate_progressions`, and reports how many generated chord pairs occur
+    in the training songs, as a proxy for how idiomatic each generator sounds.
+    """
+    catalog = DictCatalog(popular_songs)
+    start = time.perf_counter()
+    model = MarkovModel.from_catalog(catalog, order=args.order)
+    train = time.perf_counter() - start
+    bigram_model = MarkovModel.from_catalog(catalog, order=1)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "model.npz")
+        model.save(path)
+        start = time.perf_counter()
+        MarkovModel.load(path)
+        load = time.perf_counter() - start
+
+    start = time.perf_counter()
+    uniform = generate_progressions(args.count, length=args.length, replace=True, seed=0)
+    uniform_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    trained = generate_markov_progressions(args.count, length=args.length, model=model, seed=0)
+    trained_seconds = time.perf_counter() - start
+
+    print(f"Order-{args.order} model of {len(popular_songs)} songs, "
+          f"{args.count:,} progressions of {args.length} chords")
+    print(f"  train:                {train * 1000:8.1f}ms")
+    print(f"  load from disk:       {load * 1000:8.1f}ms")
+    print(f"  uniform generation:   {uniform_seconds:8.2f}s  ({args.count / uniform_seconds / 1e6:.1f}M/s), "
+          f"{_seen_bigram_fraction(uniform, bigram_model):.0%} of chord pairs seen in training")
+    print(f"  trained generation:   {trained_seconds:8.2f}s  ({args.count / trained_seconds / 1e6:.1f}M/s), "
+          f"{_seen_bigram_fraction(trained, bigram_model):.0%} of chord pairs seen in training")
+    return 0
+
+
+def _transpose_symbol(symbol, shift):
+    # Rewrites a chord symbol a number of semitones up, spelling every root with sharps
+    names = ("C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B")
+    chord = parse_chord(symbol)
+    transposed = names[(chord.root + shift) % 12] + chord.quality
+    if chord.bass is not None:
+        transposed += "/" + names[(chord.bass + shift) % 12]
+    return transposed
+
+
+def bench_transposition_export(args):
+    """
+    Exports a catalog in all 12 keys: one `create_song_midi` file per song and key, as done by hand
+    today, against `export_transpositions` streaming into a zip and into a multi-track MIDI file.
+    """
+    songs = dict(popular_songs)
+    if args.songs > len(songs):
+        extra = decode_progressions(generate_progressions(args.songs - len(songs), length=8, replace=True, seed=0))
+        songs.update((f"Synthetic song {index}", chords) for index, (_, chords) in enumerate(extra))
+    catalog = DictCatalog(songs)
+    tracks = len(songs) * len(TRANSPOSITIONS)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        loop_songs = list(songs.items())[:args.loop_songs]
+        start = time.perf_counter()
+        for index, (name, chords) in enumerate(loop_songs):
+            for shift in TRANSPOSITIONS:
+                create_song_midi(name, [_transpose_symbol(chord, shift) for chord in chords],
+                                 os.path.join(workdir, f"{index}_{shift:+d}.mid"))
+        loop = (time.perf_counter() - start) / (len(loop_songs) * len(TRANSPOSITIONS)) * tracks
+
+        timings = {}
+        for archive, extension in (("zip", "zip"), ("smf", "mid")):
+            if archive == "smf" and tracks > 0xFFFF:
+                continue  # More tracks than one MIDI file can hold
+            path = os.path.join(workdir, f"catalog.{extension}")
+            start = time.perf_counter()
+            export_transpositions(catalog, path, archive=archive, workers=args.workers)
+            timings[archive] = (time.perf_counter() - start, os.path.getsize(path) / 2 ** 20)
+
+    print(f"{len(songs):,} songs x {len(TRANSPOSITIONS)} keys = {tracks:,} MIDI tracks "
+          f"({args.workers or os.cpu_count()} workers)")
+    print(f"  create_song_midi loop: {loop:8.2f}s  (extrapolated from {len(loop_songs):,} songs)")
+    for archive, (seconds, size_mib) in timings.items():
+        print(f"  export to {archive:3s}:         {seconds:8.2f}s  ({loop / seconds:.0f}x, {size_mib:.1f} MiB)")
+    return 0
+
+
+def bench_playback(args):
+    """
+    Measures start latency of the playback engine against initializing the mixer per click,
+    and underruns while the main thread is busy. Uses the null sink, so it runs without a sound card.
+    """
+    catalog = [chords for _, chords in decode_progressions(generate_progressions(args.plays, seed=0))]
+
+    legacy = []
+    try:
+        import pygame
+    except ImportError as e:
+        print(f"  (per-click mixer start-up skipped: {e})")
+    else:
+        try:
+            for chords in catalog[:args.legacy_plays]:
+                start = time.perf_counter()
+                pygame.mixer.init()
+                pygame.mixer.Sound(io.BytesIO(render_wav(chords))).play()
+                legacy.append(time.perf_counter() - start)
+                pygame.mixer.quit()
+        except pygame.error as e:
+            print(f"  (per-click mixer start-up skipped: {e})")
+
+    engine = PlaybackEngine(NullSink())
+    for chords in catalog:
+        engine.play(chords)
+        time.sleep(args.hold)
+    engine.set_loop(True)
+    # Keep the main thread busy rendering while the loop plays
+    deadline = time.perf_counter() + args.load_seconds
+    while time.perf_counter() < deadline:
+        render_batch(catalog[:64])
+    stats = engine.stats()
+    engine.close()
+    latencies = np.array(engine.start_latencies) * 1000
+
+    print(f"{args.plays} plays, {args.load_seconds:g}s looping under main-thread load")
+    if legacy:
+        legacy_ms = np.array(legacy) * 1000
+        print(f"  mixer init per click: {np.median(legacy_ms):8.2f}ms p50, {np.percentile(legacy_ms, 95):.2f}ms p95")
+    print(f"  engine start latency: {np.median(latencies):8.2f}ms p50, {np.percentile(latencies, 95):.2f}ms p95")
+    print(f"  underruns:            {stats['underruns']:8d}  ({stats['blocks_played']} blocks)")
+    return 0 if stats["underruns"] == 0 else 1
+
+
+def bench_tracing_overhead(args):
+    """
+    Measures what the tracing layer adds per call, off and on, both for an empty traced function and
+    for `generate_random_chords`, and the size of the exported trace.
+    """
+    @tracing.traced("bench.empty")
+    def empty():
+        return None
+
+    def per_call(function, *call_args):
+        start = time.perf_counter()
+        for _ in range(args.calls):
+            function(*call_args)
+        return (time.perf_counter() - start) / args.calls * 1e6
+
+    was_enabled = tracing.is_enabled()
+    tracing.reset()
+    try:
+        tracing.enable(False)
+        bare = per_call(empty.__wrapped__)
+        disabled = per_call(empty)
+        generate_bare = per_call(generate_random_chords.__wrapped__, "C Major")
+        generate_disabled = per_call(generate_random_chords, "C Major")
+        tracing.enable()
+        enabled = per_call(empty)
+        generate_enabled = per_call(generate_random_chords, "C Major")
+        snapshot = tracing.snapshot()
+        trace_bytes = len(json.dumps(tracing.chrome_trace()))
+    finally:
+        tracing.enable(was_enabled)
+        tracing.reset()
+
+    print(f"Tracing overhead over {args.calls:,} calls")
+    print(f"  empty function:          {bare:7.3f}us")
+    print(f"    traced, disabled:      {disabled:7.3f}us  (+{disabled - bare:.3f}us)")
+    print(f"    traced, enabled:       {enabled:7.3f}us  (+{enabled - bare:.3f}us)")
+    print(f"  generate_random_chords:  {generate_bare:7.3f}us")
+    print(f"    traced, disabled:      {generate_disabled:7.3f}us  "
+          f"({(generate_disabled - generate_bare) / generate_bare:+.1%})")
+    print(f"    traced, enabled:       {generate_enabled:7.3f}us  "
+          f"({(generate_enabled - generate_bare) / generate_bare:+.1%})")
+    summary = snapshot["histograms"]["generate.random"]
+    print(f"  recorded generate.random: p50 {summary['p50_ms'] * 1000:.2f}us, p99 {summary['p99_ms'] * 1000:.2f}us, "
+          f"Chrome trace {trace_bytes / 1e6:.1f}MB")
+    return 0
+
+
+# Version of the result files written by the `suite` benchmark; baselines of another version are not compared
+SUITE_FORMAT = 1
+
+# Iterations of each suite case repeated under tracemalloc to find its peak Python heap
+MEMORY_ITERATIONS = 200
+
+
+def _synthetic_songs(count, seed=0):
+    """
+    Builds a synthetic catalog of 4-8 chord songs, each drawn from the chords of one random key.
+
+    Returns:
+        dict: Song name -> list of chord symbols.
+    """
+    rng = np.random.default_rng(seed)
+    keys = sorted(keys_and_chords)
+    songs = {}
+    for number in range(count):
+        chords = keys_and_chords[keys[rng.integers(len(keys))]]
+        picks = rng.integers(len(chords), size=rng.integers(4, 9))
+        songs[f"Synthetic Song {number}"] = [chords[index] for index in picks]
+    return songs
+
+
+def _converted(result):
+    """
+    Unwraps a `ConversionResult`, raising its error so a failed conversion fails its suite case.
+    """
+    if not result.success:
+        raise RuntimeError(result.error)
+    return result
+
+
+def _measure_case(run, iterations, items_per_iteration):
+    """
+    Times one suite case: a warm-up call, then `iterations` timed calls of run(iteration), then up to
+    MEMORY_ITERATIONS more under tracemalloc for the peak Python heap (kept out of the timings, as
+    tracing allocations slows them down). Memory held by ffmpeg child processes is not included.
+
+    Returns:
+        dict: Throughput (items per second), latency mean and percentiles per iteration, and peak heap.
+    """
+    import tracemalloc
+
+    run(0)
+    samples = np.empty(iterations)
+    for iteration in range(iterations):
+        start = time.perf_counter_ns()
+        run(iteration)
+        samples[iteration] = time.perf_counter_ns() - start
+    samples /= 1e6
+
+    tracemalloc.start()
+    try:
+        for iteration in range(min(iterations, MEMORY_ITERATIONS)):
+            run(iteration)
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "iterations": iterations,
+        "throughput": iterations * items_per_iteration / (samples.sum() / 1e3),
+        "mean_ms": float(samples.mean()),
+        "p50_ms": float(np.percentile(samples, 50)),
+        "p95_ms": float(np.percentile(samples, 95)),
+        "p99_ms": float(np.percentile(samples, 99)),
+        "peak_kib": peak_bytes / 1024,
+    }
+
+
+def _suite_cases(args, workdir):
+    """
+    Yields the suite cases selected by `args.cases` as (name, unit, items per iteration, iterations, run)
+    tuples, writing their synthetic inputs into `workdir` as each one is reached.
+    """
+    def selected(name):
+        return not args.cases or any(pattern in name for pattern in args.cases)
+
+    progressions = [generate_random_chords(key) for key in key_names]
+    midi_path = os.path.join(workdir, "progression.mid")
+    cases = [
+        ("generate_random_chords", "progressions", 1, args.calls,
+         lambda iteration: generate_random_chords(key_names[iteration % len(key_names)])),
+        ("generate_progressions[100k]", "progressions", 100_000, args.repeat,
+         lambda iteration: generate_progressions(100_000, seed=iteration)),
+        ("render_midi", "files", 1, args.calls // 10,
+         lambda iteration: render_midi(progressions[iteration % len(progressions)])),
+        ("create_midi", "files", 1, args.calls // 10,
+         lambda iteration: create_midi(progressions[iteration % len(progressions)], midi_path)),
+    ]
+    yield from (case for case in cases if selected(case[0]))
+
+    for size in args.catalog_sizes:
+        name = f"create_song_midi[{size} songs]"
+        if selected(name):
+            songs = list(_synthetic_songs(size).items())
+            yield (name, "songs", 1, size,
+                   lambda iteration, songs=songs: create_song_midi(*songs[iteration], output_path=midi_path))
+
+    for seconds in args.wav_seconds:
+        conversions = [(source_format, target_format, streaming,
+                        f"convert_file {source_format}->{target_format}{mode}[{seconds:g}s]")
+                       for source_format, target_format in (("wav", "mp3"), ("mp3", "wav"))
+                       for streaming, mode in ((False, ""), (True, " streaming"))]
+        conversions = [conversion for conversion in conversions if selected(conversion[3])]
+        if not conversions:
+            continue
+        sources = {"wav": make_sine_wav(os.path.join(workdir, f"sine_{seconds:g}s.wav"), seconds)}
+        # The MP3 source of the decoding cases is encoded once from the sine, by ffmpeg directly
+        sources["mp3"] = convert_file(sources["wav"], "wav", "mp3", workdir, streaming=True).output
+        output_dir = os.path.join(workdir, f"out_{seconds:g}s")
+        for source_format, target_format, streaming, name in conversions:
+            yield (name, "audio s", seconds, args.repeat,
+                   lambda iteration, args=(sources[source_format], source_format, target_format, output_dir, streaming):
+                   _converted(convert_file(*args)))
+
+
+def _compare_suite(results, baseline, threshold, memory_threshold):
+    """
+    Compares suite results with a baseline run, printing every change beyond the thresholds.
+
+    Returns:
+        list: Names of the cases that regressed.
+    """
+    regressions = []
+    print(f"Compared with {baseline['created']} (threshold {threshold:.0%}, memory {memory_threshold:.0%})")
+    for name, current in results["cases"].items():
+        previous = baseline["cases"].get(name)
+        if previous is None or "error" in previous or "error" in current:
+            continue
+        latency = current["p50_ms"] / previous["p50_ms"] - 1
+        throughput = current["throughput"] / previous["throughput"] - 1
+        # Small absolute changes are allocator noise, whatever their ratio
+        memory = (current["peak_kib"] - previous["peak_kib"]) / max(previous["peak_kib"], 64)
+        slower = latency > threshold or throughput < 1 / (1 + threshold) - 1
+        larger = memory > memory_threshold
+        if slower or larger:
+            regressions.append(name)
+            verdict = "REGRESSION"
+        elif latency < -threshold:
+            verdict = "improved"
+        else:
+            continue
+        print(f"  {name:42s} p50 {latency:+7.1%}  throughput {throughput:+7.1%}  peak heap {memory:+7.1%}  {verdict}")
+    missing = len(set(baseline["cases"]) - set(results["cases"]))
+    if missing:
+        print(f"  {missing} baseline cases not run this time")
+    if not regressions:
+        print("  no regressions")
+    return regressions
+
+
+def bench_suite(args):
+    """
+    Runs the benchmark suite over synthetic data only: progression generation, MIDI rendering of
+    single progressions and of synthetic catalogs of increasing size, and audio conversion of sine
+    WAVs of several lengths (and MP3s encoded from them). Each case reports throughput, latency
+    percentiles and peak Python heap; the results can be saved as a JSON baseline and compared with
+    an earlier one, failing if any case regressed beyond the threshold.
+    """
+    import platform
+    import random
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline.get("format") != SUITE_FORMAT:
+            raise ValueError(f"{args.compare} is not a suite result of format {SUITE_FORMAT}")
+
+    results = {
+        "format": SUITE_FORMAT,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                        "machine": platform.machine(), "cpus": os.cpu_count(), "numpy": np.__version__},
+        "parameters": {"calls": args.calls, "repeat": args.repeat, "catalog_sizes": args.catalog_sizes,
+                       "wav_seconds": args.wav_seconds},
+        "cases": {},
+    }
+    print(f"{'case':42s} {'throughput':>30s} {'p50':>9s} {'p95':>9s} {'p99':>9s} {'peak heap':>11s}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, unit, items, iterations, run in _suite_cases(args, workdir):
+            random.seed(0)  # generate_random_chords draws from the global generator
+            try:
+                case = _measure_case(run, iterations, items)
+            except Exception as e:
+                results["cases"][name] = {"error": str(e)}
+                print(f"{name:42s} failed: {str(e).splitlines()[0][:80]}")
+                continue
+            case["unit"] = unit
+            results["cases"][name] = case
+            print(f"{name:42s} {case['throughput']:14,.1f} {unit + '/s':15s} {case['p50_ms']:7.3f}ms "
+                  f"{case['p95_ms']:7.3f}ms {case['p99_ms']:7.3f}ms {case['peak_kib']:8.0f}KiB")
+
+    if args.save:
+        with open(args.save, "w") as results_file:
+            json.dump(results, results_file, indent=2)
+        print(f"Results saved to {args.save}")
+    failed = [name for name, case in results["cases"].items() if "error" in case]
+    if baseline is None:
+        return 1 if failed else 0
+    if baseline.get("parameters") != results["parameters"]:
+        print("Warning: the baseline was run with different parameters; only cases of the same name are compared")
+    regressions = _compare_suite(results, baseline, args.threshold, args.memory_threshold)
+    return 1 if regressions or failed else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Music Production Assistant benchmarks.")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    batch = subparsers.add_parser("batch-conversion", help="Serial loop vs. process-pool batch conversion.")
+    batch.add_argument("--files", type=int, default=32)
+    batch.add_argument("--seconds", type=float, default=5.0)
+    batch.add_argument("--target-format", default="mp3")
+    batch.add_argument("--workers", type=int)
+    batch.set_defaults(handler=bench_batch_conversion)
+
+    incremental = subparsers.add_parser("incremental-conversion", help="Re-running a batch against its manifest.")
+    incremental.add_argument("--files", type=int, default=200)
+    incremental.add_argument("--seconds", type=float, default=1.0)
+    incremental.add_argument("--changed-percent", type=int, default=5)
+    incremental.add_argument("--target-format", default="mp3")
+    incremental.add_argument("--workers", type=int)
+    incremental.set_defaults(handler=bench_incremental_conversion)
+
+    export = subparsers.add_parser("multi-target", help="Per-target conversions vs. decode-once multi_export.")
+    export.add_argument("--files", type=int, default=4)
+    export.add_argument("--seconds", type=float, default=60.0)
+    export.add_argument("--targets", nargs="+", default=["mp3:320k", "mp3:192k", "mp3:128k", "flac", "ogg"])
+    export.add_argument("--source-format", default="wav")
+    export.set_defaults(handler=bench_multi_target)
+
+    memory = subparsers.add_parser("streaming-memory", help="Peak RSS of streaming vs. in-memory conversion.")
+    memory.add_argument("--minutes", type=float, default=20.0)
+    memory.add_argument("--sample-rate", type=int, default=96000)
+    memory.add_argument("--target-format", default="wav")
+    memory.set_defaults(handler=bench_streaming_memory)
+
+    parsing = subparsers.add_parser("chord-parsing", help="Per-chord cost of chord symbol parsing.")
+    parsing.add_argument("--chords", type=int, default=2_000_000)
+    parsing.set_defaults(handler=bench_chord_parsing)
+
+    bulk = subparsers.add_parser("bulk-generation", help="Python loop vs. vectorized progression generation.")
+    bulk.add_argument("--count", type=int, default=10_000_000)
+    bulk.add_argument("--length", type=int, default=4)
+    bulk.add_argument("--replace", action="store_true")
+    bulk.set_defaults(handler=bench_bulk_generation)
+
+    cache = subparsers.add_parser("render-cache", help="Hit rate and latency of the render cache under load.")
+    cache.add_argument("--progressions", type=int, default=5_000)
+    cache.add_argument("--requests", type=int, default=200_000)
+    cache.add_argument("--threads", type=int, default=8)
+    cache.add_argument("--memory-items", type=int, default=128)
+    cache.add_argument("--disk-bytes", type=int, default=64 * 1024 * 1024)
+    cache.set_defaults(handler=bench_render_cache)
+
+    startup = subparsers.add_parser("cli-startup", help="Cold import time of the headless CLI.")
+    startup.add_argument("--runs", type=int, default=10)
+    startup.add_argument("--budget-ms", type=float, default=50.0)
+    startup.set_defaults(handler=bench_cli_startup)
+
+    synthesis = subparsers.add_parser("synth", help="Offline rendering speed of the NumPy synthesizer.")
+    synthesis.add_argument("--progressions", type=int, default=2_000)
+    synthesis.set_defaults(handler=bench_synth)
+
+    search = subparsers.add_parser("progression-index", help="Progression search index vs. a full catalog scan.")
+    search.add_argument("--songs", type=int, default=1_000_000)
+    search.add_argument("--queries", type=int, default=2_000)
+    search.add_argument("--scan-queries", type=int, default=50)
+    search.set_defaults(handler=bench_progression_index)
+
+    catalog = subparsers.add_parser("catalog-startup", help="Song selector start-up: dict + addItems vs. lazy catalog.")
+    catalog.add_argument("--songs", type=int, default=200_000)
+    catalog.set_defaults(handler=bench_catalog_startup)
+
+    peaks = subparsers.add_parser("waveform", help="Peak pyramid build, sidecar load and redraw latency.")
+    peaks.add_argument("--minutes", type=float, default=60.0)
+    peaks.add_argument("--redraws", type=int, default=2_000)
+    peaks.add_argument("--width", type=int, default=1_000)
+    peaks.set_defaults(handler=bench_waveform)
+
+    markov = subparsers.add_parser("markov-generation", help="Trained vs. uniform progression generation.")
+    markov.add_argument("--count", type=int, default=1_000_000)
+    markov.add_argument("--length", type=int, default=4)
+    markov.add_argument("--order", type=int, default=2)
+    markov.set_defaults(handler=bench_markov_generation)
+
+    transposition = subparsers.add_parser("transposition-export", help="Per-file MIDI loop vs. 12-key archive export.")
+    transposition.add_argument("--songs", type=int, default=5_000)
+    transposition.add_argument("--loop-songs", type=int, default=200)
+    transposition.add_argument("--workers", type=int)
+    transposition.set_defaults(handler=bench_transposition_export)
+
+    playback = subparsers.add_parser("playback", help="Playback engine start latency and underruns.")
+    playback.add_argument("--plays", type=int, default=50)
+    playback.add_argument("--legacy-plays", type=int, default=10)
+    playback.add_argument("--hold", type=float, default=0.1)
+    playback.add_argument("--load-seconds", type=float, default=5.0)
+    playback.set_defaults(handler=bench_playback)
+
+    overhead = subparsers.add_parser("tracing-overhead", help="Per-call cost of tracing spans, disabled and enabled.")
+    overhead.add_argument("--calls", type=int, default=100_000)
+    overhead.set_defaults(handler=bench_tracing_overhead)
+
+    suite = subparsers.add_parser("suite", help="Synthetic-data suite with JSON baselines and regression checks.")
+    suite.add_argument("--calls", type=int, default=20_000, help="Calls of the per-progression cases.")
+    suite.add_argument("--repeat", type=int, default=5, help="Runs of the bulk generation and conversion cases.")
+    suite.add_argument("--catalog-sizes", type=int, nargs="+", default=[100, 1_000, 10_000])
+    suite.add_argument("--wav-seconds", type=float, nargs="+", default=[1, 10, 60])
+    suite.add_argument("--cases", nargs="+", help="Only run cases whose name contains one of these.")
+    suite.add_argument("--save", metavar="PATH", help="Write the results as a JSON baseline.")
+    suite.add_argument("--compare", metavar="PATH", help="Baseline to compare with; exits 1 on a regression.")
+    suite.add_argument("--threshold", type=float, default=0.25,
+                       help="Slowdown of p50 latency or throughput counted as a regression (default: 0.25).")
+    suite.add_argument("--memory-threshold", type=float, default=0.25,
+                       help="Growth of peak heap counted as a regression (default: 0.25).")
+    suite.set_defaults(handler=bench_suite)
+
+    return parser
+
+
+if __name__ == "__main__":
+    arguments = build_parser().parse_args()
+    sys.exit(arguments.handler(arguments))
@@ -0,0 +1,107 @@
+import numpy as np
+
+from chord_generation import keys_and_chords
+import tracing
+
+# Key names in index order; column 0 of a progression array indexes into this tuple
+key_names = tuple(keys_and_chords)
+
+# Number of diatonic chords available in every key
+DEGREES = 7
+
+# Rows generated per step. Fixed so that a seed yields the same progressions whether
+# they end up in memory, in a .npy file or in a memory map.
+CHUNK_ROWS = 1 << 18
+
+
+@tracing.traced("generate.bulk")
+def generate_progressions(count, length=4, replace=False, keys=None, seed=None, out=None):
+    """
+    Generates many random chord progressions at once as a compact integer array.
+
+    Each row is one progression: column 0 is the key index into `key_names` and the
+    remaining `length` columns are chord-degree indices into that key's chord list.
+
+    Args:
+        count (int): Number of progressions to generate.
+        length (int): Number of chords per progression.
+        replace (bool): Allow the same chord to repeat within a progression.
+        keys (list): Key names to draw from; defaults to all keys.
+        seed (int): Seed for the NumPy random Generator, for reproducible output.
+        out (numpy.ndarray): Optional uint8 array of shape (count, length + 1) to fill,
+            e.g. a memory map.
+
+    Returns:
+        numpy.ndarray: The uint8 progression array (`out` if given).
+
+    Raises:
+        ValueError: If a key is invalid, or `length` exceeds the chords in a key without replacement.
+    """
+    if not replace and length > DEGREES:
+        raise ValueError(f"Cannot pick {length} distinct chords from a key of {DEGREES} without replacement")
+
+    if keys is None:
+        key_indices = np.arange(len(key_names), dtype=np.uint8)
+    else:
+        invalid = [key for key in keys if key not in keys_and_chords]
+        if invalid:
+            raise ValueError(f"Invalid key: {invalid[0]}")
+        key_indices = np.array([key_names.index(key) for key in keys], dtype=np.uint8)
+
+    if out is None:
+        out = np.empty((count, length + 1), dtype=np.uint8)
+    elif out.shape != (count, length + 1) or out.dtype != np.uint8:
+        raise ValueError(f"Output array must be uint8 with shape {(count, length + 1)}")
+
+    rng = np.random.default_rng(seed)
+    for start in range(0, count, CHUNK_ROWS):
+        block = out[start:start + CHUNK_ROWS]
+        rows = len(block)
+        block[:, 0] = key_indices[rng.integers(len(key_indices), size=rows)]
+        if replace:
+            block[:, 1:] = rng.integers(DEGREES, size=(rows, length))
+        else:
+            # Ranking i.i.d. uniforms gives a uniformly random permutation per row
+            block[:, 1:] = np.argsort(rng.random((rows, DEGREES)), axis=1)[:, :length]
+    return out
+
+
+def save_progressions(path, count, length=4, replace=False, keys=None, seed=None):
+    """
+    Generates progressions straight into a memory-mapped .npy file, so the full
+    result never has to fit in memory.
+
+    Args:
+        path (str): Output .npy file path.
+        count (int): Number of progressions to generate.
+        length (int): Number of chords per progression.
+        replace (bool): Allow the same chord to repeat within a progression.
+        keys (list): Key names to draw from; defaults to all keys.
+        seed (int): Seed for reproducible output.
+
+    Returns:
+        str: The output path; reopen it with `numpy.load(path, mmap_mode="r")`.
+    """
+    progressions = np.lib.format.open_memmap(path, mode="w+", dtype=np.uint8, shape=(count, length + 1))
+    generate_progressions(count, length, replace, keys, seed, out=progressions)
+    progressions.flush()
+    del progressions
+    return path
+
+
+def decode_progressions(progressions):
+    """
+    Converts rows of a progression array back to chord names.
+
+    Args:
+        progressions (numpy.ndarray): Array produced by `generate_progressions`.
+
+    Returns:
+        list: One (key name, list of chords) pair per row.
+    """
+    decoded = []
+    for row in np.asarray(progressions).tolist():
+        key = key_names[row[0]]
+        chords = keys_and_chords[key]
+        decoded.append((key, [chords[degree] for degree in row[1:]]))
+    return decoded
@@ -1,6 +1,9 @@
-from mido import MidiFile, MidiTrack, Message
+import io
 import random
 
+from chord_theory import chord_voicing
+import tracing
+
 # Dictionary of keys and chords
 # Each key maps to its associated diatonic chords.
 keys_and_chords = {
@@ -33,6 +36,7 @@ keys_and_chords = {
 }
 
 
+@tracing.traced("generate.random")
 def generate_random_chords(key):
     """
     Generates a random chord progression in the specified key.
@@ -57,60 +61,85 @@ def generate_random_chords(key):
     return random.sample(chords, k=4)
 
 
-def create_midi(chords, output_path="random_progression.mid"):
+@tracing.traced("midi.build")
+def build_midi(chords, tempo=None, velocity=64, duration=480, instrument=None):
     """
-    Creates a MIDI file from the given chord progression.
+    Builds an in-memory MIDI file from the given chord progression.
 
     Args:
         chords (list): A list of chords to include in the MIDI file.
-        output_path (str): The output file path for the MIDI file.
+        tempo (float): Tempo in beats per minute; the MIDI default of 120 when None.
+        velocity (int): Note velocity (0-127).
+        duration (int): Delta time in ticks before each note_off (480 ticks per beat).
+        instrument (int): General MIDI program number; the synth's default piano when None.
 
     Returns:
-        str: The output file path of the created MIDI file.
+        MidiFile: The MIDI file, not yet written anywhere.
     
     Raises:
-        ValueError: If a chord's root note is invalid.
+        ValueError: If a chord symbol is invalid.
     """
+    from mido import MidiFile, MidiTrack, Message, MetaMessage, bpm2tempo  # Imported on use for fast start-up
+
     # Create a new MIDI file and add a track
     midi_file = MidiFile()
     track = MidiTrack()
     midi_file.tracks.append(track)
 
-    # Map chords to MIDI note numbers
-    note_mapping = {
-        "C": 60, "C#": 61, "D": 62, "D#": 63, "E": 64, "F": 65,
-        "F#": 66, "G": 67, "G#": 68, "A": 69, "A#": 70, "B": 71,
-        "Bb": 70, "Db": 61, "Eb": 63, "Gb": 66, "Ab": 68, "E#": 65, "B#": 72
-    }
+    if tempo is not None:
+        track.append(MetaMessage("set_tempo", tempo=bpm2tempo(tempo), time=0))
+    if instrument is not None:
+        track.append(Message("program_change", program=instrument, time=0))
 
     for chord in chords:
-        # Identify chord root and quality
-        if chord.endswith("dim"):  # Diminished chord
-            root = chord[:-3]
-            quality = "dim"
-        elif chord.endswith("m"):  # Minor chord
-            root = chord[:-1]
-            quality = "m"
-        else:  # Major chord
-            root = chord
-            quality = "maj"
-
-        # Ensure the chord root is valid
-        if root not in note_mapping:
-            raise ValueError(f"Invalid chord root '{root}' in chord '{chord}'")
-
-        # Get the base pitch for the chord root
-        base_pitch = note_mapping[root]
-
-        # Determine the intervals for the chord
-        intervals = [0, 3, 6] if quality == "dim" else [0, 3, 7] if quality == "m" else [0, 4, 7]
+        # Parsed once per distinct symbol and cached by chord_theory
+        pitches = chord_voicing(chord)
 
         # Add notes to the MIDI file for the chord
-        for interval in intervals:
-            track.append(Message("note_on", note=base_pitch + interval, velocity=64, time=0))
-        for interval in intervals:
-            track.append(Message("note_off", note=base_pitch + interval, velocity=64, time=480))
+        for pitch in pitches:
+            track.append(Message("note_on", note=pitch, velocity=velocity, time=0))
+        for pitch in pitches:
+            track.append(Message("note_off", note=pitch, velocity=velocity, time=duration))
+
+    return midi_file
+
+
+@tracing.traced("midi.render")
+def render_midi(chords, **params):
+    """
+    Renders the given chord progression to Standard MIDI File bytes without touching the disk.
+
+    Args:
+        chords (list): A list of chords to include in the MIDI file.
+        **params: Render parameters passed to `build_midi` (tempo, velocity, duration, instrument).
+
+    Returns:
+        bytes: The encoded MIDI file, ready for `pygame.mixer.music.load(io.BytesIO(...))` or saving.
+
+    Raises:
+        ValueError: If a chord symbol is invalid.
+    """
+    buffer = io.BytesIO()
+    build_midi(chords, **params).save(file=buffer)
+    return buffer.getvalue()
+
+
+@tracing.traced("midi.create")
+def create_midi(chords, output_path="random_progression.mid", **params):
+    """
+    Creates a MIDI file from the given chord progression.
 
+    Args:
+        chords (list): A list of chords to include in the MIDI file.
+        output_path (str): The output file path for the MIDI file.
+        **params: Render parameters passed to `build_midi` (tempo, velocity, duration, instrument).
+
+    Returns:
+        str: The output file path of the created MIDI file.
+    
+    Raises:
+        ValueError: If a chord symbol is invalid.
+    """
     # Save the MIDI file to the specified output path
-    midi_file.save(output_path)
+    build_midi(chords, **params).save(output_path)
     return output_path
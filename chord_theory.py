@@ -0,0 +1,108 @@
+from collections import namedtuple
+from functools import lru_cache
+import re
+
+# MIDI note numbers of the natural notes in the octave starting at middle C
+natural_pitches = {"C": 60, "D": 62, "E": 64, "F": 65, "G": 67, "A": 69, "B": 71}
+
+# Semitone offset of each accidental
+accidentals = {"": 0, "#": 1, "b": -1}
+
+# Mapping of every single-accidental note name to its MIDI note number (e.g. "F#": 66, "B#": 72)
+note_mapping = {
+    letter + accidental: pitch + offset
+    for letter, pitch in natural_pitches.items()
+    for accidental, offset in accidentals.items()
+}
+
+# Intervals above the root for each supported chord quality
+chord_intervals = {
+    "": (0, 4, 7),
+    "maj": (0, 4, 7),
+    "m": (0, 3, 7),
+    "min": (0, 3, 7),
+    "dim": (0, 3, 6),
+    "aug": (0, 4, 8),
+    "+": (0, 4, 8),
+    "5": (0, 7),
+    "6": (0, 4, 7, 9),
+    "m6": (0, 3, 7, 9),
+    "6/9": (0, 4, 7, 9, 14),
+    "m6/9": (0, 3, 7, 9, 14),
+    "7": (0, 4, 7, 10),
+    "maj7": (0, 4, 7, 11),
+    "M7": (0, 4, 7, 11),
+    "m7": (0, 3, 7, 10),
+    "min7": (0, 3, 7, 10),
+    "mmaj7": (0, 3, 7, 11),
+    "m7b5": (0, 3, 6, 10),
+    "dim7": (0, 3, 6, 9),
+    "9": (0, 4, 7, 10, 14),
+    "maj9": (0, 4, 7, 11, 14),
+    "m9": (0, 3, 7, 10, 14),
+    "sus": (0, 5, 7),
+    "sus2": (0, 2, 7),
+    "sus4": (0, 5, 7),
+    "7sus4": (0, 5, 7, 10),
+    "add9": (0, 4, 7, 14),
+    "madd9": (0, 3, 7, 14),
+}
+
+# Root, quality and optional slash bass, e.g. "F#m7", "Bbmaj7", "C/E"; a slash not followed by a note name
+# stays in the quality, so "C6/9" is a 6/9 chord and "C6/9/E" one over an E bass
+chord_pattern = re.compile(r"^([A-G])([#b]?)(.*?)(?:/([A-G])([#b]?))?$")
+
+# A parsed chord symbol; `root` and `bass` are MIDI note numbers, `bass` is None unless it is a slash chord
+Chord = namedtuple("Chord", ["symbol", "root", "quality", "intervals", "bass"])
+
+
+@lru_cache(maxsize=4096)
+def parse_chord(symbol):
+    """
+    Parses a chord symbol into its root, quality and optional slash bass.
+
+    Args:
+        symbol (str): The chord symbol, e.g. "Em7", "F#m", "Bbmaj7", "Csus4", "C6/9" or "C/E".
+
+    Returns:
+        Chord: The parsed chord.
+
+    Raises:
+        ValueError: If the symbol's root, quality or bass note is invalid.
+    """
+    match = chord_pattern.match(symbol)
+    if not match or match.group(3) not in chord_intervals:
+        raise ValueError(f"Invalid chord symbol '{symbol}'")
+
+    letter, accidental, quality, bass_letter, bass_accidental = match.groups()
+    root = natural_pitches[letter] + accidentals[accidental]
+
+    bass = None
+    if bass_letter:
+        # Slash bass notes sound below the chord
+        bass = natural_pitches[bass_letter] + accidentals[bass_accidental]
+        while bass >= root:
+            bass -= 12
+
+    return Chord(symbol, root, quality, chord_intervals[quality], bass)
+
+
+@lru_cache(maxsize=4096)
+def chord_voicing(symbol):
+    """
+    Returns the MIDI pitches to play for a chord symbol, lowest first.
+
+    Args:
+        symbol (str): The chord symbol, e.g. "Em7" or "C/E".
+
+    Returns:
+        tuple: The MIDI note numbers of the voicing.
+
+    Raises:
+        ValueError: If the symbol is invalid.
+    """
+    chord = parse_chord(symbol)
+    pitches = tuple(chord.root + interval for interval in chord.intervals)
+    if chord.bass is not None:
+        pitches = (chord.bass,) + pitches
+    return pitches
@@ -0,0 +1,352 @@
+import argparse
+import os
+import sys
+
+# Heavy dependencies (mido, pydub, numpy) are imported inside the command handlers, and Qt and
+# pygame never are, so build pipelines only pay for what the chosen command uses.
+
+
+def run_generate(args):
+    """
+    Prints random (or, with --markov, trained) chord progressions for a key and optionally
+    writes the first one as MIDI.
+
+    Args:
+        args (argparse.Namespace): Parsed command-line arguments.
+
+    Returns:
+        int: Exit code.
+    """
+    from chord_generation import generate_random_chords, create_midi
+
+    if args.markov:
+        from markov_generation import generate_markov_chords, load_or_train
+        from popular_songs import popular_songs
+        from song_catalog import open_catalog
+
+        model = load_or_train(open_catalog(args.catalog, fallback=popular_songs), order=args.order)
+        progressions = [generate_markov_chords(args.key, model=model) for _ in range(args.count)]
+    else:
+        progressions = [generate_random_chords(args.key) for _ in range(args.count)]
+    for chords in progressions:
+        print(" -> ".join(chords))
+    if args.midi:
+        create_midi(progressions[0], args.midi, **render_params(args))
+        print(f"MIDI saved as: {args.midi}")
+    if args.wav:
+        from synth import write_wav
+
+        write_wav(progressions[0], args.wav, **render_params(args))
+        print(f"WAV saved as: {args.wav}")
+    return 0
+
+
+def run_render_song(args):
+    """
+    Writes the chord progression of a song as a MIDI file, or as synthesized audio with --wav.
+
+    Args:
+        args (argparse.Namespace): Parsed command-line arguments.
+
+    Returns:
+        int: Exit code, 1 if the song is unknown.
+    """
+    from popular_songs import popular_songs, create_song_midi
+    from song_catalog import open_catalog
+
+    catalog = open_catalog(args.catalog, fallback=popular_songs)
+    chords = catalog.chords(args.song)
+    if chords is None:
+        names, _ = catalog.page(limit=20)
+        print(f"Unknown song: {args.song}. Available songs include:", file=sys.stderr)
+        for song_name in names:
+            print(f"  {song_name}", file=sys.stderr)
+        return 1
+    if args.wav:
+        from synth import write_wav
+
+        write_wav(chords, args.wav, **render_params(args))
+        print(f"WAV saved as: {args.wav}")
+    else:
+        create_song_midi(args.song, chords, args.output, **render_params(args))
+        print(f"MIDI saved as: {args.output}")
+    return 0
+
+
+def run_export_catalog(args):
+    """
+    Transposes every song of the catalog into all 12 keys and writes the MIDI into one archive.
+
+    Args:
+        args (argparse.Namespace): Parsed command-line arguments.
+
+    Returns:
+        int: Exit code.
+    """
+    from popular_songs import popular_songs
+    from song_catalog import DictCatalog, open_catalog
+    from transposition_export import export_transpositions
+
+    catalog = DictCatalog(popular_songs) if args.builtin else open_catalog(args.catalog, fallback=popular_songs)
+
+    def report(done, total):
+        print(f"\r{done:,}/{total:,} songs", end="", flush=True)
+
+    tracks = export_transpositions(catalog, args.output, archive=args.archive, workers=args.workers,
+                                   progress=report, **render_params(args))
+    print(f"\nWrote {tracks:,} MIDI tracks to {args.output}")
+    return 0
+
+
+def run_import_catalog(args):
+    """
+    Imports a CSV or JSON song list into the SQLite song catalog used by the GUI and `render-song`.
+
+    Args:
+        args (argparse.Namespace): Parsed command-line arguments.
+
+    Returns:
+        int: Exit code.
+    """
+    from song_catalog import SqliteCatalog, default_catalog_path, import_songs
+
+    catalog_path = args.catalog or default_catalog_path()
+    if not os.path.exists(catalog_path) and not args.no_builtin:
+        from popular_songs import popular_songs
+
+        # A catalog replaces the built-in song list, so a new one starts with those songs
+        catalog = SqliteCatalog(catalog_path)
+        catalog.add_songs(popular_songs.items())
+        catalog.close()
+
+    count = import_songs(args.source, catalog_path, progress=lambda imported: print(f"Imported {imported:,} songs..."))
+    print(f"Imported {count:,} songs into {catalog_path}")
+    return 0
+
+
+def run_convert(args):
+    """
+    Converts a single audio file, taking the source format from its extension.
+
+    Args:
+        args (argparse.Namespace): Parsed command-line arguments.
+
+    Returns:
+        int: Exit code, 1 if the conversion failed.
+    """
+    from audio_conversion import convert_file
+
+    source_format = os.path.splitext(args.file)[1].lstrip(".").lower()
+    result = convert_file(args.file, source_format, args.target_format, args.output_dir, streaming=args.stream)
+    if not result.success:
+        print(f"Error converting {result.source}: {result.error}", file=sys.stderr)
+        return 1
+    print(f"Converted to {args.target_format.upper()}: {result.output} ({result.seconds:.2f}s)")
+    return 0
+
+
+def run_export(args):
+    """
+    Exports each source to every requested format and bitrate, decoding it once.
+
+    Args:
+        args (argparse.Namespace): Parsed command-line arguments.
+
+    Returns:
+        int: Exit code, 1 if any output failed.
+    """
+    from audio_conversion import DEFAULT_EXPORT_TEMPLATE, multi_export
+
+    failed = 0
+    for source in args.sources:
+        for result in multi_export(source, args.targets, template=args.template or DEFAULT_EXPORT_TEMPLATE):
+            if result.success:
+                print(f"{result.source} -> {result.output} ({result.seconds:.2f}s)")
+            else:
+                failed += 1
+                print(f"Error exporting {result.source} to {result.output}: {result.error}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def run_batch(args):
+    """
+    Converts a directory or glob of audio files and prints per-file progress. With --incremental,
+    files unchanged since the last run are skipped (and not printed).
+
+    Args:
+        args (argparse.Namespace): Parsed command-line arguments.
+
+    Returns:
+        int: Exit code, 1 if any file failed to convert.
+    """
+    from audio_conversion import batch_convert, incremental_convert
+
+    def report(completed, total, result):
+        if result.skipped:
+            return
+        status = "ok" if result.success else f"FAILED: {result.error}"
+        print(f"[{completed}/{total}] {result.source} -> {result.output} ({result.seconds:.2f}s) {status}")
+
+    options = {"output_dir": args.output_dir, "workers": args.workers, "progress": report, "streaming": args.stream}
+    if args.incremental:
+        results = incremental_convert(args.source, args.source_format, args.target_format, args.manifest,
+                                      force=args.force, **options)
+    else:
+        results = batch_convert(args.source, args.source_format, args.target_format, **options)
+    failed = [result for result in results if not result.success]
+    skipped = sum(result.skipped for result in results)
+    print(f"Converted {len(results) - len(failed) - skipped} of {len(results)} files"
+          + (f", {skipped} unchanged." if args.incremental else "."))
+    return 1 if failed else 0
+
+
+def render_params(args):
+    """
+    Collects the MIDI render parameters given on the command line.
+
+    Args:
+        args (argparse.Namespace): Parsed command-line arguments.
+
+    Returns:
+        dict: Keyword arguments for `build_midi`.
+    """
+    return {"tempo": args.tempo, "velocity": args.velocity, "duration": args.duration, "instrument": args.instrument}
+
+
+def positive_int(value):
+    """
+    Argument type for counts that must be at least one.
+
+    Args:
+        value (str): The command-line value.
+
+    Returns:
+        int: The parsed count.
+
+    Raises:
+        argparse.ArgumentTypeError: If the value is not a positive integer.
+    """
+    try:
+        count = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}")
+    if count < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {count}")
+    return count
+
+
+def add_render_arguments(parser):
+    """
+    Adds the MIDI render options shared by the rendering commands.
+
+    Args:
+        parser (argparse.ArgumentParser): The sub-command parser.
+    """
+    parser.add_argument("--tempo", type=float, help="Tempo in BPM (default: 120).")
+    parser.add_argument("--velocity", type=int, default=64, help="Note velocity 0-127 (default: 64).")
+    parser.add_argument("--duration", type=int, default=480, help="Ticks per chord (default: 480).")
+    parser.add_argument("--instrument", type=int, help="General MIDI program number (default: piano).")
+
+
+def build_parser():
+    """
+    Builds the argument parser for the command-line interface.
+
+    Returns:
+        argparse.ArgumentParser: The configured parser.
+    """
+    parser = argparse.ArgumentParser(description="Music Production Assistant command-line tools.")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="Record timing spans and write them as a Chrome trace (JSON) to PATH on exit.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    generate = subparsers.add_parser("generate", help="Generate random chord progressions in a key.")
+    generate.add_argument("key", help='Key to generate in, e.g. "C Major" or "A Minor".')
+    generate.add_argument("--count", type=positive_int, default=1, help="Number of progressions to print (default: 1).")
+    generate.add_argument("--midi", help="Write the first progression to this MIDI file.")
+    generate.add_argument("--wav", help="Synthesize the first progression to this WAV file.")
+    generate.add_argument("--markov", action="store_true",
+                          help="Draw from a Markov model trained on the song catalog instead of uniformly.")
+    generate.add_argument("--catalog", help="Catalog to train on with --markov (default: the imported catalog, "
+                                            "else the built-in songs).")
+    generate.add_argument("--order", type=int, default=2, help="Chords of context for --markov (default: 2).")
+    add_render_arguments(generate)
+    generate.set_defaults(handler=run_generate)
+
+    render_song = subparsers.add_parser("render-song", help="Write a song's progression as MIDI.")
+    render_song.add_argument("song", help='Song name, e.g. "Let It Be (The Beatles)".')
+    render_song.add_argument("-o", "--output", default="song_progression.mid", help="Output MIDI file.")
+    render_song.add_argument("--wav", help="Synthesize the progression to this WAV file instead of writing MIDI.")
+    render_song.add_argument("--catalog", help="Song catalog to look the song up in (default: imported catalog, "
+                                               "else the built-in songs).")
+    add_render_arguments(render_song)
+    render_song.set_defaults(handler=run_render_song)
+
+    export_catalog = subparsers.add_parser("export-catalog",
+                                           help="Export every catalog song in all 12 keys as a MIDI archive.")
+    export_catalog.add_argument("output", help="Archive to write: a .zip of MIDI files, or a .mid with one track "
+                                               "per song and key.")
+    export_catalog.add_argument("--archive", choices=("zip", "smf"), help="Archive type (default: from the extension).")
+    export_catalog.add_argument("--catalog", help="Song catalog to export (default: imported catalog, "
+                                                  "else the built-in songs).")
+    export_catalog.add_argument("--builtin", action="store_true", help="Export the built-in popular songs.")
+    export_catalog.add_argument("--workers", type=int, help="Worker processes (default: number of CPU cores).")
+    add_render_arguments(export_catalog)
+    export_catalog.set_defaults(handler=run_export_catalog)
+
+    import_catalog = subparsers.add_parser("import-catalog", help="Import a CSV or JSON song list into the catalog.")
+    import_catalog.add_argument("source", help="CSV with 'name' and 'chords' columns, or JSON song list.")
+    import_catalog.add_argument("--catalog", help="Catalog file to write (default: the per-user catalog).")
+    import_catalog.add_argument("--no-builtin", action="store_true",
+                                help="Do not add the built-in popular songs to a new catalog.")
+    import_catalog.set_defaults(handler=run_import_catalog)
+
+    convert = subparsers.add_parser("convert", help="Convert a single audio file.")
+    convert.add_argument("file", help="Audio file to convert; its extension gives the source format.")
+    convert.add_argument("--to", dest="target_format", default="wav", help="Target format (default: wav).")
+    convert.add_argument("--output-dir", help="Directory for the converted file (default: next to the source).")
+    convert.add_argument("--stream", action="store_true",
+                         help="Convert in fixed-size chunks to keep memory flat for long recordings.")
+    convert.set_defaults(handler=run_convert)
+
+    export = subparsers.add_parser("export", help="Export audio files to several formats and bitrates at once.")
+    export.add_argument("sources", nargs="+", help="Audio files to export; their extensions give the source format.")
+    export.add_argument("--target", dest="targets", action="append", required=True,
+                        help='Format and optional bitrate, e.g. "mp3:320k" or "flac"; repeat for each output.')
+    export.add_argument("--template", help='Output path template with the fields {dir}, {name}, {stem}, {format}, '
+                                           '{bitrate} and {tag} (default: "{stem}{tag}.{format}").')
+    export.set_defaults(handler=run_export)
+
+    batch = subparsers.add_parser("batch", help="Convert every audio file in a directory or glob.")
+    batch.add_argument("source", help="Directory (searched recursively) or glob pattern.")
+    batch.add_argument("--from", dest="source_format", default="mp3", help="Source format (default: mp3).")
+    batch.add_argument("--to", dest="target_format", default="wav", help="Target format (default: wav).")
+    batch.add_argument("--output-dir", help="Directory for converted files (default: next to each source).")
+    batch.add_argument("--workers", type=int, help="Worker processes (default: number of CPU cores).")
+    batch.add_argument("--stream", action="store_true",
+                       help="Convert in fixed-size chunks to keep memory flat for long recordings.")
+    batch.add_argument("--incremental", action="store_true",
+                       help="Skip files unchanged since they were last converted, tracked in a manifest.")
+    batch.add_argument("--manifest", help="Manifest file for --incremental (default: in the user cache directory).")
+    batch.add_argument("--force", action="store_true",
+                       help="With --incremental, convert every file anyway and refresh the manifest.")
+    batch.set_defaults(handler=run_batch)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.trace:
+        import tracing
+
+        tracing.write_trace_at_exit(args.trace)
+    try:
+        return args.handler(args)
+    except (ValueError, FileNotFoundError) as e:  # Invalid keys and chord symbols, missing catalogs
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+import sqlite3
+
+# Bumped whenever the encoder options used by `convert_file` change, so every output is redone
+ENCODER_SETTINGS_VERSION = 1
+
+# Bytes read at a time while hashing a source file
+HASH_CHUNK_SIZE = 1 << 20
+
+# Seconds a write waits for another connection's transaction (e.g. a second batch job) before failing
+BUSY_TIMEOUT = 60.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversions (
+    source TEXT NOT NULL,
+    output TEXT NOT NULL,
+    settings TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    output_size INTEGER NOT NULL,
+    output_mtime_ns INTEGER NOT NULL,
+    PRIMARY KEY (source, output)
+);
+"""
+
+
+def default_manifest_path():
+    """
+    Returns the per-user location of the conversion manifest.
+
+    Returns:
+        str: `$XDG_CACHE_HOME/music_production_assistant/conversions.sqlite`, falling back to `~/.cache`.
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "music_production_assistant", "conversions.sqlite")
+
+
+def encoder_settings(source_format, target_format):
+    """
+    Describes how a file is converted; a manifest entry only counts if it was made with the same settings.
+
+    Args:
+        source_format (str): Format of the source file (e.g. "mp3").
+        target_format (str): Format converted to (e.g. "wav").
+
+    Returns:
+        str: Canonical JSON of the settings.
+    """
+    return json.dumps({"from": source_format, "to": target_format, "version": ENCODER_SETTINGS_VERSION},
+                      sort_keys=True)
+
+
+def file_digest(path):
+    """
+    Returns the hex SHA-256 of a file's content, read in fixed-size chunks.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as source_file:
+        for chunk in iter(lambda: source_file.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ConversionManifest:
+    """
+    Record of finished conversions in a SQLite file, so re-running a batch over a library only
+    converts what changed.
+
+    Each entry keeps the source's size, modification time and content hash, the encoder settings,
+    and the size and modification time of the output. A source whose size and modification time
+    are unchanged, with its output untouched, is skipped on a stat alone; one whose modification
+    time changed is hashed, and skipped if its content is the same.
+    """
+
+    def __init__(self, path=None):
+        """
+        Opens (creating if needed) a manifest file. Each batch should open its own; several may share a file.
+
+        Args:
+            path (str): Path of the SQLite file; defaults to `default_manifest_path()`.
+        """
+        self.path = path or default_manifest_path()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.connection = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT)
+        # Write-ahead logging lets batches read while another records, and makes per-row commits cheap
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM conversions").fetchone()[0]
+
+    def check(self, source, output, settings):
+        """
+        Decides from file metadata alone whether a source needs converting.
+
+        Args:
+            source (str): Path of the source file.
+            output (str): Path the converted file is written to.
+            settings (str): Result of `encoder_settings`.
+
+        Returns:
+            tuple: ("current", None) if the source and output are unchanged since they were recorded;
+            ("verify", sha256) if only the source's modification time changed, so its content hash
+            decides; ("convert", None) otherwise.
+        """
+        row = self.connection.execute(
+            "SELECT settings, size, mtime_ns, sha256, output_size, output_mtime_ns FROM conversions "
+            "WHERE source = ? AND output = ?",
+            (os.path.abspath(source), os.path.abspath(output)),
+        ).fetchone()
+        if row is None or row[0] != settings:
+            return "convert", None
+        try:
+            source_stat = os.stat(source)
+            output_stat = os.stat(output)
+        except OSError:
+            return "convert", None
+        if (output_stat.st_size, output_stat.st_mtime_ns) != (row[4], row[5]) or source_stat.st_size != row[1]:
+            return "convert", None  # The output was deleted, replaced or edited, or the source grew or shrank
+        if source_stat.st_mtime_ns == row[2]:
+            return "current", None
+        return "verify", row[3]
+
+    def record(self, source, output, settings, source_stat, sha256):
+        """
+        Records a finished conversion, committing it at once so the write lock is held only briefly
+        and a crash loses no finished work.
+
+        Args:
+            source (str): Path of the source file.
+            output (str): Path of the converted file, which must exist.
+            settings (str): Result of `encoder_settings`.
+            source_stat (os.stat_result): Stat of the source taken before it was read.
+            sha256 (str): Hex digest of the source content.
+
+        Raises:
+            OSError: If the output cannot be stat'ed; nothing is recorded.
+        """
+        output_stat = os.stat(output)
+        self.connection.execute(
+            "INSERT INTO conversions VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(source, output) DO UPDATE SET settings = excluded.settings, size = excluded.size, "
+            "mtime_ns = excluded.mtime_ns, sha256 = excluded.sha256, output_size = excluded.output_size, "
+            "output_mtime_ns = excluded.output_mtime_ns",
+            (os.path.abspath(source), os.path.abspath(output), settings, source_stat.st_size,
+             source_stat.st_mtime_ns, sha256, output_stat.st_size, output_stat.st_mtime_ns),
+        )
+        self.connection.commit()
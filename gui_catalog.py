@@ -0,0 +1,95 @@
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, Qt, QTimer
+from PyQt5.QtWidgets import QLineEdit
+
+
+class CatalogListModel(QAbstractListModel):
+    """
+    List model over a song catalog that loads song names a page at a time as views scroll,
+    so opening a catalog of any size only reads its first page.
+    """
+
+    def __init__(self, catalog, page_size=256, parent=None):
+        """
+        Args:
+            catalog (SqliteCatalog or DictCatalog): The catalog to list.
+            page_size (int): Songs read per fetch.
+            parent (QObject): Parent object.
+        """
+        super().__init__(parent)
+        self.catalog = catalog
+        self.page_size = page_size
+        self.filter_text = ""
+        self.names = []
+        self.cursor = 0
+        self.exhausted = False
+        self.fetchMore(QModelIndex())
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.names)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if index.isValid() and role in (Qt.DisplayRole, Qt.EditRole):
+            return self.names[index.row()]
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.exhausted:
+            return
+        names, self.cursor = self.catalog.page(self.cursor, self.page_size, self.filter_text)
+        self.exhausted = len(names) < self.page_size
+        if names:
+            self.beginInsertRows(QModelIndex(), len(self.names), len(self.names) + len(names) - 1)
+            self.names.extend(names)
+            self.endInsertRows()
+
+    def set_filter(self, text):
+        """
+        Shows only the songs whose name contains `text`, ignoring case.
+
+        When the new text contains the previous one and every match is already loaded, the loaded
+        rows are narrowed in memory instead of querying the catalog again.
+
+        Args:
+            text (str): The filter text; empty shows every song.
+        """
+        if text == self.filter_text:
+            return
+        narrowing = self.exhausted and self.filter_text.casefold() in text.casefold()
+        self.beginResetModel()
+        if narrowing:
+            needle = text.casefold()
+            self.names = [name for name in self.names if needle in name.casefold()]
+        else:
+            self.names = []
+            self.cursor = 0
+            self.exhausted = False
+        self.filter_text = text
+        self.endResetModel()
+        if not narrowing:
+            self.fetchMore(QModelIndex())
+
+
+class CatalogFilter(QLineEdit):
+    """
+    Search field that filters a `CatalogListModel` as the user types, waiting for a short pause
+    in typing so a large catalog is not queried on every keystroke.
+    """
+
+    def __init__(self, model, delay_ms=150, parent=None):
+        """
+        Args:
+            model (CatalogListModel): The model to filter.
+            delay_ms (int): Typing pause before the filter is applied.
+            parent (QWidget): Parent widget.
+        """
+        super().__init__(parent)
+        self.model = model
+        self.setPlaceholderText("Filter songs by name")
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay_ms)
+        self.timer.timeout.connect(lambda: self.model.set_filter(self.text()))
+        self.textChanged.connect(self.timer.start)
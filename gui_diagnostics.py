@@ -0,0 +1,79 @@
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import (
+    QAbstractItemView, QCheckBox, QFileDialog, QHBoxLayout, QHeaderView, QLabel, QPushButton,
+    QTableWidget, QTableWidgetItem, QVBoxLayout, QWidget
+)
+
+import tracing
+
+
+class DiagnosticsPanel(QWidget):
+    """
+    Live view of the `tracing` histograms and counters: one row per span name with its count and
+    latency percentiles, then one row per counter. Refreshed on a timer from `tracing.snapshot`,
+    so the traced code never touches the GUI.
+    """
+    COLUMNS = ["Span / Counter", "Count", "Mean (ms)", "p50 (ms)", "p95 (ms)", "p99 (ms)", "Max (ms)"]
+
+    def __init__(self, parent=None, refresh_ms=1000):
+        """
+        Args:
+            parent (QWidget): Parent widget.
+            refresh_ms (int): Interval between refreshes of the table.
+        """
+        super().__init__(parent)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        controls = QHBoxLayout()
+        controls.addWidget(QLabel("Diagnostics:"))
+        self.enable_checkbox = QCheckBox("Tracing")
+        self.enable_checkbox.setChecked(tracing.is_enabled())
+        self.enable_checkbox.toggled.connect(tracing.enable)
+        controls.addWidget(self.enable_checkbox)
+        controls.addStretch()
+        reset_button = QPushButton("Reset")
+        reset_button.clicked.connect(self.reset)
+        controls.addWidget(reset_button)
+        export_button = QPushButton("Export Trace...")
+        export_button.clicked.connect(self.export_trace)
+        controls.addWidget(export_button)
+        layout.addLayout(controls)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionMode(QAbstractItemView.NoSelection)
+        layout.addWidget(self.table)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(refresh_ms)
+
+    def refresh(self):
+        """
+        Redraws the table from the current histograms and counters.
+        """
+        snapshot = tracing.snapshot()
+        rows = [[name, str(summary["count"])] + [f"{summary[field]:.3f}" for field in
+                                                 ("mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms")]
+                for name, summary in snapshot["histograms"].items()]
+        rows += [[name, str(value)] + [""] * 5 for name, value in snapshot["counters"].items()]
+        self.table.setRowCount(len(rows))
+        for row, cells in enumerate(rows):
+            for column, text in enumerate(cells):
+                self.table.setItem(row, column, QTableWidgetItem(text))
+
+    def reset(self):
+        tracing.reset()
+        self.refresh()
+
+    def export_trace(self):
+        """
+        Saves the recorded spans as a Chrome trace (open it in chrome://tracing or Perfetto).
+        """
+        filepath, _ = QFileDialog.getSaveFileName(self, "Export Trace", "trace.json", "Trace Files (*.json)")
+        if filepath:
+            tracing.write_trace(filepath)
@@ -0,0 +1,258 @@
+import os
+import time
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+from PyQt5.QtWidgets import (
+    QAbstractItemView, QHeaderView, QLabel, QProgressBar, QPushButton, QTableWidget,
+    QTableWidgetItem, QVBoxLayout, QWidget
+)
+
+
+class JobCancelled(Exception):
+    """
+    Raised inside a job's progress callback once the job has been cancelled.
+    """
+
+
+class JobSignals(QObject):
+    """
+    Signals a job emits from its worker thread; Qt delivers them on the GUI thread.
+    """
+    started = pyqtSignal(int)
+    progress = pyqtSignal(int, int, int)  # job id, completed, total
+    finished = pyqtSignal(int, object)  # job id, return value
+    failed = pyqtSignal(int, str)  # job id, error message
+    cancelled = pyqtSignal(int)
+
+
+class Job(QRunnable):
+    """
+    Runs a function on the thread pool, reporting progress and honouring cancellation.
+    """
+
+    def __init__(self, job_id, function, args, kwargs, with_progress):
+        """
+        Args:
+            job_id (int): Identifier used in the emitted signals.
+            function (callable): The work to run.
+            args (tuple): Positional arguments for `function`.
+            kwargs (dict): Keyword arguments for `function`.
+            with_progress (bool): Pass `progress=` to `function` as a callback accepting (completed, total, ...).
+        """
+        super().__init__()
+        self.setAutoDelete(False)  # The panel keeps the Python object alive until the job ends
+        self.job_id = job_id
+        self.function = function
+        self.args = args
+        self.kwargs = dict(kwargs)
+        self.signals = JobSignals()
+        self.is_cancelled = False
+        if with_progress:
+            self.kwargs["progress"] = self.report_progress
+
+    def report_progress(self, completed, total, *_):
+        """
+        Progress callback handed to the job's function; stops the job once it is cancelled.
+        """
+        if self.is_cancelled:
+            raise JobCancelled()
+        self.signals.progress.emit(self.job_id, completed, total)
+
+    def run(self):
+        if self.is_cancelled:
+            self.signals.cancelled.emit(self.job_id)
+            return
+        self.signals.started.emit(self.job_id)
+        try:
+            result = self.function(*self.args, **self.kwargs)
+        except JobCancelled:
+            self.signals.cancelled.emit(self.job_id)
+        except Exception as e:
+            self.signals.failed.emit(self.job_id, str(e))
+        else:
+            if self.is_cancelled:
+                self.signals.cancelled.emit(self.job_id)
+            else:
+                self.signals.finished.emit(self.job_id, result)
+
+
+class JobQueuePanel(QWidget):
+    """
+    Job queue shown in the main window: submits work to a QThreadPool and lists every job
+    with its status, progress, elapsed time and a cancel button.
+    """
+    COLUMNS = ["Job", "Status", "Progress", "Time", ""]
+
+    def __init__(self, parent=None, max_threads=None):
+        """
+        Args:
+            parent (QWidget): Parent widget.
+            max_threads (int): Jobs run at once; defaults to the number of CPU cores.
+        """
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads or os.cpu_count() or 1)
+        self.jobs = {}  # job id -> (Job, row, on_done, on_error) for unfinished jobs
+        self.started_at = {}
+        self.next_job_id = 0
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(QLabel("Jobs:"))
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionMode(QAbstractItemView.NoSelection)
+        layout.addWidget(self.table)
+
+        # Refreshes the elapsed time of running jobs
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.update_running_times)
+        self.timer.start(250)
+
+    def submit(self, name, function, *args, on_done=None, on_error=None, on_cancel=None, with_progress=False,
+               **kwargs):
+        """
+        Queues `function(*args, **kwargs)` on the thread pool.
+
+        Args:
+            name (str): Label shown in the job list.
+            function (callable): The work to run off the GUI thread.
+            on_done (callable): Called on the GUI thread with the return value.
+            on_error (callable): Called on the GUI thread with the error message.
+            on_cancel (callable): Called on the GUI thread, without arguments, once the job is cancelled.
+            with_progress (bool): Pass a `progress` callback to `function` (see `Job.report_progress`).
+
+        Returns:
+            int: The job id.
+        """
+        job_id = self.next_job_id
+        self.next_job_id += 1
+        job = Job(job_id, function, args, kwargs, with_progress)
+        job.signals.started.connect(self.on_started)
+        job.signals.progress.connect(self.on_progress)
+        job.signals.finished.connect(self.on_finished)
+        job.signals.failed.connect(self.on_failed)
+        job.signals.cancelled.connect(self.on_cancelled)
+
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        self.table.setItem(row, 0, QTableWidgetItem(name))
+        self.table.setItem(row, 1, QTableWidgetItem("Queued"))
+        progress_bar = QProgressBar()
+        progress_bar.setRange(0, 1)
+        progress_bar.setValue(0)
+        self.table.setCellWidget(row, 2, progress_bar)
+        self.table.setItem(row, 3, QTableWidgetItem(""))
+        cancel_button = QPushButton("Cancel")
+        cancel_button.clicked.connect(lambda: self.cancel(job_id))
+        self.table.setCellWidget(row, 4, cancel_button)
+        self.table.scrollToBottom()
+
+        self.jobs[job_id] = (job, row, on_done, on_error, on_cancel)
+        self.pool.start(job)
+        return job_id
+
+    def cancel(self, job_id):
+        """
+        Cancels a job. Queued jobs are dropped at once; running jobs stop at their next progress report.
+        """
+        if job_id not in self.jobs:
+            return
+        job = self.jobs[job_id][0]
+        job.is_cancelled = True
+        if self.pool.tryTake(job):
+            self.on_cancelled(job_id)
+        else:
+            self.set_status(job_id, "Cancelling")
+
+    def cancel_all(self):
+        """
+        Cancels every unfinished job, e.g. when the window closes.
+        """
+        for job_id in list(self.jobs):
+            self.cancel(job_id)
+
+    def is_active(self, job_id):
+        """
+        Returns whether a job is still queued or running.
+        """
+        return job_id in self.jobs
+
+    def active_count(self):
+        """
+        Returns the number of queued or running jobs.
+        """
+        return len(self.jobs)
+
+    def on_started(self, job_id):
+        if job_id not in self.jobs:
+            return
+        self.started_at[job_id] = time.perf_counter()
+        self.set_status(job_id, "Running")
+        self.table.cellWidget(self.jobs[job_id][1], 2).setRange(0, 0)  # Busy until the first progress report
+
+    def on_progress(self, job_id, completed, total):
+        if job_id in self.jobs:
+            progress_bar = self.table.cellWidget(self.jobs[job_id][1], 2)
+            progress_bar.setRange(0, max(total, 1))
+            progress_bar.setValue(completed)
+
+    def on_finished(self, job_id, result):
+        if job_id not in self.jobs:
+            return
+        on_done, on_error = self.jobs[job_id][2:4]
+        try:
+            if on_done:
+                on_done(result)
+        except Exception as e:  # e.g. the mixer refusing the render; an escaping exception would abort Qt
+            self.finish(job_id, f"Failed: {e}")
+            if on_error:
+                on_error(str(e))
+            return
+        self.finish(job_id, "Done")
+
+    def on_failed(self, job_id, error):
+        on_error = self.jobs[job_id][3] if job_id in self.jobs else None
+        self.finish(job_id, f"Failed: {error}")
+        if on_error:
+            on_error(error)
+
+    def on_cancelled(self, job_id):
+        on_cancel = self.jobs[job_id][4] if job_id in self.jobs else None
+        self.finish(job_id, "Cancelled")
+        if on_cancel:
+            on_cancel()
+
+    def finish(self, job_id, status):
+        """
+        Records a job's final status and timing and releases it.
+        """
+        if job_id not in self.jobs:
+            return
+        row = self.jobs[job_id][1]
+        self.set_status(job_id, status)
+        progress_bar = self.table.cellWidget(row, 2)
+        if status == "Done":
+            progress_bar.setRange(0, 1)
+            progress_bar.setValue(1)
+        elif progress_bar.maximum() == 0:
+            progress_bar.setRange(0, 1)  # Stop the busy indicator
+        self.update_time(job_id)
+        self.table.cellWidget(row, 4).setEnabled(False)
+        del self.jobs[job_id]
+        self.started_at.pop(job_id, None)
+
+    def set_status(self, job_id, status):
+        self.table.item(self.jobs[job_id][1], 1).setText(status)
+
+    def update_time(self, job_id):
+        if job_id in self.started_at:
+            elapsed = time.perf_counter() - self.started_at[job_id]
+            self.table.item(self.jobs[job_id][1], 3).setText(f"{elapsed:.2f}s")
+
+    def update_running_times(self):
+        for job_id in list(self.started_at):
+            self.update_time(job_id)
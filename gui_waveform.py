@@ -0,0 +1,86 @@
+import numpy as np
+import pyqtgraph as pg
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QVBoxLayout, QWidget
+
+
+class WaveformView(QWidget):
+    """
+    Zoomable waveform of a `PeakPyramid`. Every pan or zoom redraws only the visible range from
+    the pyramid level that matches the view width, and the playhead is a line moved from a
+    position callback, so playback never re-reads the samples.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pyramid = None
+        self.position = None
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.plot = pg.PlotWidget(background="#1a1a1a")
+        self.plot.setMouseEnabled(x=True, y=False)
+        self.plot.setYRange(-1.0, 1.0)
+        self.plot.hideAxis("left")
+        self.plot.setLabel("bottom", "Time", units="s")
+        layout.addWidget(self.plot)
+
+        # Envelope drawn as one vertical min-max segment per point
+        self.curve = pg.PlotDataItem(pen=pg.mkPen("#00ff00"), connect="pairs")
+        self.plot.addItem(self.curve)
+        self.playhead = pg.InfiniteLine(pos=0.0, angle=90, pen=pg.mkPen("#ff00ff", width=2))
+        self.plot.addItem(self.playhead)
+        self.plot.getViewBox().sigXRangeChanged.connect(self.redraw)
+
+        # Moves the playhead while audio plays
+        self.timer = QTimer(self)
+        self.timer.setInterval(30)
+        self.timer.timeout.connect(self.update_playhead)
+
+    def set_pyramid(self, pyramid):
+        """
+        Shows a recording, zoomed out to its full length.
+
+        Args:
+            pyramid (PeakPyramid): Peaks of the recording.
+        """
+        self.pyramid = pyramid
+        duration = pyramid.wav.duration
+        self.plot.getViewBox().setLimits(xMin=0.0, xMax=max(duration, 1e-3))
+        self.plot.setXRange(0.0, max(duration, 1e-3), padding=0)
+        self.playhead.setValue(0.0)
+        self.redraw()
+
+    def redraw(self):
+        if self.pyramid is None:
+            return
+        sample_rate = self.pyramid.wav.sample_rate
+        left, right = self.plot.getViewBox().viewRange()[0]
+        width = max(int(self.plot.getViewBox().width()), 1)
+        positions, mins, maxs = self.pyramid.peaks(left * sample_rate, right * sample_rate + 1, width)
+        x = np.repeat(positions / sample_rate, 2)
+        y = np.empty(len(x), dtype=np.float32)
+        y[0::2] = mins
+        y[1::2] = maxs
+        self.curve.setData(x, y)
+
+    def start_playhead(self, position):
+        """
+        Follows playback with the playhead.
+
+        Args:
+            position (callable): Returns the playback position in seconds, or None once playback has stopped.
+        """
+        self.position = position
+        self.timer.start()
+
+    def stop_playhead(self):
+        self.timer.stop()
+        self.position = None
+
+    def update_playhead(self):
+        seconds = self.position() if self.position else None
+        if seconds is None:
+            self.stop_playhead()
+            return
+        self.playhead.setValue(seconds)
@@ -3,16 +3,31 @@ import os
 import pygame
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QPushButton, QLabel, QFileDialog,
-    QVBoxLayout, QWidget, QComboBox, QFrame, QStatusBar
+    QVBoxLayout, QHBoxLayout, QWidget, QComboBox, QFrame, QStatusBar, QLineEdit, QCheckBox, QSpinBox
 )
 from PyQt5.QtGui import QFont
 from PyQt5.QtCore import Qt
-from chord_generation import generate_random_chords, create_midi, keys_and_chords
-from audio_conversion import convert_mp3_to_wav, convert_wav_to_mp3
-from popular_songs import popular_songs, create_song_midi
+from chord_generation import generate_random_chords, render_midi, keys_and_chords
+from audio_conversion import convert_mp3_to_wav, convert_wav_to_mp3, incremental_convert
+from popular_songs import popular_songs
+from progression_index import ProgressionIndex, roman_numerals
+from song_catalog import open_catalog, split_chords
+from render_cache import RenderCache, default_cache_dir
+from gui_jobs import JobQueuePanel
+from gui_catalog import CatalogFilter, CatalogListModel
+from gui_waveform import WaveformView
+import numpy as np
+from synth import render_pcm, render_wav
+from playback import PlaybackEngine
+from waveform import PeakPyramid
+from markov_generation import generate_markov_chords, load_or_train
+from gui_diagnostics import DiagnosticsPanel
+import tracing
 
 
 class MusicProductionAssistant(QMainWindow):
+    SEARCH_RESULTS_SHOWN = 10  # Song names listed for a progression search
+
     def __init__(self):
         """
         Initializes the Music Production Assistant application.
@@ -23,7 +38,13 @@ class MusicProductionAssistant(QMainWindow):
 
         # Initialize variables
         self.generated_progression = []  # Stores the generated chord progression
-        self.midi_path = None  # Path to the generated or loaded MIDI file
+        self.playback = PlaybackEngine()  # Keeps the mixer open between plays; queues and loops progressions
+        self.render_cache = RenderCache(default_cache_dir())  # Reuses renders across plays, downloads and runs
+        self.catalog = open_catalog(fallback=popular_songs)  # Imported catalog if there is one, else the built-in songs
+        self.song_index = None  # Progression search index, built as a job on the first search
+        self.index_job = None
+        self.markov_model = None  # Trained progression model, loaded on the first trained generation
+        self.tempo_job = None  # Re-render of the queue after a tempo change, superseded by the next change
 
         # Setup the user interface
         self.initUI()
@@ -48,12 +69,12 @@ class MusicProductionAssistant(QMainWindow):
             QPushButton:hover {
                 background-color: #3a3a3a;
             }
-            QLabel {
+            QLabel, QCheckBox {
                 color: #00ff00;
                 font-family: 'Courier New', monospace;
                 font-size: 16px;
             }
-            QComboBox {
+            QComboBox, QLineEdit, QSpinBox {
                 background-color: #2e2e2e;
                 color: #00ff00;
                 border: 2px solid #00ff00;
@@ -91,23 +112,57 @@ class MusicProductionAssistant(QMainWindow):
         self.generate_button = QPushButton("Generate Progression")
         self.generate_button.clicked.connect(self.generate_progression)  # Connect to generation method
         main_layout.addWidget(self.generate_button)
+        self.markov_checkbox = QCheckBox("Trained (Markov)")  # Draw from a model of the catalog's songs
+        main_layout.addWidget(self.markov_checkbox)
 
         self.play_button = QPushButton("Play Progression")
         self.play_button.clicked.connect(self.play_generated_progression)  # Connect to playback method
         main_layout.addWidget(self.play_button)
 
+        # Playback controls: gapless queueing, looping and tempo of everything played
+        playback_layout = QHBoxLayout()
+        self.queue_button = QPushButton("Queue Progression")
+        self.queue_button.clicked.connect(self.queue_generated_progression)
+        playback_layout.addWidget(self.queue_button)
+        self.stop_button = QPushButton("Stop")
+        self.stop_button.clicked.connect(self.playback.stop)
+        playback_layout.addWidget(self.stop_button)
+        self.loop_checkbox = QCheckBox("Loop")
+        self.loop_checkbox.toggled.connect(self.playback.set_loop)
+        playback_layout.addWidget(self.loop_checkbox)
+        playback_layout.addWidget(QLabel("Tempo:"))
+        self.tempo_selector = QSpinBox()
+        self.tempo_selector.setRange(40, 240)
+        self.tempo_selector.setValue(120)
+        self.tempo_selector.setSuffix(" BPM")
+        self.tempo_selector.valueChanged.connect(self.set_playback_tempo)
+        playback_layout.addWidget(self.tempo_selector)
+        main_layout.addLayout(playback_layout)
+
         self.download_button = QPushButton("Download MIDI")
         self.download_button.clicked.connect(self.download_generated_progression)  # Connect to download method
         main_layout.addWidget(self.download_button)
 
+        self.download_wav_button = QPushButton("Download WAV")
+        self.download_wav_button.clicked.connect(
+            lambda: self.export_wav(self.generated_progression, "random_progression.wav"))
+        main_layout.addWidget(self.download_wav_button)
+
         # Section: Popular Songs
         song_frame = QFrame()
         song_layout = QVBoxLayout(song_frame)
         song_label = QLabel("Select a Popular Song:")
+        self.catalog_model = CatalogListModel(self.catalog)  # Loads song names page by page as the list scrolls
         self.song_selector = QComboBox()
-        self.song_selector.addItems(popular_songs.keys())  # Populate with popular songs
+        self.song_selector.setModel(self.catalog_model)
+        self.song_filter = CatalogFilter(self.catalog_model)
         song_layout.addWidget(song_label)
+        song_layout.addWidget(self.song_filter)
         song_layout.addWidget(self.song_selector)
+        self.song_search = QLineEdit()
+        self.song_search.setPlaceholderText("Find songs using a progression in any key, e.g. C G Am F")
+        self.song_search.returnPressed.connect(self.search_songs)
+        song_layout.addWidget(self.song_search)
         main_layout.addWidget(song_frame)
 
         self.play_song_button = QPushButton("Play Song Progression")
@@ -118,6 +173,11 @@ class MusicProductionAssistant(QMainWindow):
         self.download_song_button.clicked.connect(self.download_song_midi)
         main_layout.addWidget(self.download_song_button)
 
+        self.download_song_wav_button = QPushButton("Download Song WAV")
+        self.download_song_wav_button.clicked.connect(
+            lambda: self.export_wav(self.catalog.chords(self.song_selector.currentText()), "song_progression.wav"))
+        main_layout.addWidget(self.download_song_wav_button)
+
         # Section: Audio Conversion
         conversion_frame = QFrame()
         conversion_layout = QVBoxLayout(conversion_frame)
@@ -132,31 +192,97 @@ class MusicProductionAssistant(QMainWindow):
         self.convert_wav_button = QPushButton("Convert WAV to MP3")
         self.convert_wav_button.clicked.connect(self.convert_wav_to_mp3_file)
         conversion_layout.addWidget(self.convert_wav_button)
+
+        self.batch_mp3_button = QPushButton("Batch Convert Folder: MP3 to WAV")
+        self.batch_mp3_button.clicked.connect(lambda: self.batch_convert_folder("mp3", "wav"))
+        conversion_layout.addWidget(self.batch_mp3_button)
+
+        self.batch_wav_button = QPushButton("Batch Convert Folder: WAV to MP3")
+        self.batch_wav_button.clicked.connect(lambda: self.batch_convert_folder("wav", "mp3"))
+        conversion_layout.addWidget(self.batch_wav_button)
+
+        # Batches skip files converted before unless this is ticked
+        self.force_batch_checkbox = QCheckBox("Re-convert unchanged files")
+        conversion_layout.addWidget(self.force_batch_checkbox)
         main_layout.addWidget(conversion_frame)
 
+        # Section: Waveform Visualizer
+        self.visualize_button = QPushButton("Visualize and Play Audio")
+        self.visualize_button.clicked.connect(self.visualize_audio)
+        main_layout.addWidget(self.visualize_button)
+
+        self.waveform_view = WaveformView()
+        self.waveform_view.setMinimumHeight(150)
+        main_layout.addWidget(self.waveform_view)
+
         # Result Label
         self.result_label = QLabel("")
         self.result_label.setAlignment(Qt.AlignCenter)
         self.result_label.setStyleSheet("font-size: 14px; color: #00ff00; margin: 10px 0;")
         main_layout.addWidget(self.result_label)
 
+        # Job Queue: conversions and renders run here, off the GUI thread
+        self.job_panel = JobQueuePanel()
+        main_layout.addWidget(self.job_panel)
+
+        # Diagnostics: span latencies and counters, shown when started with --trace or MPA_TRACE set
+        self.diagnostics_panel = None
+        if tracing.is_enabled():
+            self.diagnostics_panel = DiagnosticsPanel()
+            main_layout.addWidget(self.diagnostics_panel)
+
         # Status Bar
         self.status_bar = QStatusBar()
         self.setStatusBar(self.status_bar)
 
     def generate_progression(self):
         """
-        Generates a random chord progression based on the selected key.
+        Generates a chord progression based on the selected key, uniformly at random or, when
+        "Trained (Markov)" is checked, from a Markov model of the catalog's songs.
         Updates the result label with the generated progression.
         """
         key = self.key_selector.currentText()  # Get the selected key
-        self.generated_progression = generate_random_chords(key)  # Generate chords for the key
+        if self.markov_checkbox.isChecked() and self.markov_model is None:
+            self.train_markov_model()
+            return
+        with tracing.span("gui.generate_progression", key=key):
+            if self.markov_checkbox.isChecked():
+                self.generated_progression = generate_markov_chords(key, model=self.markov_model)
+            else:
+                self.generated_progression = generate_random_chords(key)  # Generate chords for the key
         self.result_label.setText(f"Generated Progression: {' -> '.join(self.generated_progression)}")
         self.status_bar.showMessage("Chord progression generated.", 3000)
 
+    def train_markov_model(self):
+        """
+        Loads or trains the Markov model of the catalog as a background job, with Generate disabled
+        until it is ready, then generates a progression from it.
+        """
+        self.generate_button.setEnabled(False)
+        self.result_label.setText("Training on the song catalog...")
+
+        def train():
+            catalog = self.catalog.reopened()
+            try:
+                return load_or_train(catalog)  # Cached on disk after the first training
+            finally:
+                catalog.close()
+
+        def done(model):
+            self.markov_model = model
+            self.generate_button.setEnabled(True)
+            self.generate_progression()
+
+        def stopped(error=None):
+            self.generate_button.setEnabled(True)
+            if error:
+                self.show_job_error(error)
+
+        self.job_panel.submit("Train progression model", train, on_done=done, on_error=stopped, on_cancel=stopped)
+
     def play_generated_progression(self):
         """
-        Creates and plays the MIDI file for the generated chord progression.
+        Synthesizes and plays the generated chord progression.
         Updates the result label to indicate playback.
         """
         if not self.generated_progression:
@@ -164,28 +290,168 @@ class MusicProductionAssistant(QMainWindow):
             self.status_bar.showMessage("No progression to play.", 3000)
             return
 
-        self.midi_path = create_midi(self.generated_progression)  # Create MIDI file from progression
-        pygame.mixer.init()
-        pygame.mixer.music.load(self.midi_path)  # Load the MIDI file for playback
-        pygame.mixer.music.play()
+        self.play_chords(self.generated_progression)
         self.result_label.setText("Playing Generated Progression")
         self.status_bar.showMessage("Playing chord progression.", 3000)
 
+    def play_chords(self, chords):
+        """
+        Plays a chord progression through the playback engine, replacing whatever is playing.
+        No system MIDI synth is needed.
+        """
+        def play(pcm):
+            if pygame.mixer.get_init():
+                pygame.mixer.music.stop()  # Streamed audio from the waveform view
+            self.waveform_view.stop_playhead()
+            self.playback.play_pcm(pcm, chords)
+
+        self.render_progression(f"Render: {' '.join(chords)}", chords, play)
+
+    def queue_generated_progression(self):
+        """
+        Queues the generated progression to follow the one playing, without a gap.
+        """
+        if not self.generated_progression:
+            self.result_label.setText("No progression generated!")
+            return
+        chords = list(self.generated_progression)
+        self.render_progression(f"Render: {' '.join(chords)}", chords,
+                                lambda pcm: self.playback.enqueue_pcm(pcm, chords))
+        self.result_label.setText(f"Queued: {' -> '.join(chords)}")
+
+    def render_progression(self, name, chords, on_done):
+        """
+        Renders a progression for the playback engine as a background job, through the render
+        cache, and calls `on_done` with the samples on the GUI thread.
+        """
+        params = self.playback.render_params()
+
+        def done(data):
+            on_done(np.frombuffer(data, dtype="<i2"))
+            if self.playback.render_params() != params:
+                self.set_playback_tempo(self.playback.tempo)  # The tempo moved while rendering
+
+        self.job_panel.submit(name, self.render_cache.get_or_render, "pcm", chords, render_pcm,
+                              on_done=done, on_error=self.show_job_error, **params)
+
+    def save_render(self, save_path, kind, chords, render, message):
+        """
+        Renders a progression through the render cache and writes it to `save_path` as a background
+        job, then shows `message` in the status bar. It is rendered with the same parameters as
+        playback, so the saved file sounds like what was heard.
+        """
+        params = self.playback.render_params()
+        if kind == "midi":
+            del params["sample_rate"]  # MIDI has no sample rate
+
+        def write():
+            with open(save_path, "wb") as output_file:  # The only point the progression touches the disk
+                output_file.write(self.render_cache.get_or_render(kind, chords, render, **params))
+            return save_path
+
+        def done(path):
+            self.result_label.setText(f"{kind.upper()} saved as: {path}")
+            self.status_bar.showMessage(message, 3000)
+
+        self.job_panel.submit(f"Save {kind.upper()}: {os.path.basename(save_path)}", write,
+                              on_done=done, on_error=self.show_job_error)
+
+    def set_playback_tempo(self, tempo):
+        """
+        Changes the tempo of the progressions playing and queued. They are re-rendered through the
+        render cache as a background job and swapped in when it finishes; a job still waiting from an
+        earlier change is dropped, and one already running is ignored once the tempo has moved on.
+        """
+        tracks = self.playback.change_tempo(tempo)
+        if self.tempo_job is not None:
+            self.job_panel.cancel(self.tempo_job)
+            self.tempo_job = None
+        if not tracks:
+            return
+        renders = [(track, track.chords, self.playback.render_params(**track.params)) for track in tracks]
+        params = self.playback.render_params()
+
+        def render():
+            return [(track, self.render_cache.get_or_render("pcm", chords, render_pcm, **render_params))
+                    for track, chords, render_params in renders]
+
+        def done(rendered):
+            if self.playback.render_params() != params:
+                return  # A later change re-renders them again
+            for track, data in rendered:
+                self.playback.replace_pcm(track, np.frombuffer(data, dtype="<i2"))
+
+        self.tempo_job = self.job_panel.submit(f"Re-render at {tempo} BPM", render, on_done=done,
+                                               on_error=self.show_job_error)
+
+    def visualize_audio(self):
+        """
+        Loads a WAV file into the waveform view and plays it with a moving playhead.
+        The peak pyramid is built (or read from its sidecar file) as a background job.
+        """
+        filepath, _ = QFileDialog.getOpenFileName(self, "Select WAV File", "", "Audio Files (*.wav)")
+        if not filepath:
+            return
+
+        def show(pyramid):
+            self.waveform_view.set_pyramid(pyramid)
+            self.play_audio_file(filepath)
+            self.result_label.setText(f"Playing: {os.path.basename(filepath)}")
+            self.status_bar.showMessage("Audio loaded.", 3000)
+
+        self.job_panel.submit(f"Load waveform: {os.path.basename(filepath)}", PeakPyramid.load, filepath,
+                              on_done=show, on_error=self.show_job_error)
+
+    def play_audio_file(self, filepath):
+        """
+        Streams an audio file from disk through the mixer and follows it with the waveform playhead.
+        """
+        if not pygame.mixer.get_init():
+            with tracing.span("pygame.mixer.init"):
+                pygame.mixer.init()
+        self.playback.stop()
+        with tracing.span("pygame.mixer.load", file=os.path.basename(filepath)):
+            pygame.mixer.music.load(filepath)
+        pygame.mixer.music.play()
+        self.waveform_view.start_playhead(self.music_position)
+
+    def music_position(self):
+        """
+        Returns the position of the streamed audio in seconds, or None once it has stopped.
+        """
+        if not pygame.mixer.get_init() or not pygame.mixer.music.get_busy():
+            return None
+        return pygame.mixer.music.get_pos() / 1000.0
+
+    def export_wav(self, chords, default_name):
+        """
+        Saves a chord progression as a synthesized WAV file.
+        """
+        if not chords:
+            self.result_label.setText("No progression available to download!")
+            self.status_bar.showMessage("No progression to export.", 3000)
+            return
+
+        save_path, _ = QFileDialog.getSaveFileName(self, "Save WAV File", default_name, "WAV Files (*.wav)")
+        if save_path:
+            self.save_render(save_path, "wav", list(chords), render_wav, "WAV file saved.")
+        else:
+            self.result_label.setText("WAV download canceled.")
+            self.status_bar.showMessage("WAV download canceled.", 3000)
+
     def download_generated_progression(self):
         """
         Allows the user to save the generated chord progression as a MIDI file.
         Updates the result label with the save status.
         """
-        if not self.midi_path or not os.path.exists(self.midi_path):
+        if not self.generated_progression:
             self.result_label.setText("No progression available to download!")
             self.status_bar.showMessage("No MIDI file available to download.", 3000)
             return
 
-        save_path, _ = QFileDialog.getSaveFileName(self, "Save MIDI File", self.midi_path, "MIDI Files (*.mid)")
+        save_path, _ = QFileDialog.getSaveFileName(self, "Save MIDI File", "random_progression.mid", "MIDI Files (*.mid)")
         if save_path:
-            os.rename(self.midi_path, save_path)  # Move the MIDI file to the specified location
-            self.result_label.setText(f"MIDI saved as: {save_path}")
-            self.status_bar.showMessage("MIDI file saved.", 3000)
+            self.save_render(save_path, "midi", list(self.generated_progression), render_midi, "MIDI file saved.")
         else:
             self.result_label.setText("MIDI download canceled.")
             self.status_bar.showMessage("MIDI download canceled.", 3000)
@@ -195,28 +461,78 @@ class MusicProductionAssistant(QMainWindow):
         Plays the chord progression for the selected popular song.
         """
         song_name = self.song_selector.currentText()  # Get the selected song name
-        chords = popular_songs[song_name]  # Get the chord progression for the song
-        self.midi_path = create_song_midi(song_name, chords)  # Create the MIDI file
-        pygame.mixer.init()
-        pygame.mixer.music.load(self.midi_path)
-        pygame.mixer.music.play()
+        chords = self.catalog.chords(song_name)  # Get the chord progression for the song
+        if not chords:
+            self.result_label.setText("No song selected!")
+            return
+
+        self.play_chords(chords)
         self.result_label.setText(f"Playing: {song_name}")
         self.status_bar.showMessage(f"Playing {song_name} chord progression.", 3000)
 
+    def search_songs(self):
+        """
+        Lists the songs that use the progression typed in the search box, in any key,
+        and selects the first match.
+        """
+        if self.song_index is None:
+            self.build_song_index()
+            return
+        chords = split_chords(self.song_search.text())
+        try:
+            matches = self.song_index.search(chords, limit=self.SEARCH_RESULTS_SHOWN + 1)
+        except ValueError as e:
+            self.result_label.setText(str(e))
+            return
+        numerals = " ".join(roman_numerals(chords))
+        if not matches:
+            self.result_label.setText(f"No songs use {numerals}")
+            return
+        if self.song_selector.findText(matches[0]) < 0:
+            self.song_filter.setText(matches[0])  # Not loaded yet, so narrow the list down to it
+            self.catalog_model.set_filter(matches[0])
+        self.song_selector.setCurrentText(matches[0])
+        shown = ", ".join(matches[:self.SEARCH_RESULTS_SHOWN])
+        more = ", ..." if len(matches) > self.SEARCH_RESULTS_SHOWN else ""
+        self.result_label.setText(f"Songs using {numerals}: {shown}{more}")
+
+    def build_song_index(self):
+        """
+        Builds the progression search index as a background job, then runs the search in the box.
+        """
+        self.result_label.setText("Indexing the song catalog...")
+        if self.index_job is not None and self.job_panel.is_active(self.index_job):
+            return  # Already building; the search runs with whatever the box holds when it is done
+
+        def build(progress):
+            catalog = self.catalog.reopened()
+            try:
+                return ProgressionIndex.from_catalog(catalog, progress=progress)
+            finally:
+                catalog.close()
+
+        def done(index):
+            self.song_index = index
+            self.search_songs()
+
+        self.index_job = self.job_panel.submit("Index song catalog", build, on_done=done,
+                                               on_error=self.show_job_error, with_progress=True)
+
     def download_song_midi(self):
         """
         Allows the user to save the MIDI file for the selected popular song.
         """
-        if not self.midi_path or not os.path.exists(self.midi_path):
+        song_name = self.song_selector.currentText()
+        if song_name not in self.catalog:
             self.result_label.setText("No song progression available to download!")
             self.status_bar.showMessage("No MIDI file available to download.", 3000)
             return
 
-        save_path, _ = QFileDialog.getSaveFileName(self, "Save MIDI File", self.midi_path, "MIDI Files (*.mid)")
+        save_path, _ = QFileDialog.getSaveFileName(self, "Save MIDI File", "song_progression.mid", "MIDI Files (*.mid)")
         if save_path:
-            os.rename(self.midi_path, save_path)  # Move the MIDI file to the specified location
-            self.result_label.setText(f"MIDI saved as: {save_path}")
-            self.status_bar.showMessage(f"MIDI file saved for {self.song_selector.currentText()}.", 3000)
+            # The catalog is read here, since a SQLite catalog's connection belongs to the GUI thread
+            self.save_render(save_path, "midi", self.catalog.chords(song_name), render_midi,
+                             f"MIDI file saved for {song_name}.")
         else:
             self.result_label.setText("MIDI download canceled.")
             self.status_bar.showMessage("MIDI download canceled.", 3000)
@@ -228,9 +544,14 @@ class MusicProductionAssistant(QMainWindow):
         file_dialog = QFileDialog.getOpenFileName(self, "Select MP3 File", "", "Audio Files (*.mp3)")
         if file_dialog[0]:
             filepath = file_dialog[0]
-            result = convert_mp3_to_wav(filepath)  # Call the audio conversion function
-            self.result_label.setText(result)
-            self.status_bar.showMessage("MP3 converted to WAV.", 3000)
+
+            def done(result):
+                self.result_label.setText(result)
+                self.status_bar.showMessage("MP3 converted to WAV.", 3000)
+
+            # Run the audio conversion on the job pool so the window stays responsive
+            self.job_panel.submit(f"MP3 to WAV: {os.path.basename(filepath)}", convert_mp3_to_wav, filepath,
+                                  on_done=done, on_error=self.show_job_error)
 
     def convert_wav_to_mp3_file(self):
         """
@@ -239,22 +560,65 @@ class MusicProductionAssistant(QMainWindow):
         file_dialog = QFileDialog.getOpenFileName(self, "Select WAV File", "", "Audio Files (*.wav)")
         if file_dialog[0]:
             filepath = file_dialog[0]
-            result = convert_wav_to_mp3(filepath)  # Call the audio conversion function
-            self.result_label.setText(result)
-            self.status_bar.showMessage("WAV converted to MP3.", 3000)
+
+            def done(result):
+                self.result_label.setText(result)
+                self.status_bar.showMessage("WAV converted to MP3.", 3000)
+
+            # Run the audio conversion on the job pool so the window stays responsive
+            self.job_panel.submit(f"WAV to MP3: {os.path.basename(filepath)}", convert_wav_to_mp3, filepath,
+                                  on_done=done, on_error=self.show_job_error)
+
+    def batch_convert_folder(self, source_format, target_format):
+        """
+        Converts every file of the source format in a chosen folder and reports per-file errors.
+        Files unchanged since an earlier batch converted them are skipped, unless
+        "Re-convert unchanged files" is ticked.
+        """
+        folder = QFileDialog.getExistingDirectory(self, f"Select Folder of {source_format.upper()} Files")
+        if not folder:
+            return
+
+        def done(results):
+            failed = [result for result in results if not result.success]
+            skipped = sum(result.skipped for result in results)
+            summary = f"Converted {len(results) - len(failed) - skipped} of {len(results)} files to " \
+                      f"{target_format.upper()} ({skipped} unchanged)."
+            if failed:
+                summary += "\nFailed:\n" + "\n".join(f"{os.path.basename(r.source)}: {r.error}" for r in failed)
+            self.result_label.setText(summary)
+            self.status_bar.showMessage("Batch conversion finished.", 3000)
+
+        # Progress is reported per file in the job list, which can also cancel the remaining files
+        self.job_panel.submit(
+            f"Batch {source_format.upper()} to {target_format.upper()}: {os.path.basename(folder)}",
+            incremental_convert, folder, source_format, target_format, force=self.force_batch_checkbox.isChecked(),
+            on_done=done, on_error=self.show_job_error, with_progress=True,
+        )
+
+    def show_job_error(self, error):
+        """
+        Reports a failed background job in the result label.
+        """
+        self.result_label.setText(f"Job failed: {error}")
+        self.status_bar.showMessage("A background job failed.", 3000)
 
     def closeEvent(self, event):
         """
-        Cleans up temporary files and quits pygame when the application is closed.
+        Stops background jobs and quits pygame when the application is closed.
         """
-        if self.midi_path and os.path.exists(self.midi_path):  # Remove temporary MIDI file if it exists
-            os.remove(self.midi_path)
+        self.job_panel.cancel_all()
+        self.job_panel.pool.waitForDone()  # Conversions already running finish their current file
+        self.playback.close()
         if pygame.mixer.get_init():  # Quit pygame mixer
             pygame.mixer.quit()
         event.accept()
 
 
 if __name__ == "__main__":
+    if "--trace" in sys.argv:  # Shows the diagnostics panel; set MPA_TRACE=trace.json to also save a trace on exit
+        sys.argv.remove("--trace")
+        tracing.enable()
     app = QApplication(sys.argv)
     window = MusicProductionAssistant()
     window.show()
@@ -0,0 +1,378 @@
+import hashlib
+import os
+
+import numpy as np
+
+from bulk_generation import CHUNK_ROWS, DEGREES, key_names
+from chord_generation import keys_and_chords
+from chord_theory import parse_chord
+import tracing
+
+# Context symbol for "before the first chord", so the model also learns how songs open
+START = DEGREES
+
+# Digits per context position: the seven degrees plus START
+CONTEXT_BASE = DEGREES + 1
+
+# Models are trained separately for major and minor keys
+MODES = ("Major", "Minor")
+
+# Buckets per row of the guide table that starts each draw close to its answer
+GUIDE_BUCKETS = 64
+
+# Bumped whenever the saved layout changes, so stale model files are retrained
+MODEL_VERSION = 1
+
+
+def default_model_path(source_key=""):
+    """
+    Returns the per-user location of the trained model cache.
+
+    Args:
+        source_key (str): Identifies the training source, so each source has its own cache file.
+
+    Returns:
+        str: `$XDG_CACHE_HOME/music_production_assistant/markov_model-<hash of source_key>.npz`,
+        falling back to `~/.cache`.
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    digest = hashlib.sha256(source_key.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(base, "music_production_assistant", f"markov_model-{digest}.npz")
+
+
+def key_mode(key):
+    """
+    Returns the index into `MODES` of a key name such as "A Minor".
+    """
+    return MODES.index(key.split()[-1])
+
+
+def triad(symbol):
+    """
+    Reduces a chord symbol to its pitch class and triad type, so that e.g. "Am7" counts as the vi of C Major.
+
+    Args:
+        symbol (str): The chord symbol.
+
+    Returns:
+        tuple: (pitch class 0-11, "" for major, "m" for minor or "dim" for diminished).
+
+    Raises:
+        ValueError: If the symbol is invalid.
+    """
+    chord = parse_chord(symbol)
+    if 3 in chord.intervals:
+        return chord.root % 12, "dim" if 6 in chord.intervals else "m"
+    return chord.root % 12, ""
+
+
+def _degree_table(symbols):
+    """
+    Returns the degree of every symbol in every key: an int8 array of shape (symbols, keys), -1 if not diatonic.
+    """
+    key_triads = [{triad(chord): degree for degree, chord in enumerate(keys_and_chords[key])} for key in key_names]
+    table = np.full((len(symbols), len(key_names)), -1, dtype=np.int8)
+    for row, symbol in enumerate(symbols):
+        features = triad(symbol)
+        for column, degrees in enumerate(key_triads):
+            table[row, column] = degrees.get(features, -1)
+    return table
+
+
+class MarkovModel:
+    """
+    Order-n Markov model over key-relative chord degrees, stored as CSR arrays.
+
+    Row r of the CSR arrays holds the possible next degrees of one context, and `cumulative`
+    holds their cumulative probabilities offset by r, so the values of row r lie in (r, r + 1].
+    `context_rows` maps every context (the last `order` degrees, unseen ones backed off to
+    their longest seen suffix) straight to its row, and `guide` maps each of `GUIDE_BUCKETS`
+    equal slices of a row to its first entry, so a draw costs O(1): two table lookups and
+    usually a single comparison. Batches of draws are vectorized over all rows at once.
+    """
+
+    def __init__(self, order, context_rows, indptr, next_degrees, cumulative):
+        """
+        Args:
+            order (int): Number of previous chords each draw depends on.
+            context_rows (numpy.ndarray): int32 array of shape (len(MODES), CONTEXT_BASE ** order).
+            indptr (numpy.ndarray): CSR row pointers.
+            next_degrees (numpy.ndarray): uint8 degree of each CSR entry.
+            cumulative (numpy.ndarray): float64 cumulative probabilities, offset by row.
+        """
+        self.order = order
+        self.context_rows = context_rows
+        self.indptr = indptr
+        self.next_degrees = next_degrees
+        self.cumulative = cumulative
+        # First entry of each row whose cumulative probability exceeds the start of each bucket
+        bucket_starts = np.arange(len(indptr) - 1)[:, None] + np.arange(GUIDE_BUCKETS) / GUIDE_BUCKETS
+        self.guide = np.searchsorted(cumulative, bucket_starts, side="right").astype(np.int32)
+
+    @classmethod
+    def train(cls, degrees, offsets, modes, order=2):
+        """
+        Counts degree n-grams of songs already mapped to their keys.
+
+        Args:
+            degrees (numpy.ndarray): Degree (0-6) of every chord of every song, concatenated.
+            offsets (numpy.ndarray): Start of each song in `degrees`, plus the total length at the end.
+            modes (numpy.ndarray): Index into `MODES` of each song's key.
+            order (int): Number of previous chords each draw depends on.
+
+        Returns:
+            MarkovModel: The trained model.
+        """
+        degrees = np.asarray(degrees, dtype=np.int64)
+        offsets = np.asarray(offsets, dtype=np.int64)
+        lengths = np.diff(offsets)
+        chord_modes = np.repeat(np.asarray(modes, dtype=np.int64), lengths)
+        position_in_song = np.arange(len(degrees)) - np.repeat(offsets[:-1], lengths)
+
+        # Full-order context of every chord: digit i is the degree i + 1 chords back, START before the song
+        contexts = np.zeros(len(degrees), dtype=np.int64)
+        for back in range(1, order + 1):
+            previous = np.where(position_in_song >= back, np.roll(degrees, back), START)
+            contexts += previous * CONTEXT_BASE ** (back - 1)
+
+        # Count every suffix length 0..order; suffixes of length L get ids after those of shorter lengths
+        suffix_bases = [sum(CONTEXT_BASE ** shorter for shorter in range(length)) for length in range(order + 2)]
+        counts = np.zeros((len(MODES), suffix_bases[-1], DEGREES), dtype=np.float64)
+        for length in range(order + 1):
+            suffix_ids = suffix_bases[length] + contexts % CONTEXT_BASE ** length
+            np.add.at(counts, (chord_modes, suffix_ids, degrees), 1.0)
+        counts[:, 0] += 1.0  # Add-one smoothing of the empty context, so every degree stays reachable
+
+        # Back every full context off to its longest suffix that was seen in training
+        full_contexts = np.arange(CONTEXT_BASE ** order)
+        context_ids = np.zeros((len(MODES), len(full_contexts)), dtype=np.int64)
+        for length in range(1, order + 1):
+            suffix_ids = suffix_bases[length] + full_contexts % CONTEXT_BASE ** length
+            seen = counts[:, suffix_ids].sum(axis=2) > 0
+            context_ids = np.where(seen, suffix_ids, context_ids)
+
+        # CSR over the non-zero counts, rows numbered mode by mode
+        totals = counts.reshape(-1, DEGREES)
+        rows, next_degrees = np.nonzero(totals)
+        probabilities = totals[rows, next_degrees] / totals.sum(axis=1)[rows]
+        indptr = np.zeros(len(totals) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(totals)), out=indptr[1:])
+        running = np.cumsum(probabilities)
+        before_row = np.concatenate([[0.0], running])[indptr[:-1]]
+        cumulative = rows + running - before_row[rows]
+        row_ends = indptr[1:][np.diff(indptr) > 0] - 1
+        cumulative[row_ends] = rows[row_ends] + 1.0  # Exact, despite rounding in the running sum
+        context_rows = (np.arange(len(MODES))[:, None] * suffix_bases[-1] + context_ids).astype(np.int32)
+        return cls(order, context_rows, indptr.astype(np.int32), next_degrees.astype(np.uint8), cumulative)
+
+    @classmethod
+    def from_catalog(cls, catalog, order=2):
+        """
+        Trains on a song catalog (see `song_catalog`). Each song is assigned the key whose diatonic
+        chords cover most of it, preferring keys whose tonic opens or closes the song, and its
+        chords become degrees of that key; chords outside the key are skipped.
+
+        Args:
+            catalog (SqliteCatalog or DictCatalog): The catalog.
+            order (int): Number of previous chords each draw depends on.
+
+        Returns:
+            MarkovModel: The trained model.
+
+        Raises:
+            ValueError: If a chord symbol is invalid.
+        """
+        _, symbols, ids, offsets = catalog.progression_arrays()
+        songs = len(offsets) - 1
+        table = _degree_table(symbols)
+        chord_degrees = table[ids]  # (chords, keys)
+
+        nonempty = np.diff(offsets) > 0
+        starts = offsets[:-1][nonempty]
+        score = np.zeros((songs, len(key_names)))
+        score[nonempty] = np.add.reduceat((chord_degrees >= 0).astype(np.int64), starts, axis=0)
+        score[nonempty] += 0.5 * (chord_degrees[starts] == 0) + 0.25 * (chord_degrees[offsets[1:][nonempty] - 1] == 0)
+        song_keys = score.argmax(axis=1)
+
+        song_of_chord = np.repeat(np.arange(songs), np.diff(offsets))
+        degrees = chord_degrees[np.arange(len(ids)), song_keys[song_of_chord]]
+        keep = degrees >= 0
+        kept_offsets = np.zeros(songs + 1, dtype=np.int64)
+        np.cumsum(np.bincount(song_of_chord[keep], minlength=songs), out=kept_offsets[1:])
+        modes = np.array([key_mode(key_names[key]) for key in song_keys], dtype=np.int64)
+        return cls.train(degrees[keep], kept_offsets, modes, order)
+
+    def save(self, path, source=""):
+        """
+        Writes the model to an .npz file.
+
+        Args:
+            path (str): Output path.
+            source (str): Fingerprint of the training data, checked by `load_or_train`.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "wb") as model_file:
+            np.savez(model_file, version=MODEL_VERSION, order=self.order, source=source,
+                     context_rows=self.context_rows, indptr=self.indptr, next_degrees=self.next_degrees,
+                     cumulative=self.cumulative)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a model written by `save`.
+
+        Args:
+            path (str): The .npz file.
+
+        Returns:
+            tuple: (MarkovModel, source fingerprint it was trained on).
+
+        Raises:
+            ValueError: If the file is not a model of this version.
+        """
+        with np.load(path) as saved:
+            if "version" not in saved.files or int(saved["version"]) != MODEL_VERSION:
+                raise ValueError(f"'{path}' is not a chord model of version {MODEL_VERSION}")
+            model = cls(int(saved["order"]), saved["context_rows"], saved["indptr"], saved["next_degrees"],
+                        saved["cumulative"])
+            return model, str(saved["source"])
+
+    def sample(self, modes, length, rng):
+        """
+        Draws many degree sequences at once, one vectorized step per chord position.
+
+        Args:
+            modes (numpy.ndarray): Index into `MODES` of each sequence's key.
+            length (int): Chords per sequence.
+            rng (numpy.random.Generator): Source of randomness.
+
+        Returns:
+            numpy.ndarray: uint8 degrees of shape (len(modes), length).
+        """
+        modes = np.asarray(modes, dtype=np.int64)
+        contexts = np.full(len(modes), sum(START * CONTEXT_BASE ** back for back in range(self.order)),
+                           dtype=np.int64)
+        out = np.empty((len(modes), length), dtype=np.uint8)
+        for position in range(length):
+            rows = self.context_rows[modes, contexts]
+            draws = rng.random(len(modes))
+            targets = rows + draws
+            entries = self.guide[rows, (draws * GUIDE_BUCKETS).astype(np.intp)]
+            while True:  # Step past entries whose cumulative probability does not reach the draw
+                behind = self.cumulative[entries] <= targets
+                if not behind.any():
+                    break
+                entries += behind
+            entries = np.minimum(entries, self.indptr[rows + 1] - 1)  # Guard against rounding at a row end
+            out[:, position] = self.next_degrees[entries]
+            contexts = (contexts * CONTEXT_BASE + out[:, position]) % CONTEXT_BASE ** self.order
+        return out
+
+
+@tracing.traced("markov.load_or_train")
+def load_or_train(catalog, path=None, order=2):
+    """
+    Returns the model for a catalog, loading it from disk when it was trained on the same
+    songs and retraining (and saving) it otherwise.
+
+    Args:
+        catalog (SqliteCatalog or DictCatalog): The training catalog.
+        path (str): Model file; defaults to one per catalog and order under `default_model_path`.
+        order (int): Number of previous chords each draw depends on.
+
+    Returns:
+        MarkovModel: The model.
+    """
+    if path is None:
+        # A catalog file keeps its cache file as its songs change (the saved fingerprint tells when they
+        # did), so switching between catalogs never overwrites another one's model
+        identity = os.path.abspath(catalog.path) if hasattr(catalog, "path") else catalog.fingerprint()
+        path = default_model_path(f"{identity}:order={order}")
+    source = f"{catalog.fingerprint()}:order={order}"
+    try:
+        model, saved_source = MarkovModel.load(path)
+        if saved_source == source:
+            return model
+    except (OSError, KeyError, ValueError):
+        pass  # Missing, stale or unreadable: retrain
+    model = MarkovModel.from_catalog(catalog, order)
+    try:
+        model.save(path, source)
+    except OSError:
+        pass  # e.g. a read-only cache directory; the model is just not cached
+    return model
+
+
+_default_model = None
+
+
+def default_model():
+    """
+    Returns the model trained on the built-in popular songs, loading or training it on first use.
+    """
+    global _default_model
+    if _default_model is None:
+        from popular_songs import popular_songs
+        from song_catalog import DictCatalog
+
+        _default_model = load_or_train(DictCatalog(popular_songs))
+    return _default_model
+
+
+@tracing.traced("generate.markov_bulk")
+def generate_markov_progressions(count, length=4, keys=None, model=None, seed=None):
+    """
+    Generates many trained progressions at once, in the array layout of `generate_progressions`
+    (column 0 is the key index into `key_names`, the rest are chord degrees).
+
+    Args:
+        count (int): Number of progressions to generate.
+        length (int): Number of chords per progression.
+        keys (list): Key names to draw from; defaults to all keys.
+        model (MarkovModel): The model; defaults to `default_model()`.
+        seed (int): Seed for the NumPy random Generator, for reproducible output.
+
+    Returns:
+        numpy.ndarray: uint8 array of shape (count, length + 1).
+
+    Raises:
+        ValueError: If a key is invalid.
+    """
+    invalid = [key for key in keys or () if key not in keys_and_chords]
+    if invalid:
+        raise ValueError(f"Invalid key: {invalid[0]}")
+    key_indices = np.array([key_names.index(key) for key in keys] if keys else range(len(key_names)), dtype=np.uint8)
+    key_modes = np.array([key_mode(key) for key in key_names], dtype=np.int64)
+
+    model = model or default_model()
+    rng = np.random.default_rng(seed)
+    out = np.empty((count, length + 1), dtype=np.uint8)
+    for start in range(0, count, CHUNK_ROWS):  # Bounds the temporaries of each vectorized step
+        block = out[start:start + CHUNK_ROWS]
+        block[:, 0] = key_indices[rng.integers(len(key_indices), size=len(block))]
+        block[:, 1:] = model.sample(key_modes[block[:, 0]], length, rng)
+    return out
+
+
+@tracing.traced("generate.markov")
+def generate_markov_chords(key, length=4, model=None, seed=None):
+    """
+    Generates a chord progression in the specified key from the trained model; a drop-in
+    replacement for `generate_random_chords`.
+
+    Args:
+        key (str): The musical key to generate chords for.
+        length (int): Number of chords.
+        model (MarkovModel): The model; defaults to `default_model()`.
+        seed (int): Seed for reproducible output.
+
+    Returns:
+        list: A list of chords in the generated progression.
+
+    Raises:
+        ValueError: If the key is not valid.
+    """
+    if key not in keys_and_chords:
+        raise ValueError(f"Invalid key: {key}")
+    degrees = (model or default_model()).sample([key_mode(key)], length, np.random.default_rng(seed))[0]
+    return [keys_and_chords[key][degree] for degree in degrees]
@@ -0,0 +1,464 @@
+from collections import deque
+import threading
+import time
+import wave
+
+import numpy as np
+
+from synth import SAMPLE_RATE, render_progression
+import tracing
+
+# Frames per block handed to the sink (about 46 ms at 44.1 kHz)
+BLOCK_FRAMES = 2048
+
+# Mixer channel reserved for the engine, leaving the others to sound effects and streamed music
+PYGAME_CHANNEL = 0
+
+
+class NullSink:
+    """
+    Sink that discards audio. With `realtime` it paces writes like a sound card with a
+    two-block buffer, so latency and underruns can be measured without audio hardware.
+
+    Every sink offers `start`, `wait`, `write`, `stop`, `idle` and `close`, and counts `underruns`.
+    """
+
+    def __init__(self, realtime=True):
+        """
+        Args:
+            realtime (bool): Consume blocks at the sample rate; False consumes them instantly.
+        """
+        self.realtime = realtime
+        self.sample_rate = SAMPLE_RATE
+        self.frames_written = 0
+        self.underruns = 0
+        self._buffered_until = None  # Clock time at which the device runs out of queued audio
+        self._block_seconds = 0.0
+        self._stopped = threading.Event()
+
+    def start(self, sample_rate):
+        self.sample_rate = sample_rate
+        self._buffered_until = None
+
+    def wait(self):
+        """
+        Blocks while two blocks are queued (double buffering), returning early if playback is stopped.
+        """
+        if self.realtime and self._buffered_until is not None:
+            # Ready once only one block is left ahead of the playhead
+            delay = self._buffered_until - self._block_seconds - time.perf_counter()
+            if delay > 0:
+                self._stopped.wait(delay)
+        self._stopped.clear()
+
+    def write(self, block):
+        """
+        Queues one block; call `wait` first.
+        """
+        self.frames_written += len(block)
+        self._consume(block)
+        if not self.realtime:
+            return
+        now = time.perf_counter()
+        self._block_seconds = len(block) / self.sample_rate
+        if self._buffered_until is not None and now > self._buffered_until:
+            self.underruns += 1  # The device played everything queued and fell silent
+            tracing.count("playback.underruns")
+        self._buffered_until = max(now, self._buffered_until or now) + self._block_seconds
+
+    def _consume(self, block):
+        pass
+
+    def stop(self):
+        """
+        Drops queued audio, e.g. when playback is stopped.
+        """
+        self._buffered_until = None
+        self._stopped.set()
+
+    def idle(self):
+        """
+        Called when the engine runs out of audio; the next block starts a new stream, not an underrun.
+        """
+        self._buffered_until = None
+
+    def close(self):
+        pass
+
+
+class FileSink(NullSink):
+    """
+    Sink that writes everything played to a 16-bit mono WAV file, so output can be checked
+    sample for sample (e.g. that queued progressions join without gaps).
+    """
+
+    def __init__(self, path, realtime=False):
+        """
+        Args:
+            path (str): WAV file to write.
+            realtime (bool): Pace writes like a sound card (see `NullSink`).
+        """
+        super().__init__(realtime)
+        self.path = path
+        self._wav_file = None
+
+    def start(self, sample_rate):
+        super().start(sample_rate)
+        if self._wav_file is None:
+            self._wav_file = wave.open(self.path, "wb")
+            self._wav_file.setnchannels(1)
+            self._wav_file.setsampwidth(2)
+            self._wav_file.setframerate(sample_rate)
+
+    def _consume(self, block):
+        self._wav_file.writeframes(np.asarray(block, dtype="<i2").tobytes())
+
+    def close(self):
+        if self._wav_file is not None:
+            self._wav_file.close()
+            self._wav_file = None
+
+
+class PygameSink:
+    """
+    Sink playing through the pygame mixer. The mixer is initialized once, on first use, and
+    blocks are queued on a reserved channel, which holds one block behind the one playing.
+    """
+
+    def __init__(self, channel=PYGAME_CHANNEL):
+        """
+        Args:
+            channel (int): Mixer channel reserved for the engine.
+        """
+        self.channel_id = channel
+        self.channel = None
+        self.channels = 1
+        self.underruns = 0
+        self.frames_written = 0
+        self._streaming = False
+        self._stopped = threading.Event()
+
+    def start(self, sample_rate):
+        import pygame
+
+        if not pygame.mixer.get_init():
+            with tracing.span("pygame.mixer.init", frequency=sample_rate):
+                pygame.mixer.init(frequency=sample_rate, size=-16, channels=2, buffer=512)
+        frequency, _, self.channels = pygame.mixer.get_init()
+        if frequency != sample_rate:
+            raise ValueError(f"The mixer runs at {frequency} Hz, not {sample_rate} Hz")
+        pygame.mixer.set_reserved(self.channel_id + 1)
+        self.channel = pygame.mixer.Channel(self.channel_id)
+        self._pygame = pygame
+
+    def wait(self):
+        # Double buffering: wait until the channel's single queue slot is free
+        while self.channel.get_queue() is not None and not self._stopped.wait(0.002):
+            pass
+        self._stopped.clear()
+
+    def write(self, block):
+        samples = np.asarray(block, dtype=np.int16)
+        if self.channels > 1:
+            samples = np.repeat(samples[:, None], self.channels, axis=1)
+        sound = self._pygame.mixer.Sound(buffer=samples.tobytes())
+        if self.channel.get_busy():
+            self.channel.queue(sound)
+        else:
+            if self._streaming:
+                self.underruns += 1
+                tracing.count("playback.underruns")
+            self.channel.play(sound)
+        self._streaming = True
+        self.frames_written += len(block)
+
+    def stop(self):
+        self._streaming = False
+        self._stopped.set()
+        if self.channel is not None:
+            self.channel.stop()
+
+    def idle(self):
+        self._streaming = False
+
+    def close(self):
+        self.stop()
+
+
+class Track:
+    """
+    A pre-rendered buffer in the playback queue. Tracks made from a chord progression keep
+    it, so they can be re-rendered when the tempo changes.
+    """
+
+    def __init__(self, pcm, chords=None, params=None):
+        self.pcm = pcm
+        self.chords = chords
+        self.params = params or {}
+        self.position = 0  # Next frame to play
+
+
+class PlaybackEngine:
+    """
+    Persistent playback engine. A feeder thread fills a ring of two preallocated blocks from
+    the queue of tracks and hands them to the sink, so playback starts without re-initializing
+    the audio device and queued tracks join without gaps.
+    """
+
+    def __init__(self, sink=None, sample_rate=SAMPLE_RATE, block_frames=BLOCK_FRAMES):
+        """
+        Args:
+            sink: Output sink (`PygameSink`, `NullSink` or `FileSink`); defaults to `PygameSink`.
+            sample_rate (int): Sample rate in Hz.
+            block_frames (int): Frames per block handed to the sink.
+        """
+        self.sink = sink or PygameSink()
+        self.sample_rate = sample_rate
+        self.block_frames = block_frames
+        self.loop = False
+        self.tempo = None
+        self.queue = deque()
+        self.ring = np.zeros((2, block_frames), dtype=np.int16)
+        self.blocks_played = 0
+        self.start_latencies = []
+        self._next_slot = 0
+        self._play_requested_at = None
+        self._closed = False
+        self._started = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._feed, name="playback-engine", daemon=True)
+
+    def play(self, chords, **params):
+        """
+        Replaces whatever is playing with a chord progression.
+
+        Args:
+            chords (list): Chord symbols.
+            **params: Render parameters for `render_progression`; a tempo set with `set_tempo` overrides theirs.
+
+        Raises:
+            ValueError: If a chord symbol is invalid.
+        """
+        requested_at = time.perf_counter()
+        track = self._render(chords, params)
+        with self._condition:
+            self.queue.clear()
+            self.sink.stop()
+            self._enqueue(track, requested_at)
+
+    def enqueue(self, chords, **params):
+        """
+        Queues a chord progression to start right after the queued ones, without a gap.
+
+        Args:
+            chords (list): Chord symbols.
+            **params: Render parameters for `render_progression`.
+
+        Raises:
+            ValueError: If a chord symbol is invalid.
+        """
+        requested_at = time.perf_counter()
+        track = self._render(chords, params)
+        with self._condition:
+            self._enqueue(track, requested_at)
+
+    def play_pcm(self, pcm, chords=None, **params):
+        """
+        Replaces whatever is playing with pre-rendered 16-bit mono samples at the engine's sample rate,
+        e.g. a progression rendered off the GUI thread with `render_params`.
+
+        Args:
+            pcm (numpy.ndarray): int16 samples.
+            chords (list): The progression the samples were rendered from, so a tempo change can
+                re-render them; None for other audio.
+            **params: Render parameters the progression was rendered with, less the engine's.
+        """
+        requested_at = time.perf_counter()
+        track = Track(np.asarray(pcm, dtype=np.int16), list(chords) if chords is not None else None, dict(params))
+        with self._condition:
+            self.queue.clear()
+            self.sink.stop()
+            self._enqueue(track, requested_at)
+
+    def enqueue_pcm(self, pcm, chords=None, **params):
+        """
+        Queues pre-rendered 16-bit mono samples at the engine's sample rate.
+
+        Args:
+            pcm (numpy.ndarray): int16 samples.
+            chords (list): The progression the samples were rendered from, as for `play_pcm`.
+            **params: Render parameters the progression was rendered with, less the engine's.
+        """
+        track = Track(np.asarray(pcm, dtype=np.int16), list(chords) if chords is not None else None, dict(params))
+        with self._condition:
+            self._enqueue(track, time.perf_counter())
+
+    def render_params(self, **params):
+        """
+        Returns the parameters `render_progression` needs to render audio the way the engine would:
+        at its sample rate, and at its tempo once one is set.
+
+        Args:
+            **params: The caller's render parameters.
+
+        Returns:
+            dict: Render parameters.
+        """
+        with self._condition:
+            tempo = self.tempo
+        render_params = dict(params, tempo=tempo) if tempo is not None else dict(params)
+        render_params["sample_rate"] = self.sample_rate
+        return render_params
+
+    def stop(self):
+        """
+        Stops playback and empties the queue.
+        """
+        with self._condition:
+            self.queue.clear()
+            self.sink.stop()
+
+    def set_loop(self, loop):
+        """
+        Repeats the current track instead of moving on when it ends.
+        """
+        with self._condition:
+            self.loop = loop
+
+    def set_tempo(self, tempo):
+        """
+        Changes the tempo of queued progressions, re-rendering them; the playing one continues
+        from the same point in the bar.
+
+        Args:
+            tempo (float): Tempo in beats per minute.
+        """
+        for track in self.change_tempo(tempo):
+            self.replace_pcm(track, self._render(track.chords, track.params).pcm)
+
+    def change_tempo(self, tempo):
+        """
+        Sets the tempo without re-rendering anything, for callers that render elsewhere (e.g. off the
+        GUI thread): render each returned track's chords with `render_params(**track.params)` and hand
+        the samples to `replace_pcm`. Until then the tracks play at the old tempo.
+
+        Args:
+            tempo (float): Tempo in beats per minute.
+
+        Returns:
+            list: The queued `Track`s made from chord progressions.
+        """
+        with self._condition:
+            self.tempo = tempo
+            return [track for track in self.queue if track.chords is not None]
+
+    def replace_pcm(self, track, pcm):
+        """
+        Swaps a track's samples for a re-rendering, keeping its place in the bar.
+
+        Args:
+            track (Track): A track from `change_tempo`; one that has finished playing is ignored.
+            pcm (numpy.ndarray): int16 samples.
+        """
+        pcm = np.asarray(pcm, dtype=np.int16)
+        with self._condition:
+            track.position = int(track.position * len(pcm) / max(len(track.pcm), 1))
+            track.pcm = pcm
+
+    def is_playing(self):
+        with self._condition:
+            return bool(self.queue)
+
+    def position(self):
+        """
+        Returns the position in the current track in seconds, or None when nothing is playing.
+        This is the audio handed to the sink, which runs at most two blocks ahead of what is heard.
+        """
+        with self._condition:
+            return self.queue[0].position / self.sample_rate if self.queue else None
+
+    def stats(self):
+        """
+        Returns playback counters for monitoring and tests.
+
+        Returns:
+            dict: Blocks played, sink underruns, and the last and worst start latency in milliseconds
+            (from calling `play`, or `enqueue` on an idle engine, to the first block reaching the sink,
+            rendering included).
+        """
+        latencies = self.start_latencies
+        return {
+            "blocks_played": self.blocks_played,
+            "underruns": self.sink.underruns,
+            "last_start_latency_ms": latencies[-1] * 1000 if latencies else None,
+            "max_start_latency_ms": max(latencies) * 1000 if latencies else None,
+        }
+
+    def close(self):
+        """
+        Stops the feeder thread and closes the sink.
+        """
+        with self._condition:
+            self._closed = True
+            self.queue.clear()
+            self._condition.notify()
+        if self._started:
+            self._thread.join()
+        self.sink.close()
+
+    def _render(self, chords, params):
+        # Tracks keep the caller's parameters; the engine tempo, once set, takes precedence
+        pcm = render_progression(chords, **self.render_params(**params))
+        return Track(pcm, list(chords), dict(params))
+
+    def _enqueue(self, track, requested_at):
+        # Called with the condition held
+        if not self.queue:
+            self._play_requested_at = requested_at
+        self.queue.append(track)
+        if not self._started:
+            self.sink.start(self.sample_rate)
+            self._thread.start()
+            self._started = True
+        self._condition.notify()
+
+    def _fill(self, block):
+        # Copies queued audio into `block`, crossing track boundaries; returns the frames filled
+        filled = 0
+        while filled < len(block) and self.queue:
+            track = self.queue[0]
+            count = min(len(block) - filled, len(track.pcm) - track.position)
+            block[filled:filled + count] = track.pcm[track.position:track.position + count]
+            filled += count
+            track.position += count
+            if track.position >= len(track.pcm):
+                if self.loop and len(track.pcm):
+                    track.position = 0
+                else:
+                    self.queue.popleft()
+        block[filled:] = 0
+        return filled
+
+    def _feed(self):
+        while True:
+            with self._condition:
+                while not self._closed and not self.queue:
+                    self.sink.idle()
+                    self._condition.wait()
+                if self._closed:
+                    return
+            # Fill the next ring slot only once the sink has room, so a stop or a new play
+            # never waits behind a block of stale audio
+            self.sink.wait()
+            with self._condition:
+                if not self.queue:
+                    continue
+                block = self.ring[self._next_slot]
+                self._next_slot ^= 1
+                self._fill(block)
+                self.sink.write(block)
+                self.blocks_played += 1
+                if self._play_requested_at is not None:
+                    self.start_latencies.append(time.perf_counter() - self._play_requested_at)
+                    tracing.record("playback.start_latency", self.start_latencies[-1])
+                    self._play_requested_at = None
@@ -1,4 +1,7 @@
-from mido import MidiFile, MidiTrack, Message
+import io
+
+from chord_generation import build_midi
+from chord_theory import note_mapping  # Still importable from here for existing callers
 
 # Dictionary of popular songs and their chord progressions
 popular_songs = {
@@ -22,55 +25,51 @@ popular_songs = {
     "Take Me Home, Country Roads (John Denver)": ["G", "Em", "D", "C"],
 }
 
-# Mapping chords to MIDI note numbers
-note_mapping = {
-    "C": 60, "C#": 61, "Db": 61, "D": 62, "D#": 63, "Eb": 63, "E": 64, 
-    "F": 65, "F#": 66, "Gb": 66, "G": 67, "G#": 68, "Ab": 68, 
-    "A": 69, "A#": 70, "Bb": 70, "B": 71
-}
-
-def create_song_midi(song_name, chords, output_path="song_progression.mid"):
+def build_song_midi(song_name, chords, **params):
     """
-    Creates a MIDI file for a given song's chord progression.
+    Builds an in-memory MIDI file for a given song's chord progression.
 
     Args:
         song_name (str): Name of the song.
         chords (list): List of chords in the song's progression.
-        output_path (str): Path to save the generated MIDI file.
+        **params: Render parameters passed to `build_midi` (tempo, velocity, duration, instrument).
 
     Returns:
-        str: Path to the generated MIDI file.
+        MidiFile: The MIDI file, not yet written anywhere.
     """
-    midi_file = MidiFile()  # Create a new MIDI file
-    track = MidiTrack()  # Create a new MIDI track
-    midi_file.tracks.append(track)  # Append the track to the MIDI file
+    return build_midi(chords, **params)
+
+
+def render_song_midi(song_name, chords, **params):
+    """
+    Renders a song's chord progression to Standard MIDI File bytes without touching the disk.
+
+    Args:
+        song_name (str): Name of the song.
+        chords (list): List of chords in the song's progression.
+        **params: Render parameters passed to `build_midi` (tempo, velocity, duration, instrument).
 
-    for chord in chords:
-        # Extract the root note of the chord
-        root = chord.rstrip("m#7dim")  # Handle extended chords like "Em7", "A7", "Cdim"
-        quality = chord[len(root):]  # Get the quality (e.g., "m", "7", "dim")
-        
-        if root not in note_mapping:
-            raise ValueError(f"Unknown root note in chord: {chord}")
+    Returns:
+        bytes: The encoded MIDI file.
+    """
+    buffer = io.BytesIO()
+    build_song_midi(song_name, chords, **params).save(file=buffer)
+    return buffer.getvalue()
 
-        base_pitch = note_mapping[root]  # Get the MIDI note number for the root
 
-        # Determine chord intervals based on quality
-        if "m" in quality and "7" not in quality:  # Minor chord
-            intervals = [0, 3, 7]
-        elif "dim" in quality:  # Diminished chord
-            intervals = [0, 3, 6]
-        elif "7" in quality:  # Dominant 7th chord
-            intervals = [0, 4, 7, 10]
-        else:  # Major chord
-            intervals = [0, 4, 7]
+def create_song_midi(song_name, chords, output_path="song_progression.mid", **params):
+    """
+    Creates a MIDI file for a given song's chord progression.
 
-        # Add notes to the MIDI track
-        for interval in intervals:
-            track.append(Message("note_on", note=base_pitch + interval, velocity=64, time=0))
-        for interval in intervals:
-            track.append(Message("note_off", note=base_pitch + interval, velocity=64, time=480))
+    Args:
+        song_name (str): Name of the song.
+        chords (list): List of chords in the song's progression.
+        output_path (str): Path to save the generated MIDI file.
+        **params: Render parameters passed to `build_midi` (tempo, velocity, duration, instrument).
 
+    Returns:
+        str: Path to the generated MIDI file.
+    """
     # Save the MIDI file to the specified path
-    midi_file.save(output_path)
+    build_song_midi(song_name, chords, **params).save(output_path)
     return output_path
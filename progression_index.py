@@ -0,0 +1,247 @@
+import numpy as np
+
+from chord_theory import chord_intervals, parse_chord
+
+# Small integer code for every distinct chord quality (chords with the same intervals share a code)
+quality_codes = {intervals: code for code, intervals in enumerate(sorted(set(chord_intervals.values())))}
+
+# Token stride: a transition token is (root interval from the previous chord) * stride + quality code
+QUALITY_STRIDE = 64
+
+# Token marking the first chord of each song, where there is no previous chord to measure from
+SENTINEL = 0xFFFF
+
+# Roman numeral of each root interval above the first chord
+roman_degrees = ["I", "bII", "II", "bIII", "III", "IV", "#IV", "V", "bVI", "VI", "bVII", "VII"]
+
+
+def chord_features(symbol):
+    """
+    Returns the pitch class and quality code of a chord symbol.
+
+    Args:
+        symbol (str): The chord symbol.
+
+    Returns:
+        tuple: (pitch class 0-11, quality code).
+
+    Raises:
+        ValueError: If the symbol is invalid.
+    """
+    chord = parse_chord(symbol)
+    return chord.root % 12, quality_codes[chord.intervals]
+
+
+def normalize_progression(chords):
+    """
+    Normalizes a progression so that every transposition of it gives the same result.
+
+    Args:
+        chords (list): Chord symbols.
+
+    Returns:
+        tuple: (quality code of the first chord, tuple of transition tokens between consecutive chords).
+
+    Raises:
+        ValueError: If a chord symbol is invalid.
+    """
+    features = [chord_features(chord) for chord in chords]
+    tokens = tuple(
+        ((root - previous_root) % 12) * QUALITY_STRIDE + quality
+        for (previous_root, _), (root, quality) in zip(features, features[1:])
+    )
+    return (features[0][1] if features else None), tokens
+
+
+def roman_numerals(chords):
+    """
+    Spells a progression as Roman numerals relative to its first chord, e.g. C G Am F -> I V vi IV.
+
+    Args:
+        chords (list): Chord symbols.
+
+    Returns:
+        list: Roman numeral strings; minor and diminished chords are lower case.
+
+    Raises:
+        ValueError: If a chord symbol is invalid.
+    """
+    numerals = []
+    tonic = None
+    for symbol in chords:
+        chord = parse_chord(symbol)
+        tonic = chord.root if tonic is None else tonic
+        numeral = roman_degrees[(chord.root - tonic) % 12]
+        quality = chord.quality
+        if 3 in chord.intervals and 4 not in chord.intervals:  # Minor third
+            numeral = numeral.lower()
+            quality = quality[1:] if quality.startswith("m") and not quality.startswith("maj") else quality
+        numerals.append(numeral + quality.replace("dim", "°").replace("aug", "+"))
+    return numerals
+
+
+class ProgressionIndex:
+    """
+    Transposition-invariant index answering "which songs use this progression, in any key?".
+
+    Every song is stored as a flat array of transition tokens. All 1- to MAX_GRAM-grams of
+    tokens, keyed together with the quality of the chord before them, are kept in one sorted
+    array, so a query looks up its rarest n-gram with a binary search and verifies only the
+    positions posted under it.
+    """
+    MAX_GRAM = 3
+
+    def __init__(self, names, roots, qualities, offsets):
+        """
+        Builds the index from flat per-chord arrays; see `from_songs` for the usual entry point.
+
+        Args:
+            names (list): Song names.
+            roots (numpy.ndarray): Pitch class (0-11) of every chord of every song, concatenated.
+            qualities (numpy.ndarray): Quality code of every chord, aligned with `roots`.
+            offsets (numpy.ndarray): Start of each song in `roots`, plus the total length at the end.
+        """
+        self.names = list(names)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.qualities = np.asarray(qualities, dtype=np.uint16)
+        roots = np.asarray(roots, dtype=np.int16)
+
+        tokens = np.empty(len(roots) + self.MAX_GRAM, dtype=np.uint16)
+        tokens[1:len(roots)] = ((roots[1:] - roots[:-1]) % 12) * QUALITY_STRIDE + self.qualities[1:]
+        tokens[self.offsets[:-1]] = SENTINEL  # Song starts have no transition
+        tokens[len(roots):] = SENTINEL
+        self.tokens = tokens
+
+        position_type = np.int32 if len(tokens) < 2 ** 31 else np.int64
+        keys, positions = [], []
+        for length in range(1, self.MAX_GRAM + 1):
+            starts = np.arange(len(roots) - length + 1, dtype=position_type)
+            valid = np.ones(len(starts), dtype=bool)
+            key = self._gram_prefix(length, self.qualities.take(starts - 1, mode="clip"))
+            for offset in range(length):
+                window = tokens[offset:offset + len(starts)]
+                valid &= window != SENTINEL
+                key |= window.astype(np.int64) << (16 * (2 - offset))
+            keys.append(key[valid])
+            positions.append(starts[valid])
+        keys = np.concatenate(keys)
+        order = np.argsort(keys, kind="stable")
+        self.gram_keys = keys[order]
+        self.gram_positions = np.concatenate(positions)[order]
+
+    @classmethod
+    def from_songs(cls, songs):
+        """
+        Builds an index from a mapping of song names to chord lists, like `popular_songs`.
+
+        Args:
+            songs (dict): Song name -> list of chord symbols.
+
+        Returns:
+            ProgressionIndex: The index.
+
+        Raises:
+            ValueError: If a chord symbol is invalid.
+        """
+        names, roots, qualities, offsets = [], [], [], [0]
+        for name, chords in songs.items():
+            for chord in chords:
+                root, quality = chord_features(chord)
+                roots.append(root)
+                qualities.append(quality)
+            names.append(name)
+            offsets.append(len(roots))
+        return cls(names, roots, qualities, offsets)
+
+    @staticmethod
+    def _gram_prefix(length, previous_quality):
+        # Keys pack the gram length, the quality of the chord before the gram and up to three 16-bit tokens
+        return (np.int64(length) << 54) | (np.asarray(previous_quality, dtype=np.int64) << 48)
+
+    @classmethod
+    def from_catalog(cls, catalog, progress=None):
+        """
+        Builds an index over a song catalog (see `song_catalog`), working on its interned chord ids
+        so that each distinct chord symbol is only parsed once.
+
+        Args:
+            catalog (SqliteCatalog or DictCatalog): The catalog.
+            progress (callable): Called as progress(steps done, 3) after reading the catalog, parsing
+                its chords and building the index; raising from it stops the build.
+
+        Returns:
+            ProgressionIndex: The index.
+
+        Raises:
+            ValueError: If a chord symbol is invalid.
+        """
+        progress = progress or (lambda completed, total: None)
+        names, symbols, ids, offsets = catalog.progression_arrays()
+        progress(1, 3)
+        features = np.array([chord_features(symbol) for symbol in symbols], dtype=np.int64).reshape(-1, 2)
+        progress(2, 3)
+        index = cls(names, features[ids, 0], features[ids, 1], offsets)
+        progress(3, 3)
+        return index
+
+    def __len__(self):
+        return len(self.names)
+
+    def song_ids(self, chords, exact=False):
+        """
+        Finds the songs containing a progression in any key, as positions in `names`.
+
+        Args:
+            chords (list): At least two chord symbols, in any key.
+            exact (bool): Only match songs whose whole progression is the query.
+
+        Returns:
+            numpy.ndarray: Sorted indices of the matching songs.
+
+        Raises:
+            ValueError: If fewer than two chords are given or a chord symbol is invalid.
+        """
+        if len(chords) < 2:
+            raise ValueError("A progression search needs at least two chords")
+        features = [chord_features(chord) for chord in chords]
+        first_quality, query = normalize_progression(chords)
+
+        # Look up the rarest n-gram of the query and only verify the positions posted under it
+        length = min(self.MAX_GRAM, len(query))
+        best = None
+        for offset in range(len(query) - length + 1):
+            key = int(self._gram_prefix(length, features[offset][1]))
+            for index, token in enumerate(query[offset:offset + length]):
+                key |= token << (16 * (2 - index))
+            low, high = np.searchsorted(self.gram_keys, [key, key + 1])
+            if best is None or high - low < best[1] - best[0]:
+                best = (low, high, offset)
+        low, high, offset = best
+        starts = self.gram_positions[low:high].astype(np.int64) - offset  # Position of the query's second chord
+
+        matches = starts >= 1
+        for index, token in enumerate(query):
+            matches &= self.tokens.take(starts + index, mode="clip") == token
+        matches &= self.qualities.take(starts - 1, mode="clip") == first_quality
+        if exact:
+            matches &= self.tokens.take(starts - 1, mode="clip") == SENTINEL
+            matches &= self.tokens.take(starts + len(query), mode="clip") == SENTINEL
+
+        return np.unique(np.searchsorted(self.offsets, starts[matches] - 1, side="right") - 1)
+
+    def search(self, chords, exact=False, limit=None):
+        """
+        Finds the songs containing a progression in any key.
+
+        Args:
+            chords (list): At least two chord symbols, in any key.
+            exact (bool): Only match songs whose whole progression is the query.
+            limit (int): Return at most this many songs; short queries can match a large part of a big catalog.
+
+        Returns:
+            list: Names of the matching songs, in catalog order.
+
+        Raises:
+            ValueError: If fewer than two chords are given or a chord symbol is invalid.
+        """
+        return [self.names[song] for song in self.song_ids(chords, exact)[:limit]]
@@ -0,0 +1,223 @@
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+import tracing
+
+
+def default_cache_dir():
+    """
+    Returns the per-user directory for the on-disk render cache.
+
+    Returns:
+        str: `$XDG_CACHE_HOME/music_production_assistant/renders`, falling back to `~/.cache`.
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "music_production_assistant", "renders")
+
+
+def render_key(kind, chords, **params):
+    """
+    Builds the content address of a render: a hash of what is rendered and how.
+
+    Args:
+        kind (str): The kind of render, e.g. "midi", so different outputs never collide.
+        chords (list): The chord progression.
+        **params: Render parameters such as tempo, velocity, duration and instrument.
+
+    Returns:
+        str: Hex SHA-256 digest identifying the render.
+    """
+    # Whole floats become ints, so tempo=120 and tempo=120.0 address the same render
+    params = {name: int(value) if isinstance(value, float) and value.is_integer() else value
+              for name, value in params.items()}
+    payload = json.dumps({"kind": kind, "chords": list(chords), "params": params}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RenderCache:
+    """
+    Two-tier cache of rendered bytes keyed by `render_key`.
+
+    Recently used renders are held in an in-memory LRU; every render is also written to
+    `cache_dir`, whose total size is kept under `max_disk_bytes` by evicting the least
+    recently used files. Safe to share between threads.
+    """
+
+    def __init__(self, cache_dir=None, max_memory_items=128, max_disk_bytes=64 * 1024 * 1024):
+        """
+        Args:
+            cache_dir (str): Directory for the disk tier; None keeps the cache in memory only.
+            max_memory_items (int): Number of renders kept in the in-memory LRU.
+            max_disk_bytes (int): Size budget of the disk tier in bytes.
+        """
+        self.cache_dir = cache_dir
+        self.max_memory_items = max_memory_items
+        self.max_disk_bytes = max_disk_bytes
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._disk_entries())
+
+    def get(self, key):
+        """
+        Looks up a render, promoting disk hits into the memory tier.
+
+        Args:
+            key (str): The render key.
+
+        Returns:
+            bytes: The cached render, or None on a miss.
+        """
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                tracing.count("render_cache.memory_hits")
+                return self._memory[key]
+
+        data = self._read_disk(key)
+        with self._lock:
+            if data is None:
+                self.misses += 1
+                tracing.count("render_cache.misses")
+                return None
+            self.disk_hits += 1
+            tracing.count("render_cache.disk_hits")
+            self._remember(key, data)
+        return data
+
+    def put(self, key, data):
+        """
+        Stores a render in both tiers.
+
+        Args:
+            key (str): The render key.
+            data (bytes): The rendered bytes.
+        """
+        with self._lock:
+            self._remember(key, data)
+        self._write_disk(key, data)
+
+    def get_or_render(self, kind, chords, render, **params):
+        """
+        Returns the cached render of a progression, rendering and storing it on a miss.
+
+        Args:
+            kind (str): The kind of render, e.g. "midi".
+            chords (list): The chord progression.
+            render (callable): Called as render(chords, **params) to produce the bytes on a miss.
+            **params: Render parameters, part of the cache key.
+
+        Returns:
+            bytes: The rendered bytes.
+        """
+        key = render_key(kind, chords, **params)
+        data = self.get(key)
+        if data is None:
+            data = render(chords, **params)
+            self.put(key, data)
+        return data
+
+    def stats(self):
+        """
+        Returns the hit/miss counters.
+
+        Returns:
+            dict: Memory hits, disk hits, misses, hit rate and the number of renders held in memory.
+        """
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_items": len(self._memory),
+            }
+
+    def clear(self):
+        """
+        Empties both tiers and resets the counters.
+        """
+        with self._lock:
+            self._memory.clear()
+            self.memory_hits = self.disk_hits = self.misses = 0
+        if self.cache_dir:
+            for _, _, path in self._disk_entries():
+                os.remove(path)
+            self._disk_bytes = 0
+
+    def _remember(self, key, data):
+        self._memory[key] = data
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.bin")
+
+    def _read_disk(self, key):
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._path(key), "rb") as cached:
+                data = cached.read()
+            os.utime(self._path(key))  # Mark as recently used for eviction
+            return data
+        except OSError:
+            return None
+
+    def _write_disk(self, key, data):
+        if not self.cache_dir:
+            return
+        if os.path.exists(self._path(key)):
+            return  # Content-addressed, so an existing file already holds these bytes
+        # Write to a temporary file first so readers never see a partial render
+        handle, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(handle, "wb") as temp_file:
+            temp_file.write(data)
+
+        with self._lock:
+            # Check again under the lock, so a render written by two threads is only counted once
+            if os.path.exists(self._path(key)):
+                os.remove(temp_path)
+                return
+            os.replace(temp_path, self._path(key))
+            self._disk_bytes += len(data)
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict_disk()
+
+    def _disk_entries(self):
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".bin"):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue  # Evicted concurrently
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _evict_disk(self):
+        # Rescan rather than trust the running total, other processes may share the directory.
+        # Evicting down to 90% of the budget avoids a rescan on every following write.
+        entries = sorted(self._disk_entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_disk_bytes * 0.9:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+        self._disk_bytes = total
@@ -0,0 +1,393 @@
+import csv
+import hashlib
+import json
+import os
+import sqlite3
+
+import numpy as np
+
+from chord_theory import parse_chord
+
+# Songs written per transaction by `import_songs`
+IMPORT_BATCH_SIZE = 10_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chords (id INTEGER PRIMARY KEY, symbol TEXT UNIQUE NOT NULL);
+CREATE TABLE IF NOT EXISTS songs (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL, progression BLOB NOT NULL,
+                                  folded_name TEXT NOT NULL DEFAULT '');
+"""
+
+
+def default_catalog_path():
+    """
+    Returns the per-user location of the imported song catalog.
+
+    Returns:
+        str: `$XDG_DATA_HOME/music_production_assistant/catalog.sqlite`, falling back to `~/.local/share`.
+    """
+    base = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(base, "music_production_assistant", "catalog.sqlite")
+
+
+class DictCatalog:
+    """
+    Catalog backed by an in-memory dict of song names to chord lists, such as `popular_songs`.
+
+    Every catalog backend offers the same methods: `page`, `chords`, `__contains__`, `__len__`,
+    `progression_arrays`, `fingerprint`, `reopened` and `close`.
+    """
+
+    def __init__(self, songs):
+        """
+        Args:
+            songs (dict): Song name -> list of chord symbols.
+        """
+        self.songs = songs
+        self._names = list(songs)
+
+    def reopened(self):
+        """
+        Returns a catalog to read from another thread; an in-memory catalog can be shared as it is.
+        """
+        return self
+
+    def close(self):
+        pass
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name):
+        return name in self.songs
+
+    def page(self, after=0, limit=256, filter_text=""):
+        """
+        Returns the next page of songs in catalog order.
+
+        Args:
+            after (int): Cursor returned with the previous page; 0 starts from the beginning.
+            limit (int): Maximum number of songs to return.
+            filter_text (str): Only return songs whose name contains this text, ignoring case.
+
+        Returns:
+            tuple: (list of song names, cursor for the next page).
+        """
+        needle = filter_text.casefold()
+        names = []
+        position = after
+        while position < len(self._names) and len(names) < limit:
+            if needle in self._names[position].casefold():
+                names.append(self._names[position])
+            position += 1
+        return names, position
+
+    def chords(self, name):
+        """
+        Returns the chord progression of a song.
+
+        Args:
+            name (str): The song name.
+
+        Returns:
+            list: Chord symbols, or None if the song is not in the catalog.
+        """
+        return self.songs.get(name)
+
+    def progression_arrays(self):
+        """
+        Returns every progression as interned chord ids, for bulk processing such as indexing.
+
+        Returns:
+            tuple: (song names, chord symbols indexed by id, uint32 chord ids of all songs
+            concatenated, int64 offsets of each song plus the total length).
+        """
+        symbols, interned, ids, offsets = [], {}, [], [0]
+        for chords in self.songs.values():
+            for chord in chords:
+                if chord not in interned:
+                    interned[chord] = len(symbols)
+                    symbols.append(chord)
+                ids.append(interned[chord])
+            offsets.append(len(ids))
+        return list(self._names), symbols, np.array(ids, dtype=np.uint32), np.array(offsets, dtype=np.int64)
+
+    def fingerprint(self):
+        """
+        Returns a string that changes whenever the catalog's songs change, for caches of data derived from it.
+        """
+        return "dict:" + hashlib.sha256(json.dumps(self.songs).encode("utf-8")).hexdigest()
+
+
+class SqliteCatalog:
+    """
+    Catalog stored in a SQLite file, for catalogs too large to hold in memory.
+
+    Chord symbols are interned in a `chords` table and each song stores its progression as a
+    compact blob of uint32 chord ids. Songs are read a page at a time, so opening a catalog
+    costs the same whatever its size.
+    """
+
+    def __init__(self, path):
+        """
+        Opens (creating if needed) a catalog file.
+
+        Args:
+            path (str): Path of the SQLite file.
+        """
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+        self._add_folded_names()
+        self._symbols = None
+
+    def close(self):
+        self.connection.close()
+
+    def reopened(self):
+        """
+        Returns a new connection to the same catalog file, to read from another thread (a sqlite3
+        connection can only be used on the thread that opened it). Close it when done.
+        """
+        return SqliteCatalog(self.path)
+
+    def _add_folded_names(self):
+        # SQLite's LIKE and lower() only fold ASCII, so names are stored casefolded by Python, as DictCatalog
+        # compares them; catalogs created before the column existed get it filled in once
+        columns = [row[1] for row in self.connection.execute("PRAGMA table_info(songs)")]
+        if "folded_name" in columns:
+            return
+        self.connection.create_function("casefold", 1, str.casefold, deterministic=True)
+        with self.connection:
+            self.connection.execute("ALTER TABLE songs ADD COLUMN folded_name TEXT NOT NULL DEFAULT ''")
+            self.connection.execute("UPDATE songs SET folded_name = casefold(name)")
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM songs").fetchone()[0]
+
+    def __contains__(self, name):
+        return self.connection.execute("SELECT 1 FROM songs WHERE name = ?", (name,)).fetchone() is not None
+
+    def page(self, after=0, limit=256, filter_text=""):
+        """
+        Returns the next page of songs in catalog order.
+
+        Args:
+            after (int): Cursor returned with the previous page; 0 starts from the beginning.
+            limit (int): Maximum number of songs to return.
+            filter_text (str): Only return songs whose name contains this text, ignoring case.
+
+        Returns:
+            tuple: (list of song names, cursor for the next page).
+        """
+        # Keyset pagination: each page starts where the last one ended instead of skipping rows with OFFSET
+        rows = self.connection.execute(
+            "SELECT id, name FROM songs WHERE id > ? AND instr(folded_name, ?) > 0 ORDER BY id LIMIT ?",
+            (after, filter_text.casefold(), limit),
+        ).fetchall()
+        return [name for _, name in rows], (rows[-1][0] if rows else after)
+
+    def chords(self, name):
+        """
+        Returns the chord progression of a song.
+
+        Args:
+            name (str): The song name.
+
+        Returns:
+            list: Chord symbols, or None if the song is not in the catalog.
+        """
+        row = self.connection.execute("SELECT progression FROM songs WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return None
+        symbols = self.symbols()
+        return [symbols[chord_id] for chord_id in np.frombuffer(row[0], dtype="<u4")]
+
+    def symbols(self):
+        """
+        Returns the interned chord table.
+
+        Returns:
+            list: Chord symbols indexed by chord id.
+        """
+        if self._symbols is None:
+            rows = self.connection.execute("SELECT id, symbol FROM chords ORDER BY id").fetchall()
+            self._symbols = [symbol for _, symbol in rows]
+        return self._symbols
+
+    def progression_arrays(self):
+        """
+        Returns every progression as interned chord ids, for bulk processing such as indexing.
+
+        Returns:
+            tuple: (song names, chord symbols indexed by id, uint32 chord ids of all songs
+            concatenated, int64 offsets of each song plus the total length).
+        """
+        names, blobs = [], []
+        for name, progression in self.connection.execute("SELECT name, progression FROM songs ORDER BY id"):
+            names.append(name)
+            blobs.append(progression)
+        ids = np.frombuffer(b"".join(blobs), dtype="<u4").astype(np.uint32)
+        offsets = np.zeros(len(blobs) + 1, dtype=np.int64)
+        np.cumsum([len(blob) // 4 for blob in blobs], out=offsets[1:])
+        return names, self.symbols(), ids, offsets
+
+    def fingerprint(self):
+        """
+        Returns a string that changes whenever the catalog's songs change, for caches of data derived from it.
+        """
+        stat = os.stat(self.path)
+        return f"sqlite:{os.path.abspath(self.path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+    def add_songs(self, songs):
+        """
+        Adds or replaces songs, interning any new chord symbols. Runs as one transaction.
+
+        Args:
+            songs (iterable): (song name, list of chord symbols) pairs.
+
+        Returns:
+            int: Number of songs written.
+
+        Raises:
+            ValueError: If a chord symbol is invalid; nothing from this call is kept.
+        """
+        symbols = self.symbols()
+        interned = {symbol: chord_id for chord_id, symbol in enumerate(symbols)}
+        new_symbols = []
+        rows = []
+        for name, chords in songs:
+            ids = []
+            for chord in chords:
+                if chord not in interned:
+                    parse_chord(chord)  # Reject invalid symbols before they reach the catalog
+                    interned[chord] = len(symbols) + len(new_symbols)
+                    new_symbols.append(chord)
+                ids.append(interned[chord])
+            rows.append((name, np.array(ids, dtype="<u4").tobytes(), name.casefold()))
+
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO chords (id, symbol) VALUES (?, ?)",
+                ((len(symbols) + offset, symbol) for offset, symbol in enumerate(new_symbols)),
+            )
+            self.connection.executemany(
+                "INSERT INTO songs (name, progression, folded_name) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET progression = excluded.progression",
+                rows,
+            )
+        symbols.extend(new_symbols)
+        return len(rows)
+
+
+def open_catalog(path=None, fallback=None):
+    """
+    Opens the song catalog the application should use.
+
+    Args:
+        path (str): SQLite catalog to open, which must exist; defaults to `default_catalog_path()`.
+        fallback (dict): Songs to serve from memory when the default catalog has not been created,
+            e.g. `popular_songs`.
+
+    Returns:
+        SqliteCatalog or DictCatalog: The catalog.
+
+    Raises:
+        FileNotFoundError: If `path` is given and does not exist.
+    """
+    if path is not None:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Catalog not found: {path}")
+        return SqliteCatalog(path)
+    path = default_catalog_path()
+    if os.path.exists(path) or fallback is None:
+        return SqliteCatalog(path)
+    return DictCatalog(fallback)
+
+
+def split_chords(text):
+    """
+    Splits a chord progression written as text, e.g. "C G Am F" or "C - G - Am - F".
+
+    Args:
+        text (str): The progression.
+
+    Returns:
+        list: Chord symbols.
+    """
+    return text.replace(",", " ").replace("->", " ").replace(" - ", " ").split()
+
+
+def read_song_list(source_path):
+    """
+    Reads songs from a CSV or JSON song list.
+
+    CSV files need `name` and `chords` columns, with the chords separated by spaces.
+    JSON files hold either an object mapping names to chord lists (the `popular_songs` layout)
+    or a list of objects with `name` and `chords` fields.
+
+    Args:
+        source_path (str): Path of the .csv or .json file.
+
+    Yields:
+        tuple: (song name, list of chord symbols).
+
+    Raises:
+        ValueError: If the file type or layout is not supported.
+    """
+    extension = os.path.splitext(source_path)[1].lower()
+    if extension == ".csv":
+        with open(source_path, newline="", encoding="utf-8") as csv_file:
+            reader = csv.DictReader(csv_file)
+            if not {"name", "chords"} <= set(reader.fieldnames or ()):
+                raise ValueError(f"{source_path} needs 'name' and 'chords' columns")
+            for row in reader:
+                yield row["name"], split_chords(row["chords"])
+    elif extension == ".json":
+        with open(source_path, encoding="utf-8") as json_file:
+            songs = json.load(json_file)
+        if isinstance(songs, dict):
+            songs = ({"name": name, "chords": chords} for name, chords in songs.items())
+        for song in songs:
+            if not isinstance(song, dict) or not {"name", "chords"} <= set(song):
+                raise ValueError(f"{source_path}: every song needs 'name' and 'chords' fields")
+            chords = song["chords"]
+            yield song["name"], split_chords(chords) if isinstance(chords, str) else list(chords)
+    else:
+        raise ValueError(f"Unsupported song list '{source_path}', expected .csv or .json")
+
+
+def import_songs(source_path, catalog_path=None, progress=None):
+    """
+    Imports a CSV or JSON song list into a SQLite catalog, in batches of `IMPORT_BATCH_SIZE` songs.
+
+    Args:
+        source_path (str): Path of the .csv or .json song list (see `read_song_list`).
+        catalog_path (str): Catalog to write; defaults to `default_catalog_path()`.
+        progress (callable): Called as progress(songs_imported) after each batch.
+
+    Returns:
+        int: Number of songs imported.
+
+    Raises:
+        ValueError: If the song list is malformed or holds an invalid chord symbol.
+    """
+    catalog = SqliteCatalog(catalog_path or default_catalog_path())
+    imported = 0
+    batch = []
+    try:
+        for song in read_song_list(source_path):
+            batch.append(song)
+            if len(batch) == IMPORT_BATCH_SIZE:
+                imported += catalog.add_songs(batch)
+                batch = []
+                if progress:
+                    progress(imported)
+        if batch:
+            imported += catalog.add_songs(batch)
+            if progress:
+                progress(imported)
+    finally:
+        catalog.close()
+    return imported
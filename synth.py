@@ -0,0 +1,236 @@
+from functools import lru_cache
+import io
+import wave
+
+import numpy as np
+
+from chord_theory import chord_voicing
+import tracing
+
+# Output sample rate in Hz
+SAMPLE_RATE = 44100
+
+# MIDI ticks per beat, matching the files written by `build_midi`
+TICKS_PER_BEAT = 480
+
+# Relative amplitudes of the harmonics in each note's wavetable (a soft, organ-like tone)
+HARMONICS = (1.0, 0.5, 0.25, 0.125)
+
+# Peak amplitude of a full-velocity note; five-note voicings sum to at most 1.0, so nothing clips
+NOTE_GAIN = 0.2
+
+# Attack, decay and release in seconds, and sustain level, of the note envelope
+ADSR = (0.01, 0.08, 0.7, 0.12)
+
+
+def chord_frames(tempo=None, duration=TICKS_PER_BEAT, sample_rate=SAMPLE_RATE):
+    """
+    Returns the length of one chord in samples.
+
+    Args:
+        tempo (float): Tempo in beats per minute; 120 when None, like MIDI.
+        duration (int): Chord length in ticks (480 ticks per beat).
+        sample_rate (int): Sample rate in Hz.
+
+    Returns:
+        int: Number of samples per chord.
+    """
+    seconds = duration / TICKS_PER_BEAT * 60.0 / (tempo or 120.0)
+    return int(round(seconds * sample_rate))
+
+
+@lru_cache(maxsize=1024)
+def pitch_wavetable(pitch, frames, sample_rate=SAMPLE_RATE):
+    """
+    Returns the precomputed tone of one MIDI pitch, `frames` samples long.
+
+    Args:
+        pitch (int): MIDI note number.
+        frames (int): Length in samples.
+        sample_rate (int): Sample rate in Hz.
+
+    Returns:
+        numpy.ndarray: Read-only float32 samples in [-1, 1].
+    """
+    frequency = 440.0 * 2.0 ** ((pitch - 69) / 12.0)
+    phase = 2.0 * np.pi * frequency * np.arange(frames) / sample_rate
+    tone = sum(amplitude * np.sin(phase * (index + 1)) for index, amplitude in enumerate(HARMONICS))
+    tone = (tone / sum(HARMONICS)).astype(np.float32)
+    tone.flags.writeable = False  # Shared between callers through the cache
+    return tone
+
+
+@lru_cache(maxsize=64)
+def adsr_envelope(frames, sample_rate=SAMPLE_RATE):
+    """
+    Returns the attack/decay/sustain/release envelope for a note of `frames` samples.
+
+    Args:
+        frames (int): Length in samples.
+        sample_rate (int): Sample rate in Hz.
+
+    Returns:
+        numpy.ndarray: Read-only float32 gains in [0, 1].
+    """
+    attack, decay, sustain, release = ADSR
+    attack, decay, release = (max(int(seconds * sample_rate), 1) for seconds in (attack, decay, release))
+    # Very short notes scale the fixed segments down to fit
+    scale = min(1.0, frames / (attack + decay + release))
+    attack, decay, release = (max(int(length * scale), 1) for length in (attack, decay, release))
+    hold = max(frames - attack - decay - release, 0)
+
+    envelope = np.concatenate([
+        np.linspace(0.0, 1.0, attack, endpoint=False),
+        np.linspace(1.0, sustain, decay, endpoint=False),
+        np.full(hold, sustain),
+        np.linspace(sustain, 0.0, release),
+    ])[:frames].astype(np.float32)
+    envelope = np.pad(envelope, (0, frames - len(envelope)))
+    envelope.flags.writeable = False
+    return envelope
+
+
+@lru_cache(maxsize=1024)
+def chord_samples(symbol, frames, velocity=64, sample_rate=SAMPLE_RATE):
+    """
+    Returns the enveloped float32 samples of one chord.
+
+    Args:
+        symbol (str): Chord symbol, e.g. "Am7".
+        frames (int): Length in samples.
+        velocity (int): MIDI velocity (0-127).
+        sample_rate (int): Sample rate in Hz.
+
+    Returns:
+        numpy.ndarray: Read-only float32 samples.
+
+    Raises:
+        ValueError: If the chord symbol is invalid.
+    """
+    samples = np.zeros(frames, dtype=np.float32)
+    for pitch in chord_voicing(symbol):
+        samples += pitch_wavetable(pitch, frames, sample_rate)
+    samples *= adsr_envelope(frames, sample_rate) * (NOTE_GAIN * velocity / 127.0)
+    samples.flags.writeable = False
+    return samples
+
+
+@tracing.traced("synth.render")
+def render_progression(chords, tempo=None, velocity=64, duration=TICKS_PER_BEAT, sample_rate=SAMPLE_RATE, **_):
+    """
+    Renders a chord progression directly to 16-bit mono PCM, without a MIDI synth.
+
+    Args:
+        chords (list): Chord symbols, as passed to `create_midi`/`create_song_midi`.
+        tempo (float): Tempo in beats per minute; 120 when None.
+        velocity (int): MIDI velocity (0-127).
+        duration (int): Chord length in ticks (480 ticks per beat).
+        sample_rate (int): Sample rate in Hz.
+        **_: Other MIDI render parameters (e.g. instrument) are accepted and ignored.
+
+    Returns:
+        numpy.ndarray: int16 samples.
+
+    Raises:
+        ValueError: If a chord symbol is invalid.
+    """
+    return render_batch([chords], tempo, velocity, duration, sample_rate)[0]
+
+
+def render_batch(progressions, tempo=None, velocity=64, duration=TICKS_PER_BEAT, sample_rate=SAMPLE_RATE):
+    """
+    Renders many progressions at once. Each distinct chord is synthesized once and the
+    progressions are assembled with a single gather.
+
+    Args:
+        progressions (list): Lists of chord symbols.
+        tempo (float): Tempo in beats per minute; 120 when None.
+        velocity (int): MIDI velocity (0-127).
+        duration (int): Chord length in ticks (480 ticks per beat).
+        sample_rate (int): Sample rate in Hz.
+
+    Returns:
+        numpy.ndarray: int16 array of shape (len(progressions), samples), silence-padded to the longest progression.
+
+    Raises:
+        ValueError: If a chord symbol is invalid.
+    """
+    frames = chord_frames(tempo, duration, sample_rate)
+    symbols = sorted({chord for chords in progressions for chord in chords})
+    # Row 0 is silence, used to pad shorter progressions
+    table = np.zeros((len(symbols) + 1, frames), dtype=np.int16)
+    for row, symbol in enumerate(symbols, start=1):
+        table[row] = np.round(chord_samples(symbol, frames, velocity, sample_rate) * 32767)
+
+    index = {symbol: row for row, symbol in enumerate(symbols, start=1)}
+    longest = max((len(chords) for chords in progressions), default=0)
+    rows = np.zeros((len(progressions), longest), dtype=np.intp)
+    for position, chords in enumerate(progressions):
+        rows[position, :len(chords)] = [index[chord] for chord in chords]
+    return table[rows].reshape(len(progressions), longest * frames)
+
+
+def to_wav_bytes(pcm, sample_rate=SAMPLE_RATE):
+    """
+    Encodes 16-bit mono PCM as WAV file bytes.
+
+    Args:
+        pcm (numpy.ndarray): int16 samples.
+        sample_rate (int): Sample rate in Hz.
+
+    Returns:
+        bytes: The WAV file.
+    """
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(np.asarray(pcm, dtype="<i2").tobytes())
+    return buffer.getvalue()
+
+
+def render_wav(chords, **params):
+    """
+    Renders a chord progression straight to WAV file bytes.
+
+    Args:
+        chords (list): Chord symbols.
+        **params: Render parameters passed to `render_progression`.
+
+    Returns:
+        bytes: The WAV file.
+    """
+    return to_wav_bytes(render_progression(chords, **params), params.get("sample_rate", SAMPLE_RATE))
+
+
+def render_pcm(chords, **params):
+    """
+    Renders a chord progression to raw 16-bit little-endian mono samples, e.g. for `RenderCache`,
+    which stores bytes; `numpy.frombuffer(data, dtype="<i2")` turns them back into samples.
+
+    Args:
+        chords (list): Chord symbols.
+        **params: Render parameters passed to `render_progression`.
+
+    Returns:
+        bytes: The samples.
+    """
+    return np.asarray(render_progression(chords, **params), dtype="<i2").tobytes()
+
+
+def write_wav(chords, output_path, **params):
+    """
+    Renders a chord progression to a WAV file.
+
+    Args:
+        chords (list): Chord symbols.
+        output_path (str): Path of the WAV file to write.
+        **params: Render parameters passed to `render_progression`.
+
+    Returns:
+        str: The output path.
+    """
+    with open(output_path, "wb") as wav_file:
+        wav_file.write(render_wav(chords, **params))
+    return output_path
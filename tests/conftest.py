@@ -0,0 +1,43 @@
+import os
+import shutil
+import sys
+import wave
+
+import numpy as np
+import pytest
+
+# The modules live at the repository root, which is not a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+requires_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg is not installed")
+
+
+def write_sine_wav(path, seconds, sample_rate=44100, channels=2, sample_width=2, frequency=440.0):
+    """
+    Writes a sine-wave WAV file of any sample width, as synthetic test input.
+    """
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    wave_form = np.sin(2 * np.pi * frequency * t) * 0.5
+    if sample_width == 1:
+        samples = (wave_form * 127 + 128).astype(np.uint8).tobytes()
+    elif sample_width == 3:
+        samples = (wave_form * (2 ** 23 - 1)).astype("<i4").view(np.uint8).reshape(-1, 4)[:, :3].tobytes()
+    else:
+        samples = (wave_form * (2 ** (8 * sample_width - 1) - 1)).astype(f"<i{sample_width}").tobytes()
+    frames = np.frombuffer(samples, dtype=np.uint8).reshape(-1, sample_width)
+    with wave.open(str(path), "wb") as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(sample_width)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(np.repeat(frames, channels, axis=0).tobytes())
+    return str(path)
+
+
+@pytest.fixture
+def sine_wav(tmp_path):
+    """
+    Factory writing sine WAVs into the test's temporary directory: sine_wav(seconds, **options).
+    """
+    def make(seconds, name="sine.wav", **options):
+        return write_sine_wav(tmp_path / name, seconds, **options)
+    return make
@@ -0,0 +1,23 @@
+import pytest
+
+from chord_theory import chord_voicing
+
+
+@pytest.mark.parametrize("symbol, pitches", [
+    ("C", (60, 64, 67)),
+    ("Am", (69, 72, 76)),
+    ("Bdim", (71, 74, 77)),
+    ("Em7", (64, 67, 71, 74)),
+    ("F#m7b5", (66, 69, 72, 76)),
+    ("C6/9", (60, 64, 67, 69, 74)),
+    ("Am6/9", (69, 72, 76, 78, 83)),
+    ("C6/9/E", (52, 60, 64, 67, 69, 74)),
+    ("G/B", (59, 67, 71, 74)),
+])
+def test_voicings(symbol, pitches):
+    assert chord_voicing(symbol) == pitches
+
+
+def test_invalid_symbol_is_rejected():
+    with pytest.raises(ValueError):
+        chord_voicing("H7")
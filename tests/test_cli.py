@@ -0,0 +1,31 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from cli import build_parser, main
+
+
+@pytest.mark.parametrize("count", ["0", "-3", "two"])
+def test_generate_rejects_counts_below_one(count, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        build_parser().parse_args(["generate", "C Major", "--count", count, "--midi", "out.mid"])
+    assert exit_info.value.code == 2
+    assert "--count" in capsys.readouterr().err
+
+
+def test_start_up_skips_the_heavy_modules():
+    # Build pipelines only pay for what the chosen command uses, see the note at the top of cli.py
+    code = ("import sys, cli; print(' '.join(sorted({name.split('.')[0] for name in sys.modules} & "
+            "{'PyQt5', 'pygame', 'pydub', 'mido', 'numpy'})))")
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout
+    assert output.split() == []
+
+
+def test_generate_writes_the_first_progression(tmp_path, capsys):
+    midi_path = tmp_path / "out.mid"
+    assert main(["generate", "C Major", "--count", "3", "--midi", str(midi_path)]) == 0
+    assert len(capsys.readouterr().out.splitlines()) == 4  # Three progressions and the saved line
+    assert midi_path.stat().st_size > 0
@@ -0,0 +1,19 @@
+import numpy as np
+
+from bulk_generation import generate_progressions, save_progressions
+from markov_generation import MarkovModel, generate_markov_progressions
+from popular_songs import popular_songs
+from song_catalog import DictCatalog
+
+
+def test_bulk_generation_is_reproducible_from_seed(tmp_path):
+    progressions = generate_progressions(1000, length=6, replace=True, seed=0)
+    assert np.array_equal(progressions, generate_progressions(1000, length=6, replace=True, seed=0))
+    path = save_progressions(str(tmp_path / "progressions.npy"), 1000, length=6, replace=True, seed=0)
+    assert np.array_equal(progressions, np.load(path, mmap_mode="r"))
+
+
+def test_markov_generation_is_reproducible_from_seed():
+    model = MarkovModel.from_catalog(DictCatalog(popular_songs))
+    first = generate_markov_progressions(1000, length=6, model=model, seed=0)
+    assert np.array_equal(first, generate_markov_progressions(1000, length=6, model=model, seed=0))
@@ -0,0 +1,57 @@
+import subprocess
+import threading
+
+from audio_conversion import multi_export, parse_export_target
+from conftest import requires_ffmpeg
+
+# Longest a multi_export call may take before the test counts it as hung
+TIMEOUT_SECONDS = 60
+
+
+def run_with_timeout(*args, **kwargs):
+    results = []
+    thread = threading.Thread(target=lambda: results.append(multi_export(*args, **kwargs)), daemon=True)
+    thread.start()
+    thread.join(TIMEOUT_SECONDS)
+    assert not thread.is_alive(), "multi_export hung"
+    return results[0]
+
+
+@requires_ffmpeg
+def test_exports_every_target(sine_wav):
+    results = run_with_timeout(sine_wav(1), ["mp3:128k", "wav", "flac"])
+    assert [result.success for result in results] == [True, True, True]
+    assert [result.output.rsplit(".", 1)[1] for result in results] == ["mp3", "wav", "flac"]
+
+
+def decoded_pcm(path):
+    from pydub import AudioSegment
+
+    return subprocess.run([AudioSegment.converter, "-loglevel", "error", "-i", path, "-f", "s16le", "-"],
+                          capture_output=True, check=True).stdout
+
+
+@requires_ffmpeg
+def test_shared_decode_matches_one_target_at_a_time(sine_wav):
+    source = sine_wav(2)
+    shared = run_with_timeout(source, ["wav", "flac"], template="{dir}/shared/{name}{tag}.{format}")
+    for result in shared:
+        target = parse_export_target(result.output.rsplit(".", 1)[1])
+        [single] = run_with_timeout(source, [target], template="{dir}/single/{name}{tag}.{format}")
+        assert result.success and single.success
+        assert decoded_pcm(result.output) == decoded_pcm(single.output)
+
+
+@requires_ffmpeg
+def test_encoder_failing_after_its_input_does_not_hang(sine_wav):
+    # ffmpeg rejects the bitrate only once it has read the whole short input
+    results = run_with_timeout(sine_wav(0.5), ["mp3:128k", "mp3:notabitrate"])
+    assert results[0].success
+    assert not results[1].success and results[1].error
+
+
+@requires_ffmpeg
+def test_encoder_failing_mid_stream_does_not_stall_the_others(sine_wav):
+    results = run_with_timeout(sine_wav(10), ["mp3:notabitrate", "wav"], chunk_size=64 * 1024)
+    assert not results[0].success
+    assert results[1].success
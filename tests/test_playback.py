@@ -0,0 +1,44 @@
+import time
+import wave
+
+import numpy as np
+
+from playback import FileSink, NullSink, PlaybackEngine
+from synth import render_progression
+
+PROGRESSIONS = [["C", "Am", "F", "G"], ["Dm", "G", "C"], ["Em7", "A7", "Dmaj7"]]
+
+
+def wait_until_idle(engine, timeout=30):
+    deadline = time.monotonic() + timeout
+    while engine.is_playing():
+        assert time.monotonic() < deadline, "playback did not finish"
+        time.sleep(0.01)
+
+
+def test_queued_progressions_play_without_gaps(tmp_path):
+    path = str(tmp_path / "queue.wav")
+    # Paced like a sound card, so the later progressions are queued while the first still plays
+    engine = PlaybackEngine(FileSink(path, realtime=True))
+    for chords in PROGRESSIONS:
+        engine.enqueue(chords, tempo=480)
+    wait_until_idle(engine)
+    engine.close()
+
+    with wave.open(path, "rb") as wav_file:
+        played = np.frombuffer(wav_file.readframes(wav_file.getnframes()), dtype="<i2")
+    expected = np.concatenate([render_progression(chords, tempo=480) for chords in PROGRESSIONS])
+    assert np.array_equal(played[:len(expected)], expected)
+    assert not played[len(expected):].any()  # Only silence padding the last block
+
+
+def test_play_replaces_the_queue():
+    engine = PlaybackEngine(NullSink(realtime=False))
+    engine.enqueue(PROGRESSIONS[0])
+    engine.enqueue(PROGRESSIONS[1])
+    engine.play(PROGRESSIONS[2])
+    assert [track.chords for track in engine.queue] == [PROGRESSIONS[2]]
+    wait_until_idle(engine)
+    stats = engine.stats()
+    engine.close()
+    assert stats["blocks_played"] > 0
@@ -0,0 +1,41 @@
+import numpy as np
+
+from chord_theory import chord_intervals
+from progression_index import ProgressionIndex, normalize_progression, quality_codes
+
+PITCH_NAMES = ["C", "C#", "D", "Eb", "E", "F", "F#", "G", "Ab", "A", "Bb", "B"]
+SUFFIXES = ["", "m", "7", "m7", "maj7", "dim"]
+
+
+def scan(index, chords):
+    """
+    Finds the songs containing a progression in any key by comparing it against every position.
+    """
+    first_quality, query = normalize_progression(chords)
+    candidates = len(index.qualities) - len(query)
+    matches = index.qualities[:candidates] == first_quality
+    for position, token in enumerate(query):
+        matches &= index.tokens[position + 1:position + 1 + candidates] == token
+    return np.unique(np.searchsorted(index.offsets, np.flatnonzero(matches), side="right") - 1)
+
+
+def test_index_agrees_with_a_full_scan():
+    rng = np.random.default_rng(0)
+    songs = 500
+    codes = np.array([quality_codes[chord_intervals[suffix]] for suffix in SUFFIXES], dtype=np.uint16)
+    lengths = rng.integers(4, 9, size=songs)
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    roots = rng.integers(0, 12, size=offsets[-1])
+    kinds = rng.choice(len(SUFFIXES), size=offsets[-1])
+    index = ProgressionIndex([f"Song {number}" for number in range(songs)], roots, codes[kinds], offsets)
+
+    # Sub-sequences of catalog songs shifted to a random key, so every query has a hit
+    for song in rng.integers(0, songs, size=200):
+        length = int(rng.integers(2, min(6, lengths[song]) + 1))
+        first = offsets[song] + int(rng.integers(0, lengths[song] - length + 1))
+        shift = int(rng.integers(0, 12))
+        chords = [PITCH_NAMES[(roots[position] + shift) % 12] + SUFFIXES[kinds[position]]
+                  for position in range(first, first + length)]
+        found = index.song_ids(chords)
+        assert song in found
+        assert np.array_equal(found, scan(index, chords))
@@ -0,0 +1,33 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from render_cache import RenderCache, render_key
+
+CHORDS = ["C", "Am", "F", "G"]
+
+
+def test_key_ignores_int_or_float_spelling():
+    assert render_key("midi", CHORDS, tempo=120) == render_key("midi", CHORDS, tempo=120.0)
+    assert render_key("midi", CHORDS, tempo=120) != render_key("midi", CHORDS, tempo=120.5)
+    assert render_key("midi", CHORDS, tempo=120) != render_key("wav", CHORDS, tempo=120)
+
+
+def test_int_and_float_params_share_a_render(tmp_path):
+    cache = RenderCache(str(tmp_path))
+    calls = []
+
+    def render(chords, **params):
+        calls.append(params)
+        return b"rendered"
+
+    cache.get_or_render("midi", CHORDS, render, tempo=120)
+    cache.get_or_render("midi", CHORDS, render, tempo=120.0)
+    assert len(calls) == 1
+
+
+def test_concurrent_writes_count_each_file_once(tmp_path):
+    cache = RenderCache(str(tmp_path))
+    data = b"x" * 4096
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda _: cache._write_disk("same", data), range(64)))
+    assert cache._disk_bytes == len(data)
+    assert [path.name for path in tmp_path.iterdir()] == ["same.bin"]
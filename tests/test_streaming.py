@@ -0,0 +1,86 @@
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from audio_conversion import convert_file
+from conftest import requires_ffmpeg
+
+# A 5 minute 44.1 kHz stereo WAV is about 50 MiB, which the in-memory path holds at least twice
+LONG_SECONDS = 5 * 60
+
+# Peak RSS streaming may add over an interpreter that only imported the module
+STREAMING_BUDGET_MIB = 24
+
+requires_ffprobe = pytest.mark.skipif(shutil.which("ffprobe") is None,
+                                      reason="pydub needs ffprobe to read anything but WAV")
+
+
+def peak_rss_mib(code, *args):
+    """
+    Runs `code` in a fresh interpreter from the repository root and returns its peak RSS in MiB.
+    The child reports VmHWM itself: on Linux the ru_maxrss of a forked child starts from the
+    parent's peak, which would hide anything the child does below pytest's own footprint.
+    """
+    report = "\nprint(next(line.split()[1] for line in open('/proc/self/status') if line.startswith('VmHWM:')))"
+    output = subprocess.run([sys.executable, "-c", code + report, *args], capture_output=True, text=True,
+                            check=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout
+    return int(output.split()[-1]) / 1024  # VmHWM is in KiB
+
+
+def decoded_pcm(path):
+    from pydub import AudioSegment
+
+    return subprocess.run([AudioSegment.converter, "-loglevel", "error", "-i", path, "-f", "s16le", "-"],
+                          capture_output=True, check=True).stdout
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/status"), reason="reads VmHWM from Linux /proc")
+def test_streaming_peak_rss_is_bounded(sine_wav, tmp_path):
+    source = sine_wav(LONG_SECONDS, name="long.wav")
+    baseline = peak_rss_mib("import audio_conversion")
+    streaming = peak_rss_mib(
+        "import sys; from audio_conversion import convert_file; "
+        "result = convert_file(sys.argv[1], 'wav', 'wav', output_dir=sys.argv[2], streaming=True); "
+        "result.success or sys.exit(result.error)",
+        source, str(tmp_path / "stream"))
+
+    assert os.path.getsize(tmp_path / "stream" / "long.wav") == os.path.getsize(source)
+    assert streaming - baseline < STREAMING_BUDGET_MIB
+
+
+@requires_ffmpeg
+@pytest.mark.parametrize("sample_width", [1, 2, 3, 4])
+def test_wav_to_wav_matches_pydub(sine_wav, tmp_path, sample_width):
+    source = sine_wav(1.5, sample_width=sample_width)
+    memory = convert_file(source, "wav", "wav", output_dir=str(tmp_path / "memory"))
+    stream = convert_file(source, "wav", "wav", output_dir=str(tmp_path / "stream"), streaming=True)
+
+    assert memory.success and stream.success
+    with open(memory.output, "rb") as expected, open(stream.output, "rb") as actual:
+        assert actual.read() == expected.read()
+
+
+@requires_ffmpeg
+@pytest.mark.parametrize("target_format", ["mp3", "flac"])
+def test_wav_to_encoded_matches_pydub(sine_wav, tmp_path, target_format):
+    source = sine_wav(1.5)
+    memory = convert_file(source, "wav", target_format, output_dir=str(tmp_path / "memory"))
+    stream = convert_file(source, "wav", target_format, output_dir=str(tmp_path / "stream"), streaming=True)
+
+    assert memory.success and stream.success
+    assert decoded_pcm(stream.output) == decoded_pcm(memory.output)
+
+
+@requires_ffmpeg
+@requires_ffprobe
+def test_mp3_to_wav_matches_pydub(sine_wav, tmp_path):
+    source = convert_file(sine_wav(1.5), "wav", "mp3", output_dir=str(tmp_path)).output
+    memory = convert_file(source, "mp3", "wav", output_dir=str(tmp_path / "memory"))
+    stream = convert_file(source, "mp3", "wav", output_dir=str(tmp_path / "stream"), streaming=True)
+
+    assert memory.success and stream.success
+    with open(memory.output, "rb") as expected, open(stream.output, "rb") as actual:
+        assert actual.read() == expected.read()
@@ -0,0 +1,33 @@
+import json
+
+import pytest
+
+import tracing
+from chord_generation import generate_random_chords
+
+
+@pytest.fixture
+def clean_tracing():
+    was_enabled = tracing.is_enabled()
+    tracing.reset()
+    yield
+    tracing.enable(was_enabled)
+    tracing.reset()
+
+
+def test_spans_are_recorded_and_exported_while_enabled(clean_tracing, tmp_path):
+    tracing.enable()
+    for _ in range(5):
+        generate_random_chords("C Major")
+    assert tracing.snapshot()["histograms"]["generate.random"]["count"] == 5
+
+    path = tmp_path / "trace.json"
+    tracing.write_trace(str(path))
+    events = json.loads(path.read_text())["traceEvents"]
+    assert sum(event["name"] == "generate.random" for event in events) == 5
+
+
+def test_nothing_is_recorded_while_disabled(clean_tracing):
+    tracing.enable(False)
+    generate_random_chords("C Major")
+    assert "generate.random" not in tracing.snapshot()["histograms"]
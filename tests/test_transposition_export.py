@@ -0,0 +1,20 @@
+import zipfile
+
+from song_catalog import DictCatalog
+from transposition_export import export_transpositions, song_folders
+
+
+def test_flattened_names_get_distinct_folders():
+    assert song_folders(["AC/DC", "AC_DC", "ac_dc", "Back\\Slash"]) == ["AC_DC", "AC_DC (2)", "ac_dc (3)",
+                                                                       "Back_Slash"]
+
+
+def test_zip_keeps_every_song(tmp_path):
+    catalog = DictCatalog({"AC/DC": ["A", "D", "E"], "AC_DC": ["C", "F", "G"]})
+    archive = tmp_path / "transpositions.zip"
+    written = export_transpositions(catalog, str(archive), shifts=(0, 2))
+
+    with zipfile.ZipFile(archive) as zip_file:
+        names = zip_file.namelist()
+    assert written == len(names) == len(set(names)) == 4
+    assert {name.split("/")[0] for name in names} == {"AC_DC", "AC_DC (2)"}
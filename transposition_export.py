@@ -0,0 +1,264 @@
+import os
+import struct
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from chord_theory import chord_voicing
+from synth import TICKS_PER_BEAT
+
+# Semitone shifts giving all 12 keys, kept within a tritone of the original so voicings stay in register
+TRANSPOSITIONS = tuple(range(-5, 7))
+
+# Songs handed to a worker process at a time by `export_transpositions`
+TASK_SONGS = 1024
+
+# Below this many songs the export runs in-process, since starting workers would cost more than it saves
+POOL_MIN_SONGS = 4 * TASK_SONGS
+
+# A Standard MIDI File header stores its track count in 16 bits
+MAX_SMF_TRACKS = 0xFFFF
+
+# Timestamp of every zip entry, so the same catalog always gives the same archive
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+END_OF_TRACK = b"\x00\xff\x2f\x00"
+
+
+def voicing_table(symbols):
+    """
+    Voices every chord symbol once, as a padded integer pitch array.
+
+    Args:
+        symbols (list): Chord symbols.
+
+    Returns:
+        tuple: (int16 array of shape (symbols, notes) padded with -1, int64 note count of each symbol).
+
+    Raises:
+        ValueError: If a symbol is invalid.
+    """
+    voicings = [chord_voicing(symbol) for symbol in symbols]
+    counts = np.array([len(voicing) for voicing in voicings], dtype=np.int64)
+    pitches = np.full((len(voicings), counts.max(initial=1)), -1, dtype=np.int16)
+    for row, voicing in enumerate(voicings):
+        pitches[row, :len(voicing)] = voicing
+    return pitches, counts
+
+
+def transpose_voicings(pitches, shifts=TRANSPOSITIONS):
+    """
+    Transposes a voicing table into several keys at once.
+
+    Args:
+        pitches (numpy.ndarray): Table from `voicing_table`, padded with -1.
+        shifts (sequence): Semitones to move by, one output key each.
+
+    Returns:
+        numpy.ndarray: int16 array of shape (len(shifts), symbols, notes), padding kept at -1.
+
+    Raises:
+        ValueError: If a transposed note leaves the MIDI range 0-127.
+    """
+    shifted = pitches[None, :, :] + np.asarray(shifts, dtype=np.int16)[:, None, None]
+    shifted = np.where(pitches >= 0, shifted, -1)
+    if ((shifted < 0) & (pitches >= 0)).any() or (shifted > 127).any():
+        raise ValueError("Transposition moves a note outside the MIDI range 0-127")
+    return shifted
+
+
+def _vlq(value):
+    """
+    Encodes a MIDI variable-length quantity.
+    """
+    encoded = [value & 0x7F]
+    value >>= 7
+    while value:
+        encoded.append(0x80 | (value & 0x7F))
+        value >>= 7
+    return bytes(reversed(encoded))
+
+
+def _chord_events(pitches, velocity, duration):
+    """
+    Encodes one chord exactly as mido saves `build_midi`'s messages: every note on at once, then each
+    note off `duration` ticks after the previous one, using running status after the first of each.
+    """
+    delay = _vlq(duration)
+    events = bytearray()
+    for index, pitch in enumerate(pitches):
+        events += (b"\x00\x90" if index == 0 else b"\x00") + bytes((pitch, velocity))
+    for index, pitch in enumerate(pitches):
+        events += delay + (b"\x80" if index == 0 else b"") + bytes((pitch, velocity))
+    return bytes(events)
+
+
+def _track_prelude(tempo=None, instrument=None):
+    """
+    Encodes the tempo and program change that `build_midi` puts before the first chord.
+    """
+    prelude = b""
+    if tempo is not None:
+        from mido import bpm2tempo
+
+        prelude += b"\x00\xff\x51\x03" + bpm2tempo(tempo).to_bytes(3, "big")
+    if instrument is not None:
+        prelude += bytes((0, 0xC0, instrument))
+    return prelude
+
+
+def _chunk(kind, body):
+    return kind + struct.pack(">I", len(body)) + body
+
+
+# The single-track file header `build_midi` files are saved with (format 1, one track)
+SINGLE_TRACK_HEADER = _chunk(b"MThd", struct.pack(">HHH", 1, 1, TICKS_PER_BEAT))
+
+# Per-process state of the workers: the encoded chord blocks of every (shift, symbol), the track
+# prelude, and whether to return complete MIDI files or bare track bodies
+_worker_blocks = None
+_worker_prelude = None
+_worker_files = False
+
+
+def _init_worker(blocks, prelude, files):
+    global _worker_blocks, _worker_prelude, _worker_files
+    _worker_blocks = blocks
+    _worker_prelude = prelude
+    _worker_files = files
+
+
+def _render_tracks(ids, offsets):
+    """
+    Joins the chord blocks of a run of songs into tracks, all keys of a song in a row.
+    """
+    tracks = []
+    for song in range(len(offsets) - 1):
+        song_ids = ids[offsets[song]:offsets[song + 1]].tolist()
+        for blocks in _worker_blocks:
+            body = _worker_prelude + b"".join([blocks[chord_id] for chord_id in song_ids]) + END_OF_TRACK
+            tracks.append(SINGLE_TRACK_HEADER + _chunk(b"MTrk", body) if _worker_files else body)
+    return tracks
+
+
+def song_folders(names):
+    """
+    Returns the archive folder of each song: its name with path separators replaced by "_", and
+    " (2)", " (3)"... added where that would give two songs the same folder (e.g. "AC/DC" and
+    "AC_DC"), ignoring case so the archive also extracts cleanly on case-insensitive file systems.
+    """
+    taken = set()
+    folders = []
+    for name in names:
+        base = name.replace("/", "_").replace("\\", "_")
+        folder, number = base, 1
+        while folder.casefold() in taken:
+            number += 1
+            folder = f"{base} ({number})"
+        taken.add(folder.casefold())
+        folders.append(folder)
+    return folders
+
+
+def entry_name(folder, shift):
+    """
+    Returns the archive path of one transposition of a song, e.g. "Let It Be (The Beatles)/+2.mid".
+    """
+    return f"{folder}/{shift:+d}.mid"
+
+
+def export_transpositions(catalog, output, archive=None, shifts=TRANSPOSITIONS, workers=None, progress=None,
+                          **params):
+    """
+    Transposes every song of a catalog into several keys and streams the MIDI into one archive.
+
+    Each distinct chord symbol is voiced once and transposed into every key as an integer array, and
+    each transposed chord is encoded to MIDI events once; worker processes then only join those blocks
+    into tracks, which are written to the archive as they arrive, with no temporary files. Every file
+    is byte-identical to what `render_midi` gives for the same pitches.
+
+    Args:
+        catalog (SqliteCatalog or DictCatalog): The songs (see `song_catalog`).
+        output (str or file): Path or writable binary file of the archive.
+        archive (str): "zip" for one MIDI file per song and key, or "smf" for a single format-2 MIDI
+            file with one named track per song and key; defaults from the extension of `output`.
+        shifts (sequence): Semitones to transpose by; the default gives all 12 keys.
+        workers (int): Worker processes; defaults to the number of CPU cores, and small catalogs run in-process.
+        progress (callable): Called as progress(songs done, total songs) as tracks are written.
+        **params: Render parameters as for `build_midi` (tempo, velocity, duration, instrument).
+
+    Returns:
+        int: Number of tracks written.
+
+    Raises:
+        ValueError: If a chord symbol is invalid, a note leaves the MIDI range, or an SMF archive would
+            exceed the track limit of the format.
+    """
+    if archive is None:
+        path = output if isinstance(output, str) else getattr(output, "name", "")
+        archive = "smf" if os.path.splitext(str(path))[1].lower() in (".mid", ".midi") else "zip"
+    if archive not in ("zip", "smf"):
+        raise ValueError(f"Unknown archive type '{archive}'; use 'zip' or 'smf'")
+    names, symbols, ids, offsets = catalog.progression_arrays()
+    total_tracks = len(names) * len(shifts)
+    if archive == "smf" and total_tracks > MAX_SMF_TRACKS:
+        raise ValueError(f"{total_tracks:,} tracks do not fit in one MIDI file (at most {MAX_SMF_TRACKS:,}); "
+                         "export a zip archive instead")
+
+    velocity = params.get("velocity", 64)
+    duration = params.get("duration", TICKS_PER_BEAT)
+    pitches, counts = voicing_table(symbols)
+    transposed = transpose_voicings(pitches, shifts).tolist()
+    blocks = [[_chord_events(voicing[:count], velocity, duration) for voicing, count in zip(key, counts.tolist())]
+              for key in transposed]
+    prelude = _track_prelude(params.get("tempo"), params.get("instrument"))
+
+    tasks = [(start, min(start + TASK_SONGS, len(names))) for start in range(0, len(names), TASK_SONGS)]
+    task_args = [(ids[offsets[first]:offsets[last]], offsets[first:last + 1] - offsets[first]) for first, last in tasks]
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+
+    def rendered():
+        if workers <= 1 or len(names) < POOL_MIN_SONGS:
+            _init_worker(blocks, prelude, archive == "zip")
+            try:
+                for args in task_args:
+                    yield _render_tracks(*args)
+            finally:
+                _init_worker(None, None, False)
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(blocks, prelude, archive == "zip")) as pool:
+                # Results come back in task order, so the archive is the same whatever the worker count
+                yield from pool.map(_render_tracks, *zip(*task_args))
+
+    written = 0
+    if archive == "zip":
+        folders = song_folders(names)
+        with zipfile.ZipFile(output, "w", compression=zipfile.ZIP_DEFLATED) as zip_file:
+            for (first, last), files in zip(tasks, rendered()):
+                for index, midi_bytes in enumerate(files):
+                    song, key = divmod(index, len(shifts))
+                    entry = zipfile.ZipInfo(entry_name(folders[first + song], shifts[key]), ZIP_DATE_TIME)
+                    entry.compress_type = zipfile.ZIP_DEFLATED
+                    zip_file.writestr(entry, midi_bytes)
+                written += len(files)
+                if progress:
+                    progress(last, len(names))
+        return written
+
+    output_file = open(output, "wb") if isinstance(output, str) else output
+    try:
+        output_file.write(_chunk(b"MThd", struct.pack(">HHH", 2, total_tracks, TICKS_PER_BEAT)))
+        for (first, last), bodies in zip(tasks, rendered()):
+            for index, body in enumerate(bodies):
+                song, key = divmod(index, len(shifts))
+                title = f"{names[first + song]} ({shifts[key]:+d})".encode("utf-8")
+                output_file.write(_chunk(b"MTrk", b"\x00\xff\x03" + _vlq(len(title)) + title + body))
+            written += len(bodies)
+            if progress:
+                progress(last, len(names))
+    finally:
+        if isinstance(output, str):
+            output_file.close()
+    return written
@@ -0,0 +1,255 @@
+import os
+import struct
+
+import numpy as np
+
+# Frames summarized by each peak of the finest pyramid level
+BASE_BLOCK = 256
+
+# Blocks of one level merged into each peak of the next, coarser level
+LEVEL_FACTOR = 4
+
+# Frames read from the memory map at a time while building the pyramid
+BUILD_CHUNK_FRAMES = BASE_BLOCK * 4096
+
+# Bumped whenever the sidecar layout changes, so stale sidecars are rebuilt
+SIDECAR_VERSION = 1
+
+WAVE_FORMAT_PCM = 1
+WAVE_FORMAT_IEEE_FLOAT = 3
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+class WavFile:
+    """
+    WAV file whose samples are memory-mapped rather than loaded, so opening an hour-long
+    recording is instant and only the pages actually read are paged in.
+    """
+
+    def __init__(self, path):
+        """
+        Parses the RIFF header and maps the sample data.
+
+        Args:
+            path (str): Path of the WAV file.
+
+        Raises:
+            ValueError: If the file is not a PCM or float WAV file.
+        """
+        self.path = path
+        fmt, data_offset, data_size = self._read_chunks(path)
+        audio_format, self.channels, self.sample_rate, _, block_align, bits = struct.unpack("<HHIIHH", fmt[:16])
+        if audio_format == WAVE_FORMAT_EXTENSIBLE and len(fmt) >= 26:
+            audio_format = struct.unpack("<H", fmt[24:26])[0]  # First two bytes of the sub-format GUID
+        self.sample_width = bits // 8
+        if audio_format == WAVE_FORMAT_IEEE_FLOAT and bits == 32:
+            dtype = np.dtype("<f4")
+        elif audio_format == WAVE_FORMAT_PCM and self.sample_width in (1, 2, 3, 4):
+            dtype = {1: np.dtype("u1"), 2: np.dtype("<i2"), 3: np.dtype("u1"), 4: np.dtype("<i4")}[self.sample_width]
+        else:
+            raise ValueError(f"Unsupported WAV format in '{path}' (format {audio_format}, {bits} bits)")
+
+        self.frames = data_size // block_align
+        if self.sample_width == 3:  # No 24-bit dtype: map the raw bytes and widen on read
+            shape = (self.frames, self.channels, 3)
+        else:
+            shape = (self.frames, self.channels)
+        self.data = np.memmap(path, dtype=dtype, mode="r", offset=data_offset, shape=shape) if self.frames else \
+            np.zeros(shape, dtype=dtype)
+        self.float_samples = audio_format == WAVE_FORMAT_IEEE_FLOAT
+
+    @property
+    def duration(self):
+        """
+        Length of the recording in seconds.
+        """
+        return self.frames / self.sample_rate
+
+    @staticmethod
+    def _read_chunks(path):
+        with open(path, "rb") as wav_file:
+            riff, _, wave_id = struct.unpack("<4sI4s", wav_file.read(12))
+            if riff != b"RIFF" or wave_id != b"WAVE":
+                raise ValueError(f"'{path}' is not a WAV file")
+            fmt = None
+            file_size = os.fstat(wav_file.fileno()).st_size
+            while True:
+                header = wav_file.read(8)
+                if len(header) < 8:
+                    raise ValueError(f"'{path}' has no audio data")
+                chunk_id, chunk_size = struct.unpack("<4sI", header)
+                if chunk_id == b"fmt ":
+                    fmt = wav_file.read(chunk_size)
+                elif chunk_id == b"data":
+                    if fmt is None:
+                        raise ValueError(f"'{path}' has audio data before its format chunk")
+                    # Streamed WAVs may leave the size unset; use what is actually in the file
+                    return fmt, wav_file.tell(), min(chunk_size, file_size - wav_file.tell())
+                else:
+                    wav_file.seek(chunk_size, os.SEEK_CUR)
+                if chunk_size % 2:
+                    wav_file.seek(1, os.SEEK_CUR)  # Chunks are padded to an even size
+
+    def read(self, start, stop):
+        """
+        Reads frames as floats, touching only that part of the file.
+
+        Args:
+            start (int): First frame.
+            stop (int): Frame after the last one.
+
+        Returns:
+            numpy.ndarray: float32 array of shape (frames, channels) in [-1, 1].
+        """
+        block = np.asarray(self.data[max(start, 0):max(stop, 0)])
+        if self.float_samples:
+            return block.astype(np.float32)
+        if self.sample_width == 1:
+            return (block.astype(np.float32) - 128.0) / 128.0
+        if self.sample_width == 3:
+            widened = (block[..., 0].astype(np.int32) << 8) | (block[..., 1].astype(np.int32) << 16) | \
+                (block[..., 2].astype(np.int32) << 24)
+            return widened.astype(np.float32) / 2.0 ** 31
+        return block.astype(np.float32) / float(2 ** (8 * self.sample_width - 1))
+
+
+class PeakPyramid:
+    """
+    Min/max peaks of a recording at several resolutions. Level 0 holds one min/max pair per
+    `BASE_BLOCK` frames and each further level merges `LEVEL_FACTOR` pairs of the one below, so
+    any view of the file can be drawn from a level with about as many peaks as pixels.
+    """
+
+    def __init__(self, wav, mins, maxs):
+        """
+        Args:
+            wav (WavFile): The recording the peaks describe; read directly for close-up views.
+            mins (list): float32 arrays of block minimums, finest level first.
+            maxs (list): float32 arrays of block maximums, aligned with `mins`.
+        """
+        self.wav = wav
+        self.mins = mins
+        self.maxs = maxs
+
+    @classmethod
+    def build(cls, wav):
+        """
+        Computes the pyramid by streaming the memory-mapped samples in fixed-size chunks.
+
+        Args:
+            wav (WavFile): The recording.
+
+        Returns:
+            PeakPyramid: The pyramid.
+        """
+        blocks = -(-wav.frames // BASE_BLOCK)
+        mins = np.empty(blocks, dtype=np.float32)
+        maxs = np.empty(blocks, dtype=np.float32)
+        for start in range(0, wav.frames, BUILD_CHUNK_FRAMES):
+            chunk = wav.read(start, start + BUILD_CHUNK_FRAMES)
+            chunk_blocks = -(-len(chunk) // BASE_BLOCK)
+            # Pad the last block by repeating its final frame so it does not add a false zero
+            chunk = np.pad(chunk, ((0, chunk_blocks * BASE_BLOCK - len(chunk)), (0, 0)), mode="edge")
+            chunk = chunk.reshape(chunk_blocks, -1)
+            first = start // BASE_BLOCK
+            mins[first:first + chunk_blocks] = chunk.min(axis=1)
+            maxs[first:first + chunk_blocks] = chunk.max(axis=1)
+
+        levels_min, levels_max = [mins], [maxs]
+        while len(levels_min[-1]) > 1:
+            levels_min.append(cls._merge(levels_min[-1], np.minimum))
+            levels_max.append(cls._merge(levels_max[-1], np.maximum))
+        return cls(wav, levels_min, levels_max)
+
+    @staticmethod
+    def _merge(peaks, combine):
+        groups = -(-len(peaks) // LEVEL_FACTOR)
+        padded = np.pad(peaks, (0, groups * LEVEL_FACTOR - len(peaks)), mode="edge")
+        return combine.reduce(padded.reshape(groups, LEVEL_FACTOR), axis=1)
+
+    @classmethod
+    def load(cls, path, cache=True):
+        """
+        Opens a WAV file and returns its pyramid, reusing the sidecar `<path>.peaks.npz` when it
+        matches the file's size and modification time, and writing one otherwise.
+
+        Args:
+            path (str): Path of the WAV file.
+            cache (bool): Read and write the sidecar file.
+
+        Returns:
+            PeakPyramid: The pyramid.
+
+        Raises:
+            ValueError: If the file is not a supported WAV file.
+        """
+        wav = WavFile(path)
+        stat = os.stat(path)
+        signature = np.array([SIDECAR_VERSION, BASE_BLOCK, LEVEL_FACTOR, stat.st_size, stat.st_mtime_ns],
+                             dtype=np.int64)
+        sidecar = sidecar_path(path)
+        if cache:
+            try:
+                with np.load(sidecar) as cached:
+                    if np.array_equal(cached["signature"], signature):
+                        count = len(cached.files) // 2
+                        return cls(wav, [cached[f"min{level}"] for level in range(count)],
+                                   [cached[f"max{level}"] for level in range(count)])
+            except (OSError, KeyError, ValueError):
+                pass  # Missing, stale or unreadable sidecar: rebuild it
+
+        pyramid = cls.build(wav)
+        if cache:
+            arrays = {"signature": signature}
+            for level, (mins, maxs) in enumerate(zip(pyramid.mins, pyramid.maxs)):
+                arrays[f"min{level}"] = mins
+                arrays[f"max{level}"] = maxs
+            try:
+                with open(sidecar, "wb") as sidecar_file:
+                    np.savez(sidecar_file, **arrays)
+            except OSError:
+                pass  # e.g. a read-only folder; the pyramid is just not cached
+        return pyramid
+
+    def peaks(self, start, stop, width):
+        """
+        Returns the min/max envelope of a range of frames at roughly `width` points, from the
+        coarsest level that still has at least one peak per point. Views closer than one level-0
+        block per point compute their peaks from just the visible samples in the memory map.
+
+        Args:
+            start (int): First frame of the view.
+            stop (int): Frame after the last one.
+            width (int): Number of points wanted, e.g. the view width in pixels.
+
+        Returns:
+            tuple: (frame position of each point, minimums, maximums) as numpy arrays.
+        """
+        start, stop = max(int(start), 0), min(int(stop), self.wav.frames)
+        if stop <= start:
+            empty = np.zeros(0, dtype=np.float32)
+            return empty, empty, empty
+        frames_per_point = (stop - start) / max(width, 1)
+        if frames_per_point < BASE_BLOCK:
+            step = max(int(frames_per_point), 1)
+            samples = self.wav.read(start, stop)
+            points = -(-len(samples) // step)
+            samples = np.pad(samples, ((0, points * step - len(samples)), (0, 0)), mode="edge").reshape(points, -1)
+            positions = start + np.arange(points, dtype=np.float64) * step
+            return positions, samples.min(axis=1), samples.max(axis=1)
+
+        level = 0
+        block = BASE_BLOCK
+        while level + 1 < len(self.mins) and block * LEVEL_FACTOR <= frames_per_point:
+            level += 1
+            block *= LEVEL_FACTOR
+        first, last = start // block, -(-stop // block)
+        positions = np.arange(first, last, dtype=np.float64) * block
+        return positions, self.mins[level][first:last], self.maxs[level][first:last]
+
+
+def sidecar_path(path):
+    """
+    Returns the path of the peak pyramid cached next to a WAV file.
+    """
+    return path + ".peaks.npz"